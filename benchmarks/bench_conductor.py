@@ -0,0 +1,367 @@
+"""
+Benchmarks for the Conductor framework.
+
+Generates synthetic router files with a mix of template-only, renderer,
+parameterized and @error routes, and measures:
+    - Router.__init__ time, parsing the router file and from a snapshot
+    - activate_router time, eager and lazy, and the memory it allocates
+    - per-request overhead of the wrapped view and gvar/rvar compared with a
+      bare view registered with app.add_url_rule
+    - URL matching cost and map memory of werkzeug's Map against FastMap
+
+Results are written to a JSON file that can be compared between commits.
+Usage:
+    python benchmarks/bench_conductor.py -o before.json
+    python benchmarks/bench_conductor.py -o after.json --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+from werkzeug.exceptions import NotFound  # noqa: E402
+from werkzeug.routing import Map, Rule  # noqa: E402
+
+from conductor import Router, gvar, rvar  # noqa: E402
+from conductor.compiler import compile_router  # noqa: E402
+from conductor.dispatch import FastMap  # noqa: E402
+from conductor.rendering import _wrap_renderer  # noqa: E402
+
+
+# $global data read by the generated routes. Globals are looked up in the
+# main module, which is this script.
+choices = ['apple', 'banana', 'cherry']
+fruit_dict = {'apple': 'A sweet red fruit.'}
+
+_RENDERER_SOURCE = '''from conductor import renderer, gvar, rvar
+from flask import render_template
+
+
+@renderer
+def render(**kwargs):
+    return render_template(rvar('template'), choices=gvar('choices'), **kwargs)
+'''
+
+_TEMPLATE_SOURCE = "<p>{{ choices }} {{ item }}</p>\n"
+
+
+def generate_router(directory: str, size: int) -> str:
+    """
+    Writes a router file with `size` routes, its renderers and templates into
+    directory, and returns the router file path. Of every 20 routes, 8 are
+    template-only, 6 use a renderer and 6 are parameterized. Two @error routes
+    are added on top. Renderer files are shared by up to 10 routes each.
+    """
+    templates = os.path.join(directory, 'templates')
+    renderers = os.path.join(directory, 'renderers')
+    os.makedirs(templates, exist_ok=True)
+    os.makedirs(renderers, exist_ok=True)
+    with open(os.path.join(templates, 'page.html'), 'w') as template_file:
+        template_file.write(_TEMPLATE_SOURCE)
+
+    renderer_count = max(1, size // 10)
+    for i in range(renderer_count):
+        path = os.path.join(renderers, f'renderer_{i}.py')
+        with open(path, 'w') as renderer_file:
+            renderer_file.write(_RENDERER_SOURCE)
+
+    router = {'$version': '0.1'}
+    for i in range(size):
+        renderer = os.path.join(renderers, f'renderer_{i % renderer_count}.py')
+        kind = i % 20
+        if kind < 8:
+            router[f'/page/{i}'] = {
+                'python-renderer': None, 'template': 'page.html'
+            }
+        elif kind < 14:
+            router[f'/render/{i}'] = {
+                'python-renderer': renderer, 'template': 'page.html',
+                '$global': ['choices']
+            }
+        else:
+            router[f'/item/{i}/<item>'] = {
+                'python-renderer': renderer, 'template': 'page.html',
+                '$global': ['choices', 'fruit_dict']
+            }
+    for code in (404, 500):
+        router[f'@error/{code}'] = {
+            'python-renderer': None, 'template': 'page.html'
+        }
+
+    rtr_file = os.path.join(directory, 'router.json')
+    with open(rtr_file, 'w') as router_file:
+        json.dump(router, router_file)
+    return rtr_file
+
+
+def _best_of(func: Callable[[], Any], repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_router(rtr_file: str, repeat: int) -> Dict[str, Any]:
+    """
+    Measures Router.__init__ and activate_router for a router file.
+    """
+    templates = os.path.join(os.path.dirname(rtr_file), 'templates')
+    results = {}
+
+    results['init_parse_s'] = _best_of(
+        lambda: Router(rtr_file, snapshot=rtr_file + '.missing'), repeat
+    )
+    snapshot = compile_router(rtr_file)
+    results['init_snapshot_s'] = _best_of(
+        lambda: Router(rtr_file, snapshot=snapshot), repeat
+    )
+
+    for mode, lazy in (('eager', False), ('lazy', True)):
+        def activate():
+            app = Flask(__name__, template_folder=templates)
+            Router(rtr_file).activate_router(app, lazy=lazy)
+        results[f'activate_{mode}_s'] = _best_of(activate, repeat)
+
+        tracemalloc.start()
+        activate()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[f'activate_{mode}_retained_bytes'] = current
+        results[f'activate_{mode}_peak_bytes'] = peak
+    return results
+
+
+def bench_request_overhead(number: int) -> Dict[str, Any]:
+    """
+    Measures the per-request cost of the Conductor wrapped view, calling
+    gvar/rvar, against a bare view returning the same body, both called
+    directly in a request context and through the Flask test client.
+    """
+    app = Flask(__name__)
+
+    def bare_view():
+        return 'ok'
+
+    def conductor_view():
+        gvar('choices')
+        rvar('template')
+        return 'ok'
+
+    route_data = {'template': 'page.html', '$global': ['choices']}
+    route_cmeta = {'raw_route': '/conductor', 'route_data': route_data}
+    wrapped = {
+        mode: _wrap_renderer(
+            conductor_view, route_data, ['choices'], route_cmeta, mode
+        )
+        for mode in ('live', 'snapshot')
+    }
+    app.add_url_rule('/bare', 'bare', bare_view)
+    for mode, view in wrapped.items():
+        app.add_url_rule(f'/conductor/{mode}', f'conductor_{mode}', view)
+
+    results = {}
+    with app.test_request_context('/bare'):
+        results['call_bare_us'] = min(timeit.repeat(
+            bare_view, number=number, repeat=5
+        )) / number * 1e6
+        for mode, view in wrapped.items():
+            results[f'call_{mode}_us'] = min(timeit.repeat(
+                view, number=number, repeat=5
+            )) / number * 1e6
+
+    client = app.test_client()
+    requests = max(1, number // 20)
+    for name, url in (
+        ('bare', '/bare'),
+        ('live', '/conductor/live'),
+        ('snapshot', '/conductor/snapshot')
+    ):
+        results[f'request_{name}_us'] = min(timeit.repeat(
+            lambda: client.get(url), number=requests, repeat=3
+        )) / requests * 1e6
+    for mode in ('live', 'snapshot'):
+        results[f'call_{mode}_overhead_us'] = (
+            results[f'call_{mode}_us'] - results['call_bare_us']
+        )
+    return results
+
+
+def bench_matching(size: int, number: int) -> Dict[str, Any]:
+    """
+    Measures matching a path against a bound URL map, as Flask does on every
+    request, with werkzeug's Map and with FastMap, for the rules of a router
+    with `size` routes plus Flask's static route. The paths are a mix of
+    literal routes, parameterized routes and misses.
+    """
+    rules = [('/static/<path:filename>', 'static')]
+    paths = []
+    for i in range(size):
+        kind = i % 20
+        if kind < 8:
+            rules.append((f'/page/{i}', f'page_{i}'))
+            paths.append(f'/page/{i}')
+        elif kind < 14:
+            rules.append((f'/render/{i}', f'render_{i}'))
+            paths.append(f'/render/{i}')
+        else:
+            rules.append((f'/item/{i}/<item>', f'item_{i}'))
+            paths.append(f'/item/{i}/apple')
+    paths.append('/missing/path')
+    sample = random.Random(0).choices(paths, k=1000)
+
+    results = {}
+    for name, map_class in (('werkzeug', Map), ('fast', FastMap)):
+        tracemalloc.start()
+        url_map = map_class(
+            [Rule(rule, endpoint=endpoint) for rule, endpoint in rules]
+        )
+        url_map.update()
+        results[f'{name}_map_bytes'] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        adapter = url_map.bind('localhost')
+
+        def match_all():
+            for path in sample:
+                try:
+                    adapter.match(path, 'GET')
+                except NotFound:
+                    pass
+        match_all()
+        calls = max(1, number // len(sample))
+        results[f'{name}_match_us'] = min(timeit.repeat(
+            match_all, number=calls, repeat=3
+        )) / (calls * len(sample)) * 1e6
+    return results
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run(sizes: List[int], repeat: int, number: int) -> Dict[str, Any]:
+    """
+    Runs all benchmarks and returns the results.
+    """
+    results = {
+        'meta': {
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S')
+        },
+        'router': {},
+        'matching': {},
+        'request': bench_request_overhead(number)
+    }
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            rtr_file = generate_router(directory, size)
+            results['router'][str(size)] = bench_router(rtr_file, repeat)
+        results['matching'][str(size)] = bench_matching(size, number)
+    return results
+
+
+def _flatten(results: Dict[str, Any], prefix: str = '') -> Dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        if key == 'meta':
+            continue
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f'{prefix}{key}.'))
+        else:
+            flat[f'{prefix}{key}'] = value
+    return flat
+
+
+def compare(
+        baseline: Dict[str, Any], current: Dict[str, Any], threshold: float
+) -> bool:
+    """
+    Prints every measurement next to its baseline. Returns False if any of
+    them got worse by more than threshold (0.1 is 10%).
+    """
+    old, new = _flatten(baseline), _flatten(current)
+    ok = True
+    print(f"{'benchmark':55} {'baseline':>14} {'current':>14} {'change':>8}")
+    for key in sorted(new):
+        if key not in old or not old[key]:
+            continue
+        change = new[key] / old[key] - 1
+        flag = ''
+        if change > threshold and not key.endswith('overhead_us'):
+            flag = '  REGRESSION'
+            ok = False
+        print(
+            f"{key:55} {old[key]:14.6g} {new[key]:14.6g} "
+            f"{change:+8.1%}{flag}"
+        )
+    return ok
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=[10, 1000, 10000],
+        help="Router sizes to benchmark, in routes."
+    )
+    parser.add_argument(
+        '--repeat', type=int, default=3,
+        help="Runs per router benchmark, the best one is kept."
+    )
+    parser.add_argument(
+        '--number', type=int, default=20000,
+        help="Calls per request overhead measurement."
+    )
+    parser.add_argument(
+        '-o', '--output', default='bench_results.json',
+        help="The JSON file to write the results to."
+    )
+    parser.add_argument(
+        '--compare', default=None,
+        help="A results file of an earlier run to compare against."
+    )
+    parser.add_argument(
+        '--threshold', type=float, default=0.1,
+        help="Relative slowdown reported as a regression. Default 0.1."
+    )
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.repeat, args.number)
+    with open(args.output, 'w') as output_file:
+        json.dump(results, output_file, indent=4)
+    print(f"Wrote results to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        if not compare(baseline, results, args.threshold):
+            return 1
+    else:
+        for key, value in _flatten(results).items():
+            print(f"{key:55} {value:14.6g}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,15 +1,10 @@
 import string
 from flask import Flask
 
-# Expose public API imports for easier use
-from .conductor import Conductor
-from .routing import Router
-from .configuration import Config
-from .rendering import renderer
-from .accessors import gvar, gvars, rvar, rvars, rmval, rmvals
-
 # Internally used variables
 # Version numbers for Conductor components
+# These are defined before the public API imports below, since the submodules
+# import them from this package while it is still initializing.
 _CONDUCTOR_VERSION = "0.1"
 _CONDUCTOR_ROUTER_VERSION = "0.1"
 _CONDUCTOR_CONFIG_VERSION = "0.1"
@@ -22,6 +17,18 @@ def _default_app_starter(app: Flask, host: str, port: int):
     app.run(host=host, port=port)
 
 
+# Expose public API imports for easier use
+from .conductor import Conductor  # noqa: E402
+from .routing import Router  # noqa: E402
+from .configuration import Config  # noqa: E402
+from .rendering import renderer  # noqa: E402
+from .accessors import (  # noqa: E402
+    gvar, gvars, rvar, rvars, rdata, rmval, rmvals
+)
+from .bindings import publish_globals  # noqa: E402
+from .serving import PreforkStarter  # noqa: E402
+
+
 # __all__ list to define the public API of the module.
 # This allows users to import only the specified components.
 # Good to prevent users from accessing internal components directly.
@@ -34,6 +41,9 @@ __all__ = [
     "gvars",
     "rvar",
     "rvars",
+    "rdata",
     "rmval",
-    "rmvals"
+    "rmvals",
+    "publish_globals",
+    "PreforkStarter"
 ]
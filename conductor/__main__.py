@@ -0,0 +1,145 @@
+from .building import build_static
+from .compiler import compile_router
+from .conductor import Conductor
+from .mapdb import write_mapdb
+from .routing import Router
+
+import argparse
+import importlib
+import json
+import os
+import sys
+from typing import Any, List, Optional
+
+
+def _compile_command(args: argparse.Namespace) -> int:
+    for rtr_file in args.router:
+        out_file = compile_router(rtr_file, args.output)
+        print(f"Compiled {rtr_file} -> {out_file}")
+    return 0
+
+
+def _mapdb_command(args: argparse.Namespace) -> int:
+    with open(args.source, 'rb') as file:
+        data = json.load(file)
+    if not isinstance(data, dict):
+        raise SystemExit(
+            f"{args.source} must hold a JSON object to be written as a mapdb "
+            f"file, got {type(data).__name__}."
+        )
+    out_file = args.output or os.path.splitext(args.source)[0] + '.map'
+    count = write_mapdb(out_file, data)
+    print(f"Wrote {count} entries of {args.source} -> {out_file}")
+    return 0
+
+
+# Used to load the object given with --app, in the module:attribute form.
+def _load_app_object(spec: str) -> Any:
+    module_name, _, attribute = spec.partition(':')
+    if not attribute:
+        raise SystemExit(
+            f"--app must be given as module:attribute, got {spec}."
+        )
+    # Like running a script, the current directory is importable
+    sys.path.insert(0, os.getcwd())
+    module = importlib.import_module(module_name)
+    # $global values are read from the main module, which is the app module
+    # when the app runs normally
+    sys.modules['__main__'] = module
+    return getattr(module, attribute)
+
+
+def _build_command(args: argparse.Namespace) -> int:
+    target = _load_app_object(args.app)
+    if isinstance(target, Conductor):
+        app, router = target.app, target.router
+        # The module may have activated the router already
+        if router.app is not app:
+            router.activate_router(app)
+    else:
+        if not args.router:
+            raise SystemExit(
+                "A router file is required when --app is a Flask app and not "
+                "a Conductor."
+            )
+        app, router = target, Router(args.router)
+        router.activate_router(app)
+
+    manifest = build_static(app, router, args.output, args.compress)
+    for raw_route, entry in manifest['routes'].items():
+        print(f"Built {raw_route} -> {entry['file']}")
+    for raw_route, status in manifest['skipped'].items():
+        print(f"Skipped {raw_route}, it answered with status {status}")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Entry point of the Conductor command line interface.
+    Usage:
+        python -m conductor compile router.json
+        python -m conductor build --app myapp:conductor -o build
+        python -m conductor mapdb contact-list.json
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m conductor',
+        description="Conductor framework command line tools."
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    compile_parser = commands.add_parser(
+        'compile',
+        help="Compile router files into validated route table snapshots."
+    )
+    compile_parser.add_argument(
+        'router', nargs='+', help="Path to a router file in JSON format."
+    )
+    compile_parser.add_argument(
+        '-o', '--output', default=None,
+        help="Path of the snapshot to write. Only valid for one router file."
+    )
+    compile_parser.set_defaults(func=_compile_command)
+
+    build_parser = commands.add_parser(
+        'build',
+        help="Render parameterless GET routes to files ahead of time."
+    )
+    build_parser.add_argument(
+        'router', nargs='?', default=None,
+        help="Path to the router file, if --app is a Flask app."
+    )
+    build_parser.add_argument(
+        '--app', required=True,
+        help="The Conductor or Flask app to build, as module:attribute."
+    )
+    build_parser.add_argument(
+        '-o', '--output', default='build',
+        help="The directory to write the files and manifest to."
+    )
+    build_parser.add_argument(
+        '--compress', action='store_true',
+        help="Also write gzip variants of compressible files."
+    )
+    build_parser.set_defaults(func=_build_command)
+
+    mapdb_parser = commands.add_parser(
+        'mapdb',
+        help="Convert a jsonic data source into an indexed mapdb file."
+    )
+    mapdb_parser.add_argument(
+        'source', help="Path to a JSON file holding an object."
+    )
+    mapdb_parser.add_argument(
+        '-o', '--output', default=None,
+        help="Path of the mapdb file. Default is the source with .map."
+    )
+    mapdb_parser.set_defaults(func=_mapdb_command)
+
+    args = parser.parse_args(argv)
+    if args.command == 'compile' and args.output and len(args.router) > 1:
+        parser.error("--output can only be used with a single router file.")
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,6 +1,10 @@
+import os
 from typing import Any, Dict
 
-from flask import g
+from flask import abort, g, request
+
+from .datasources import data_loader
+from .dynamic import is_dynamic_path, substitute_path
 
 
 # gvar = global variable (or data). Used to get any global variables to pass
@@ -12,7 +16,8 @@ def gvar(name: str) -> Any:
     gotten from the app main module. This allows access to any global
     variables defined in the main application.
     """
-    return getattr(g, "_GLOBALS", {}).get(name)
+    context = g.get('_CONDUCTOR')
+    return context.globals.get(name) if context else None
 
 
 # gvars = global variables (or data). Used to get all global variables to pass
@@ -24,7 +29,8 @@ def gvars() -> Dict[str, Any]:
     gotten from the app main module. This allows access to any global
     variables defined in the main application.
     """
-    return getattr(g, "_GLOBALS", {})
+    context = g.get('_CONDUCTOR')
+    return context.globals if context else {}
 
 
 # rvar = route variable (or data). Used to get any route data found under the
@@ -35,7 +41,8 @@ def rvar(name: str) -> Any:
     Route variables include all data found under the route definition in the
     router file, such as $endpoint, template, $methods, etc.
     """
-    return getattr(g, "_ROUTEDATA", {}).get(name)
+    context = g.get('_CONDUCTOR')
+    return context.route_data.get(name) if context else None
 
 
 # rvars = route variables (or data). Used to get all route data found under the
@@ -46,7 +53,36 @@ def rvars() -> Dict[str, Any]:
     Route variables include all data found under the route definition in the
     router file, such as $endpoint, template, $methods, etc.
     """
-    return getattr(g, "_ROUTEDATA", {})
+    context = g.get('_CONDUCTOR')
+    return context.route_data if context else {}
+
+
+# rdata = route data source. Used to get the data of a data source declared
+# under the route definition in the router file.
+def rdata(name: str) -> Any:
+    """
+    Gets the data of a data source of the current route by name.
+    Data sources are route variables holding a `use` key that selects one of
+    their pythonic, jsonic or mapdb files. The file is loaded once and shared
+    by all routes using it until it changes, so the data must not be modified.
+    Files with URL parameters in their path, like "/software/<name>/data.json",
+    are resolved for the current request, and a missing file aborts with 404.
+    Returns None if the route has no such data source.
+    Usage:
+        contacts = rdata('contact-list')
+    """
+    context = g.get('_CONDUCTOR')
+    if not context:
+        return None
+    source = context.route_meta['data_sources'].get(name)
+    if not source:
+        return None
+    if is_dynamic_path(source['path']):
+        path = substitute_path(source['path'], request.view_args or {})
+        if path is None or not os.path.isfile(path):
+            abort(404)
+        source = {'variant': source['variant'], 'path': path}
+    return data_loader.load(source)
 
 
 # rmval = route metadata value. A value that is computed when a route is being
@@ -57,7 +93,8 @@ def rmval() -> Dict[str, Any]:
     Route metadata includes all values that are computed when a route is
     being activated, such as endpoint, template, methods, etc.
     """
-    return getattr(g, "_ROUTEMETA", {}).get("value")
+    context = g.get('_CONDUCTOR')
+    return context.route_meta.get("value") if context else None
 
 
 # rmvals = route metadata values. Contains all values that are computed when a
@@ -68,4 +105,5 @@ def rmvals() -> Dict[str, Any]:
     Route metadata includes all values that are computed when a route is
     being activated, such as endpoint, template, methods, etc.
     """
-    return getattr(g, "_ROUTEMETA", {})
+    context = g.get('_CONDUCTOR')
+    return context.route_meta if context else {}
@@ -0,0 +1,237 @@
+import logging
+import os
+import queue
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, List, Optional
+
+
+_POLICIES = ('block', 'drop', 'caller_runs')
+_COUNTERS = ('submitted', 'completed', 'failed', 'dropped', 'inline')
+
+# Tells a worker thread to exit
+_STOP = None
+
+# All executors, so their locks can be replaced in forked workers
+_executors: "weakref.WeakSet[BackgroundExecutor]" = weakref.WeakSet()
+
+
+class BackgroundExecutor:
+    """
+    A thread pool with a bounded queue for work that should not delay the
+    response, such as audit logging or cache warming. Work runs outside of the
+    request and app contexts, so pass it the values it needs.
+    When the queue is full, the policy decides what happens to new work:
+    'block' waits for a free slot (up to block_timeout, then drops), 'drop'
+    drops the work, 'caller_runs' runs it on the submitting thread.
+    The threads are started on the first submit in every process, so forked
+    workers get their own pool.
+    Args:
+        workers (int, optional): The number of threads. Default 4.
+        queue_size (int, optional): The maximum number of queued calls.
+        Default 1024.
+        policy (str, optional): What to do when the queue is full. Default
+        'block'.
+        block_timeout (float, optional): Seconds the 'block' policy waits for
+        a free slot before dropping the call. Default 1. None waits forever,
+        holding the request thread for as long as the queue stays full.
+        logger (logging.Logger, optional): Where failed and dropped calls are
+        reported. Default is the 'conductor' logger.
+    Raises:
+        ValueError: If the policy is unknown or the sizes are not positive.
+    Usage:
+        executor = BackgroundExecutor(workers=2, policy='drop')
+        executor.submit(audit_log, user_id, action)
+        executor.shutdown(timeout=10)
+    """
+    def __init__(
+        self, workers: int = 4, queue_size: int = 1024,
+        policy: str = 'block', block_timeout: Optional[float] = 1.0,
+        logger: Optional[logging.Logger] = None
+    ) -> None:
+        if policy not in _POLICIES:
+            raise ValueError(
+                f"Invalid background policy {policy}. "
+                f"Allowed policies are {', '.join(_POLICIES)}."
+            )
+        if workers < 1 or queue_size < 1:
+            raise ValueError(
+                "Background workers and queue_size must be at least 1."
+            )
+        if block_timeout is not None and (
+            isinstance(block_timeout, bool)
+            or not isinstance(block_timeout, (int, float))
+            or block_timeout <= 0
+        ):
+            raise ValueError(
+                f"Invalid background block_timeout {block_timeout}. "
+                f"Expected a positive number of seconds or None."
+            )
+        self.workers = workers
+        self.queue_size = queue_size
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.logger = logger if logger else logging.getLogger('conductor')
+        self.stats: Dict[str, int] = dict.fromkeys(_COUNTERS, 0)
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._stopped = False
+        # Set by shutdown, workers then exit once the queue is empty
+        self._stopping = threading.Event()
+        # Submits between their _stopped check and their put, which workers
+        # wait for before they exit
+        self._submitting = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue(queue_size)
+        self._threads: List[threading.Thread] = []
+        _executors.add(self)
+
+    def start(self) -> None:
+        """
+        Starts the threads in the current process, if they are not running
+        yet. Called by submit, so it only has to be called to pay the start
+        up cost early.
+        """
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Threads, queue and locks of the parent do not survive a fork
+            self._pid = os.getpid()
+            self._stopped = False
+            self._stopping = threading.Event()
+            self._submitting = 0
+            self._queue = queue.Queue(self.queue_size)
+            self.stats = dict.fromkeys(_COUNTERS, 0)
+            self._threads = [
+                threading.Thread(
+                    target=self._work, name=f'conductor-background-{i}',
+                    daemon=True
+                )
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def submit(self, func: Callable, *args: Any, **kwargs: Any) -> bool:
+        """
+        Queues a call of func. Returns False if the call was dropped. Once the
+        executor is shut down, calls run on the submitting thread.
+        """
+        if self._pid != os.getpid():
+            self.start()
+        with self._lock:
+            stopped = self._stopped
+            if not stopped:
+                self._submitting += 1
+        if stopped:
+            self._run(func, args, kwargs, 'inline')
+            return True
+
+        item = (func, args, kwargs)
+        try:
+            if self.policy == 'block':
+                self._queue.put(item, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(item)
+        except queue.Full:
+            if self.policy == 'caller_runs':
+                self._run(func, args, kwargs, 'inline')
+                return True
+            self._count('dropped')
+            self.logger.warning(
+                "Background queue is full, dropped call of %s.",
+                getattr(func, '__name__', func)
+            )
+            return False
+        finally:
+            with self._lock:
+                self._submitting -= 1
+        self._count('submitted')
+        return True
+
+    def shutdown(self, timeout: Optional[float] = None) -> bool:
+        """
+        Runs the queued calls and stops the threads, waiting at most timeout
+        seconds in total. Returns False if calls were still running when the
+        timeout passed.
+        """
+        with self._lock:
+            if self._pid != os.getpid() or self._stopped:
+                return True
+            self._stopped = True
+            self._stopping.set()
+            threads = self._threads
+        for _ in threads:
+            # Wakes workers waiting on an empty queue. A full queue has no
+            # waiting workers, they see _stopping once it is drained.
+            try:
+                self._queue.put_nowait(_STOP)
+            except queue.Full:
+                break
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in threads:
+            remaining = (
+                None if deadline is None
+                else max(0.0, deadline - time.monotonic())
+            )
+            thread.join(remaining)
+        drained = not any(thread.is_alive() for thread in threads)
+        if not drained:
+            self.logger.warning(
+                "Background calls still running after %s seconds.", timeout
+            )
+        return drained
+
+    def _work(self) -> None:
+        work_queue = self._queue
+        stopping = self._stopping
+        while True:
+            if stopping.is_set():
+                try:
+                    item = work_queue.get(timeout=0.05)
+                except queue.Empty:
+                    # Once stopped, no submit starts a put, so an empty
+                    # queue without puts in progress stays empty
+                    with self._lock:
+                        if self._submitting or not work_queue.empty():
+                            continue
+                    # Passes the wake up on, this worker may have taken the
+                    # _STOP meant for a worker still waiting on the queue
+                    try:
+                        work_queue.put_nowait(_STOP)
+                    except queue.Full:
+                        pass
+                    return
+            else:
+                item = work_queue.get()
+            if item is _STOP:
+                continue
+            self._run(*item, 'completed')
+
+    def _run(
+            self, func: Callable, args: Any, kwargs: Any, counter: str
+    ) -> None:
+        try:
+            func(*args, **kwargs)
+        except Exception:
+            self._count('failed')
+            self.logger.exception(
+                "Background call of %s failed.",
+                getattr(func, '__name__', func)
+            )
+        else:
+            self._count(counter)
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self.stats[counter] += 1
+
+
+def _reset_after_fork() -> None:
+    # A lock held by a thread of the parent would never be released
+    for executor in list(_executors):
+        executor._lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
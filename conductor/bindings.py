@@ -0,0 +1,100 @@
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping
+
+
+# The version of the published globals. Snapshot bindings compare against it
+# on every request and only resolve their globals again when it changed.
+_globals_version = 0
+
+_GLOBALS_MODES = ('live', 'snapshot')
+
+
+# publish_globals = tells Conductor that the app changed its global variables.
+# Only needed for routes using the 'snapshot' globals mode.
+def publish_globals() -> int:
+    """
+    Publishes a change of the app's global variables, so that routes using
+    the 'snapshot' globals mode resolve them again on their next request.
+    Rebinding a global (choices = [...]) needs a publish, mutating the object
+    it refers to (choices.append(...)) does not. Returns the new version.
+    Usage:
+        import conductor
+        choices = load_choices()
+        conductor.publish_globals()
+    """
+    global _globals_version
+    _globals_version += 1
+    return _globals_version
+
+
+class RouteContext:
+    """
+    The per-request data of a Conductor route, stored in the single `g` slot
+    that gvar<s>(), rvar<s>() and rmval<s>() read from.
+    """
+    __slots__ = ('globals', 'route_data', 'route_meta')
+
+    def __init__(
+        self, globals_: Mapping[str, Any], route_data: Dict[str, Any],
+        route_meta: Dict[str, Any]
+    ) -> None:
+        self.globals = globals_
+        self.route_data = route_data
+        self.route_meta = route_meta
+
+
+class GlobalsBinding:
+    """
+    Binds the $global names of a route to the app main module.
+    In 'live' mode every request gets a fresh context holding the current
+    values. In 'snapshot' mode the values are resolved into a read-only view
+    that is reused until publish_globals() is called, so a request only costs
+    a version comparison.
+    Args:
+        names (list): The global variable names of the route.
+        route_data (dict): The route data, as returned by rvar<s>().
+        route_meta (dict): The route metadata, as returned by rmval<s>().
+        mode (str, optional): 'live' or 'snapshot'. Default 'live'.
+    Raises:
+        ValueError: If the mode is not 'live' or 'snapshot'.
+    """
+    def __init__(
+        self, names: List[str], route_data: Dict[str, Any],
+        route_meta: Dict[str, Any], mode: str = 'live'
+    ) -> None:
+        if mode not in _GLOBALS_MODES:
+            raise ValueError(
+                f"Invalid globals mode {mode}. "
+                f"Allowed modes are {', '.join(_GLOBALS_MODES)}."
+            )
+        import __main__
+
+        self._main = __main__
+        self.names = tuple(names)
+        self.route_data = route_data
+        self.route_meta = route_meta
+        self.mode = mode
+        self._version = None
+        self._context = None
+        self.context = (
+            self._live_context if mode == 'live' else self._snapshot_context
+        )
+
+    def _resolve(self) -> Dict[str, Any]:
+        main = self._main
+        return {name: getattr(main, name, None) for name in self.names}
+
+    def _live_context(self) -> RouteContext:
+        return RouteContext(self._resolve(), self.route_data, self.route_meta)
+
+    def _snapshot_context(self) -> RouteContext:
+        if self._version != _globals_version:
+            # Read the version first, a publish during the resolve then only
+            # causes one extra refresh instead of a missed one.
+            version = _globals_version
+            self._context = RouteContext(
+                MappingProxyType(self._resolve()),
+                self.route_data, self.route_meta
+            )
+            self._version = version
+        return self._context
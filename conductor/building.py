@@ -0,0 +1,212 @@
+import hashlib
+import json
+import mimetypes
+import os
+from typing import Any, Dict, Optional
+
+from flask import Flask, request, send_file
+from werkzeug.http import parse_accept_header
+
+from .compression import _DEFAULT_MIMETYPES, compress_body
+from .dynamic import is_dynamic_path
+from .layering import router_root
+
+
+# Bumped whenever the layout of the prebuild manifest changes.
+_MANIFEST_FORMAT = 2
+_MANIFEST_NAME = 'manifest.json'
+
+
+def prebuild_eligible(route_cmeta: Dict[str, Any]) -> bool:
+    """
+    Whether a route can be rendered ahead of time: a URL route without path
+    parameters that only accepts GET. Routes opt out with `"$prebuild": false`.
+    """
+    url_rule = route_cmeta['url_rule']
+    return (
+        url_rule is not None
+        and '<' not in url_rule
+        and route_cmeta['methods'] == ['GET']
+        and route_cmeta['route_data'].get('$prebuild', True) is not False
+    )
+
+
+# Used to key a build on the files it rendered from: the renderer modules the
+# registry imported, the templates Jinja loaded, includes and parents as well,
+# and the data source files of the routes. Paths below root are stored
+# relative to it, so a build stays valid when the tree is moved.
+def _source_digests(
+        app: Flask, router: Any, root: str
+) -> Dict[str, str]:
+    paths = set(router.registry.modules())
+    cache = app.jinja_env.cache
+    if cache is not None:
+        paths.update(
+            template.filename for template in cache.values()
+            if template.filename
+        )
+    for route_cmeta in router.routes:
+        paths.update(
+            source['path'] for source in route_cmeta['data_sources'].values()
+            if not is_dynamic_path(source['path'])
+        )
+
+    digests = {}
+    for path in paths:
+        path = os.path.abspath(path)
+        try:
+            with open(path, 'rb') as source_file:
+                digest = hashlib.sha1(source_file.read()).hexdigest()
+        except OSError:
+            continue
+        relative = os.path.relpath(path, root)
+        digests[
+            path if relative.startswith(os.pardir) else relative
+        ] = digest
+    return digests
+
+
+def _sources_changed(sources: Dict[str, str], root: str) -> bool:
+    for path, digest in sources.items():
+        try:
+            with open(os.path.join(root, path), 'rb') as source_file:
+                if hashlib.sha1(source_file.read()).hexdigest() != digest:
+                    return True
+        except OSError:
+            return True
+    return False
+
+
+def build_static(
+        app: Flask, router: Any, out_dir: str, compress: bool = False
+) -> Dict[str, Any]:
+    """
+    Renders every eligible route of an activated router through the Flask
+    test client into out_dir, and writes a manifest that Router loads with
+    its prebuilt_dir argument. Routes that do not answer with a 200 are
+    skipped and listed in the manifest with their status code.
+    If compress is True, a gzip variant is written next to every file with a
+    compressible mimetype, unless its route has `"$compress": false`, and is
+    served to clients accepting gzip.
+    The manifest records digests of the renderer files, templates and data
+    source files the build rendered from, so a later edit of any of them
+    makes load_manifest reject the build. Modules that renderers import
+    themselves are not tracked, rebuild after changing them.
+    Returns the manifest.
+    Usage:
+        router.activate_router(app)
+        build_static(app, router, 'build')
+        # or from the command line
+        python -m conductor build router.json --app myapp:conductor -o build
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {
+        'format': _MANIFEST_FORMAT,
+        'router_hash': router.content_hash,
+        'sources': {},
+        'routes': {},
+        'skipped': {}
+    }
+    client = app.test_client()
+    for route_cmeta in router.routes:
+        if not prebuild_eligible(route_cmeta):
+            continue
+        raw_route = route_cmeta['raw_route']
+        # Files are stored uncompressed, gzip variants are written below
+        response = client.get(
+            route_cmeta['url_rule'], headers={'Accept-Encoding': 'identity'}
+        )
+        if response.status_code != 200:
+            manifest['skipped'][raw_route] = response.status_code
+            continue
+
+        body = response.get_data()
+        mimetype = response.mimetype or 'application/octet-stream'
+        extension = mimetypes.guess_extension(mimetype) or '.bin'
+        # Named by a hash of the route, endpoints may hold path separators
+        file_name = (
+            hashlib.sha1(raw_route.encode('utf-8')).hexdigest()[:16]
+            + extension
+        )
+        with open(os.path.join(out_dir, file_name), 'wb') as out_file:
+            out_file.write(body)
+        manifest['routes'][raw_route] = {
+            'file': file_name,
+            'mimetype': response.content_type,
+            'etag': hashlib.sha1(body).hexdigest(),
+            'size': len(body)
+        }
+        if (
+            compress and mimetype in _DEFAULT_MIMETYPES
+            and route_cmeta['compress'] != {'enabled': False}
+        ):
+            gzip_name = file_name + '.gz'
+            with open(os.path.join(out_dir, gzip_name), 'wb') as out_file:
+                out_file.write(compress_body(body, 'gzip', 9))
+            manifest['routes'][raw_route]['gzip'] = gzip_name
+
+    manifest['sources'] = _source_digests(
+        app, router, router_root(router.rtr_file)
+    )
+    with open(os.path.join(out_dir, _MANIFEST_NAME), 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=4)
+    return manifest
+
+
+def load_manifest(
+        out_dir: str, content_hash: str, root: str = ''
+) -> Optional[Dict[str, Any]]:
+    """
+    Loads the prebuild manifest of out_dir if it was built from a router file
+    with the given content hash, and from the current contents of the files
+    it rendered from. root is the router root that relative source paths are
+    resolved against. Returns None if it is missing or stale.
+    """
+    try:
+        with open(os.path.join(out_dir, _MANIFEST_NAME)) as manifest_file:
+            manifest = json.load(manifest_file)
+    except (OSError, ValueError):
+        return None
+    if (
+        manifest.get('format') != _MANIFEST_FORMAT
+        or manifest.get('router_hash') != content_hash
+        or _sources_changed(manifest.get('sources', {}), root)
+    ):
+        return None
+    return manifest
+
+
+# Used as the view of a prebuilt route. The file is sent with send_file, which
+# uses the server's wsgi.file_wrapper (sendfile where available) and answers
+# conditional and range requests from the stored ETag. Clients accepting gzip
+# get the gzip variant, if one was built, without compressing anything.
+def _prebuilt_view(out_dir: str, entry: Dict[str, Any]) -> callable:
+    path = os.path.abspath(os.path.join(out_dir, entry['file']))
+    mimetype = entry['mimetype']
+    etag = entry['etag']
+    gzip_path = (
+        os.path.abspath(os.path.join(out_dir, entry['gzip']))
+        if entry.get('gzip') else None
+    )
+
+    def prebuilt_view(*args, **kwargs):
+        if gzip_path is None:
+            return send_file(
+                path, mimetype=mimetype, etag=etag, conditional=True
+            )
+        accepted = parse_accept_header(
+            request.headers.get('Accept-Encoding')
+        ).best_match(['gzip'])
+        if accepted:
+            response = send_file(
+                gzip_path, mimetype=mimetype, etag=f"{etag}-gzip",
+                conditional=True
+            )
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = send_file(
+                path, mimetype=mimetype, etag=etag, conditional=True
+            )
+        response.vary.add('Accept-Encoding')
+        return response
+    return prebuilt_view
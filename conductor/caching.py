@@ -0,0 +1,474 @@
+import abc
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from flask import Response, current_app, request
+
+
+class LRUCache:
+    """
+    A thread-safe, bounded least recently used cache. Entries can expire after
+    a TTL, and the cache can be bounded by entry count and total entry size.
+    Hits, misses and evictions are counted.
+    Args:
+        max_entries (int, optional): The maximum number of entries. Default
+        128.
+        max_size (int, optional): The maximum total size of all entries, as
+        given to set(). Default None, meaning unbounded.
+    Usage:
+        cache = LRUCache(max_entries=256)
+        cache.set('key', value, ttl=60)
+        cache.get('key')  # value, or None once expired or evicted
+    """
+    def __init__(
+        self, max_entries: int = 128, max_size: Optional[int] = None
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1.")
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # key -> (value, expiry as monotonic time or None, size)
+        self._data: "OrderedDict[Hashable, Tuple[Any, Optional[float], int]]"
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Gets a value and marks it as most recently used.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                if entry[1] is None or entry[1] > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                self._remove(key)
+            self.misses += 1
+            return default
+
+    def set(
+        self, key: Hashable, value: Any, ttl: Optional[float] = None,
+        size: int = 0
+    ) -> None:
+        """
+        Sets a value, evicting the least recently used entries if the cache is
+        full. Values larger than max_size are not stored.
+        """
+        if self.max_size is not None and size > self.max_size:
+            return
+        expires = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, expires, size)
+            self.size += size
+            while (
+                len(self._data) > self.max_entries
+                or (self.max_size is not None and self.size > self.max_size)
+            ):
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Removes a value and returns it.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            self._remove(key)
+            return entry[0]
+
+    def clear(self) -> None:
+        """
+        Removes all values.
+        """
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+    def _remove(self, key: Hashable) -> None:
+        # The lock must be held by the caller
+        self.size -= self._data.pop(key)[2]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Gets the hit, miss and eviction counters and the current usage.
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._data),
+            'size': self.size
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class CachedResponse:
+    """
+    A response stored by a cache backend.
+    """
+    __slots__ = ('body', 'status', 'headers', 'etag')
+
+    def __init__(
+        self, body: bytes, status: int, headers: List[Tuple[str, str]],
+        etag: str
+    ) -> None:
+        self.body = body
+        self.status = status
+        self.headers = headers
+        self.etag = etag
+
+
+class CacheBackend(abc.ABC):
+    """
+    The interface of response cache backends. Backends are created once per
+    route by the factory registered with register_cache_backend(), which gets
+    the `max_entries` of the route, its raw route as `namespace` and the
+    `options` of its $cache block. max_entries and clear() apply to the
+    entries of the namespace only, when backends share their storage.
+    """
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """
+        Gets a fresh response by key, or None.
+        """
+
+    @abc.abstractmethod
+    def set(
+        self, key: str, response: CachedResponse, ttl: Optional[float]
+    ) -> None:
+        """
+        Stores a response for ttl seconds, or until it is evicted if None.
+        """
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> None:
+        """
+        Removes a response by key.
+        """
+
+    @abc.abstractmethod
+    def clear(self) -> None:
+        """
+        Removes all responses of the namespace.
+        """
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    An in-process LRU response cache. Every worker process has its own.
+    """
+    def __init__(
+        self, max_entries: int = 128, namespace: str = ''
+    ) -> None:
+        self.lru = LRUCache(max_entries=max_entries)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        return self.lru.get(key)
+
+    def set(
+        self, key: str, response: CachedResponse, ttl: Optional[float]
+    ) -> None:
+        self.lru.set(key, response, ttl)
+
+    def delete(self, key: str) -> None:
+        self.lru.pop(key)
+
+    def clear(self) -> None:
+        self.lru.clear()
+
+
+class SqliteCacheBackend(CacheBackend):
+    """
+    A response cache in a sqlite database file, shared by all worker
+    processes and routes using the same path. Every route has its own
+    namespace in the file, and its entries are evicted least recently used
+    first once it has more than max_entries of them.
+    Args:
+        max_entries (int, optional): The maximum number of entries of the
+        namespace. Default 1024.
+        namespace (str, optional): The namespace of the entries, the raw
+        route. Default ''.
+        path (str, optional): The database file. Default
+        '__conductor__/response-cache.sqlite'.
+    """
+    def __init__(
+        self, max_entries: int = 1024, namespace: str = '',
+        path: str = os.path.join('__conductor__', 'response-cache.sqlite')
+    ) -> None:
+        self.max_entries = max_entries
+        self.namespace = namespace
+        self.path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS route_responses ("
+                "namespace TEXT, key TEXT, expires REAL, accessed REAL, "
+                "status INTEGER, headers TEXT, etag TEXT, body BLOB, "
+                "PRIMARY KEY (namespace, key))"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS route_responses_accessed "
+                "ON route_responses (namespace, accessed)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite connections may not be shared between threads, nor between
+        # processes forked after the connection was opened
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT expires, status, headers, etag, body FROM route_responses "
+            "WHERE namespace = ? AND key = ?", (self.namespace, key)
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if row[0] is not None and row[0] <= now:
+            return None
+        with connection:
+            connection.execute(
+                "UPDATE route_responses SET accessed = ? "
+                "WHERE namespace = ? AND key = ?", (now, self.namespace, key)
+            )
+        return CachedResponse(
+            row[4], row[1], [tuple(h) for h in json.loads(row[2])], row[3]
+        )
+
+    def set(
+        self, key: str, response: CachedResponse, ttl: Optional[float]
+    ) -> None:
+        now = time.time()
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO route_responses "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.namespace, key,
+                    now + ttl if ttl is not None else None, now,
+                    response.status, json.dumps(response.headers),
+                    response.etag, response.body
+                )
+            )
+            connection.execute(
+                "DELETE FROM route_responses WHERE namespace = ? AND key IN "
+                "(SELECT key FROM route_responses WHERE namespace = ? "
+                "ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.namespace, self.namespace, self.max_entries)
+            )
+
+    def delete(self, key: str) -> None:
+        with self._connection() as connection:
+            connection.execute(
+                "DELETE FROM route_responses WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            )
+
+    def clear(self) -> None:
+        with self._connection() as connection:
+            connection.execute(
+                "DELETE FROM route_responses WHERE namespace = ?",
+                (self.namespace,)
+            )
+
+
+_CACHE_BACKENDS: Dict[str, Callable[..., CacheBackend]] = {
+    'memory': MemoryCacheBackend,
+    'sqlite': SqliteCacheBackend
+}
+
+_CACHE_KEYS = ('ttl', 'max_entries', 'vary', 'backend', 'options')
+_VARY_KEYS = ('args', 'query', 'headers')
+
+
+# Used to add response cache backends that can be selected with the `backend`
+# key of a $cache block.
+def register_cache_backend(
+        name: str, factory: Callable[..., CacheBackend]
+) -> None:
+    """
+    Registers a response cache backend under a name.
+    Usage:
+        register_cache_backend(
+            'redis', lambda max_entries, namespace, **options: ...
+        )
+    """
+    _CACHE_BACKENDS[name] = factory
+
+
+def cache_config(raw_route: str, config: Any) -> Dict[str, Any]:
+    """
+    Validates the $cache block of a route and fills in the defaults.
+    `"$cache": true` caches with the defaults: a 60 second TTL, 128 entries,
+    varying on all path args and the full query string, in memory.
+    Raises:
+        ValueError: If the $cache block is invalid.
+    """
+    if config is True:
+        config = {}
+    if not isinstance(config, dict):
+        raise ValueError(
+            f"Invalid $cache for route {raw_route}. "
+            f"Expected true or a dictionary, got {type(config).__name__}."
+        )
+    for key in config:
+        if key not in _CACHE_KEYS:
+            raise ValueError(
+                f"Invalid $cache key {key} for route {raw_route}. "
+                f"Allowed keys are {', '.join(_CACHE_KEYS)}."
+            )
+    ttl = config.get('ttl', 60)
+    if ttl is not None and (
+        not isinstance(ttl, (int, float)) or isinstance(ttl, bool) or ttl <= 0
+    ):
+        raise ValueError(
+            f"Invalid $cache ttl for route {raw_route}. "
+            f"Expected a positive number or null, got {ttl}."
+        )
+    max_entries = config.get('max_entries', 128)
+    if (
+        not isinstance(max_entries, int) or isinstance(max_entries, bool)
+        or max_entries < 1
+    ):
+        raise ValueError(
+            f"Invalid $cache max_entries for route {raw_route}. "
+            f"Expected a positive integer, got {max_entries}."
+        )
+    if not isinstance(config.get('options', {}), dict):
+        raise ValueError(
+            f"Invalid $cache options for route {raw_route}. "
+            f"Expected a dictionary."
+        )
+    vary = vary_config(raw_route, '$cache', config.get('vary', {}))
+    backend = config.get('backend', 'memory')
+    if backend not in _CACHE_BACKENDS:
+        raise ValueError(
+            f"Unknown $cache backend {backend} for route {raw_route}. "
+            f"Registered backends are {', '.join(_CACHE_BACKENDS)}."
+        )
+    return {
+        'ttl': ttl,
+        'max_entries': max_entries,
+        'vary': vary,
+        'backend': backend,
+        'options': config.get('options', {})
+    }
+
+
+def vary_config(raw_route: str, option: str, vary: Any) -> Dict[str, Any]:
+    """
+    Validates the vary block of a route option and fills in the defaults: all
+    path args and the full query string, no headers.
+    Raises:
+        ValueError: If the vary block is invalid.
+    """
+    if not isinstance(vary, dict) or any(k not in _VARY_KEYS for k in vary):
+        raise ValueError(
+            f"Invalid {option} vary for route {raw_route}. Expected a "
+            f"dictionary with the keys {', '.join(_VARY_KEYS)}."
+        )
+    return {
+        'args': vary.get('args', True),
+        'query': vary.get('query', True),
+        'headers': vary.get('headers', [])
+    }
+
+
+# Used to compute the part of a cache key that depends on the request: the
+# path args, query keys and headers a route varies on.
+def _vary_key(vary: Dict[str, Any], view_kwargs: Dict[str, Any]) -> str:
+    args = vary['args']
+    if args is True:
+        args = sorted(view_kwargs.items())
+    elif args:
+        args = [(name, view_kwargs.get(name)) for name in args]
+    else:
+        args = []
+
+    query = vary['query']
+    if query is True:
+        query = sorted(request.args.items(multi=True))
+    elif query:
+        query = [(name, request.args.getlist(name)) for name in query]
+    else:
+        query = []
+
+    headers = [(name, request.headers.get(name)) for name in vary['headers']]
+    return json.dumps([args, query, headers], default=str)
+
+
+# Used to wrap a view with the response cache configured by the $cache block of
+# its route. Only successful GET and HEAD responses are cached, and every
+# cached response carries an ETag, so clients can revalidate and get a 304.
+def _cache_view(
+        view: callable, route_cmeta: Dict[str, Any], config: Dict[str, Any]
+) -> callable:
+    backend = _CACHE_BACKENDS[config['backend']](
+        max_entries=config['max_entries'],
+        namespace=route_cmeta['raw_route'], **config['options']
+    )
+    ttl = config['ttl']
+    vary = config['vary']
+    prefix = f"{route_cmeta['raw_route']}|"
+    vary_headers = ', '.join(vary['headers'])
+
+    def cached_view(*args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return view(*args, **kwargs)
+
+        key = prefix + _vary_key(vary, kwargs)
+        cached = backend.get(key)
+        if cached is not None:
+            response = Response(
+                cached.body, status=cached.status, headers=cached.headers
+            )
+        else:
+            response = current_app.make_response(view(*args, **kwargs))
+            if (
+                response.status_code != 200
+                or response.is_streamed
+                or 'Set-Cookie' in response.headers
+            ):
+                return response
+            body = response.get_data()
+            if vary_headers:
+                response.vary.update(vary['headers'])
+            etag = hashlib.sha1(body).hexdigest()
+            headers = [
+                (name, value) for name, value in response.headers.items()
+                if name not in ('Content-Length', 'ETag')
+            ]
+            cached = CachedResponse(body, 200, headers, etag)
+            backend.set(key, cached, ttl)
+
+        response.set_etag(cached.etag)
+        return response.make_conditional(request)
+
+    # Exposed so the cache can be cleared at runtime
+    cached_view.cache = backend
+    return cached_view
@@ -0,0 +1,125 @@
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import Response, current_app, request
+
+from .caching import _vary_key, vary_config
+
+
+_COALESCE_KEYS = ('timeout', 'vary', 'methods')
+_COUNTERS = ('leaders', 'shared', 'timeouts', 'unshared')
+
+
+def coalesce_config(raw_route: str, config: Any) -> Dict[str, Any]:
+    """
+    Validates the $coalesce block of a route and fills in the defaults.
+    `"$coalesce": true` coalesces GET and HEAD requests with the same path
+    args and query string, and waits at most 10 seconds for the first one.
+    Raises:
+        ValueError: If the $coalesce block is invalid.
+    """
+    if config is True:
+        config = {}
+    if not isinstance(config, dict):
+        raise ValueError(
+            f"Invalid $coalesce for route {raw_route}. "
+            f"Expected true or a dictionary, got {type(config).__name__}."
+        )
+    for key in config:
+        if key not in _COALESCE_KEYS:
+            raise ValueError(
+                f"Invalid $coalesce key {key} for route {raw_route}. "
+                f"Allowed keys are {', '.join(_COALESCE_KEYS)}."
+            )
+    timeout = config.get('timeout', 10)
+    if not isinstance(timeout, (int, float)) or timeout <= 0:
+        raise ValueError(
+            f"Invalid $coalesce timeout for route {raw_route}. "
+            f"Expected a positive number, got {timeout}."
+        )
+    methods = config.get('methods', ['GET', 'HEAD'])
+    if not isinstance(methods, list):
+        raise ValueError(
+            f"Invalid $coalesce methods for route {raw_route}. "
+            f"Expected a list, got {type(methods).__name__}."
+        )
+    return {
+        'timeout': timeout,
+        'vary': vary_config(raw_route, '$coalesce', config.get('vary', {})),
+        'methods': methods
+    }
+
+
+class _Flight:
+    """
+    A request being handled by a leader, which followers wait on. `response`
+    holds (body, status, headers) once the leader has a response that can be
+    shared.
+    """
+    __slots__ = ('done', 'response')
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.response: Optional[Tuple[bytes, int, List[Tuple[str, str]]]]
+        self.response = None
+
+
+# Used to wrap a view so that identical concurrent requests run it once. The
+# first request of a key (method, path args and vary key) becomes the leader
+# and runs the view, the others wait for its response and get a copy of it.
+# Followers run the view themselves if the leader fails, takes longer than the
+# timeout, or has a response that cannot be shared: streamed responses and
+# responses setting cookies. Coalescing is per process.
+def _coalesced_view(view: callable, config: Dict[str, Any]) -> callable:
+    timeout = config['timeout']
+    vary = config['vary']
+    methods = config['methods']
+    flights: Dict[str, _Flight] = {}
+    stats = dict.fromkeys(_COUNTERS, 0)
+    lock = threading.Lock()
+
+    def coalesced_view(*args, **kwargs):
+        if request.method not in methods:
+            return view(*args, **kwargs)
+
+        key = f"{request.method}|{_vary_key(vary, kwargs)}"
+        with lock:
+            flight = flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = flights[key] = _Flight()
+                stats['leaders'] += 1
+
+        if leader:
+            try:
+                response = current_app.make_response(view(*args, **kwargs))
+                if (
+                    not response.is_streamed
+                    and 'Set-Cookie' not in response.headers
+                ):
+                    flight.response = (
+                        response.get_data(), response.status_code,
+                        list(response.headers.items())
+                    )
+                return response
+            finally:
+                with lock:
+                    del flights[key]
+                flight.done.set()
+
+        if not flight.done.wait(timeout):
+            counter = 'timeouts'
+        elif flight.response is None:
+            counter = 'unshared'
+        else:
+            with lock:
+                stats['shared'] += 1
+            body, status, headers = flight.response
+            return Response(body, status=status, headers=headers)
+        with lock:
+            stats[counter] += 1
+        return view(*args, **kwargs)
+
+    # Exposed so the counters can be inspected at runtime
+    coalesced_view.stats = stats
+    return coalesced_view
@@ -0,0 +1,319 @@
+from conductor import (
+    _CONDUCTOR_ROUTER_VERSION,
+    _VALID_ENDPOINT_CHARS
+)
+from .caching import cache_config
+from .compression import compress_config
+from .coalescing import coalesce_config
+from .datasources import data_source_config, is_data_source
+from .dynamic import check_path_params, dynamic_paths, is_dynamic_path
+from .files import file_config
+from .limiting import limit_config
+from .layering import check_overrides, layer_route, router_root, split_defaults
+from .profiling import profile_config
+from .warmup import warmup_config
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Bumped whenever the layout of the compiled route table changes, so that
+# snapshots written by an older Conductor are treated as stale.
+_SNAPSHOT_FORMAT = 16
+_SNAPSHOT_DIRECTORY = '__conductor__'
+_ALLOWED_METHODS = ['GET', 'POST', 'PUT', 'DELETE']
+_ROUTE_TYPES = ['$file']
+
+
+# router_hash = content hash of a router file. Snapshots are keyed on it.
+def router_hash(content: bytes) -> str:
+    """
+    Computes the content hash of a router file's raw bytes.
+    """
+    return hashlib.sha256(content).hexdigest()
+
+
+# snapshot_path = default location of the compiled snapshot of a router file.
+# Like __pycache__, it is kept in a directory next to the router file.
+def snapshot_path(rtr_file: str) -> str:
+    """
+    Gets the default path of the compiled snapshot for a router file.
+    Usage:
+        snapshot_path('app/router.json')  # app/__conductor__/router.compiled
+    """
+    directory, name = os.path.split(os.path.abspath(rtr_file))
+    return os.path.join(
+        directory, _SNAPSHOT_DIRECTORY,
+        os.path.splitext(name)[0] + '.compiled'
+    )
+
+
+def compile_route(raw_route: str, route_data: Any) -> Dict[str, Any]:
+    """
+    Validates a single route definition and computes its route metadata, the
+    values that are made available through rmval<s>().
+    Raises:
+        ValueError: If the route definition is invalid.
+    """
+    if not isinstance(route_data, dict):
+        raise ValueError(
+            f"Invalid route data for {raw_route}. "
+            f"Expected a dictionary, got {type(route_data).__name__}."
+        )
+
+    route_cmeta = {
+        'raw_route': raw_route,
+        'route_data': route_data,
+        'route': raw_route,
+        'url_rule': None,
+        'error_code': None,
+        'methods': route_data.get('$methods', ['GET']),
+        'globals_list': route_data.get('$global', []),
+        'endpoint': None,
+        'template': route_data.get('template'),
+        'renderer': route_data.get('python-renderer'),
+        'cache': None,
+        'coalesce': None,
+        'limit': None,
+        'compress': None,
+        'profile': None,
+        # Sample args the route is warmed with on start, None for the default
+        'warmup': None,
+        'stream': route_data.get('$stream', False),
+        'static': route_data.get('$static', False),
+        'file': None,
+        # Renderer and template paths holding URL parameters, by key
+        'dynamic': {},
+        # The data sources of the route by name, read with rdata()
+        'data_sources': {
+            name: data_source_config(raw_route, name, value)
+            for name, value in route_data.items() if is_data_source(value)
+        }
+    }
+
+    if raw_route.startswith('@error'):
+        # Error routes are registered as error handlers, not URL rules
+        route_kind = 'error route'
+        route_cmeta['error_code'] = int(raw_route.split('/')[1])
+        route_cmeta['endpoint'] = route_data.get('$endpointurl', None)
+    else:
+        route_kind = 'route'
+        route_cmeta['url_rule'] = '/' + '/'.join(raw_route.split('/')[1:])
+        route_cmeta['error_code'] = 200
+        route_cmeta['endpoint'] = route_data.get(
+            '$endpointurl',
+            ''.join(
+                c if c in _VALID_ENDPOINT_CHARS else '_' for c in raw_route
+            )
+        )
+
+    route_type = route_data.get('$type')
+    if route_type is not None:
+        if route_type not in _ROUTE_TYPES:
+            raise ValueError(
+                f"Invalid $type for {route_kind} {raw_route}. "
+                f"Allowed types are {', '.join(_ROUTE_TYPES)}."
+            )
+        if route_kind != 'route' or route_cmeta['methods'] != ['GET']:
+            raise ValueError(
+                f"File route {raw_route} must be a GET route, not an error "
+                f"route or a route with other $methods."
+            )
+        # File routes are served without a template or renderer
+        route_cmeta['file'] = file_config(
+            raw_route, route_data, route_cmeta['url_rule']
+        )
+        route_cmeta['template'] = None
+        route_cmeta['renderer'] = None
+    elif not route_cmeta['template'] and not route_cmeta['renderer']:
+        raise ValueError(
+            f"{route_kind.capitalize()} {raw_route} must have either a "
+            f"template or a python-renderer defined."
+        )
+
+    # Validate methods
+    methods = route_cmeta['methods']
+    if not isinstance(methods, list):
+        raise ValueError(
+            f"Invalid methods for {route_kind} {raw_route}. "
+            f"Expected a list, got {type(methods).__name__}."
+        )
+    for method in methods:
+        if method not in _ALLOWED_METHODS:
+            raise ValueError(
+                f"Invalid method for {route_kind} {raw_route}. "
+                f"Allowed methods are GET, POST, PUT, DELETE."
+            )
+
+    # Paths with URL parameters, resolved per request
+    route_cmeta['dynamic'] = dynamic_paths(
+        raw_route, route_cmeta['url_rule'], route_data
+    )
+    for name, source in route_cmeta['data_sources'].items():
+        if is_dynamic_path(source['path']):
+            check_path_params(
+                raw_route, route_cmeta['url_rule'], name, source['path']
+            )
+
+    # Route options
+    if not isinstance(route_cmeta['stream'], bool):
+        raise ValueError(
+            f"Invalid $stream for {route_kind} {raw_route}. "
+            f"Expected true or false, got {route_cmeta['stream']}."
+        )
+    if not isinstance(route_cmeta['static'], bool):
+        raise ValueError(
+            f"Invalid $static for {route_kind} {raw_route}. "
+            f"Expected true or false, got {route_cmeta['static']}."
+        )
+    if route_cmeta['static'] and route_kind != 'error route':
+        raise ValueError(
+            f"Route {raw_route} cannot be $static, only error routes can. "
+            f"Prebuild URL routes with `python -m conductor build` instead."
+        )
+    if '$cache' in route_data and route_kind == 'route':
+        route_cmeta['cache'] = cache_config(raw_route, route_data['$cache'])
+    if '$coalesce' in route_data and route_kind == 'route':
+        route_cmeta['coalesce'] = coalesce_config(
+            raw_route, route_data['$coalesce']
+        )
+    if route_kind == 'route':
+        route_cmeta['limit'] = limit_config(raw_route, route_data)
+    if '$compress' in route_data and route_kind == 'route':
+        route_cmeta['compress'] = compress_config(
+            raw_route, route_data['$compress']
+        )
+    if '$warmup' in route_data and route_kind == 'route':
+        route_cmeta['warmup'] = warmup_config(
+            raw_route, route_data['$warmup']
+        )
+    if '$profile' in route_data:
+        route_cmeta['profile'] = profile_config(
+            raw_route, route_data['$profile']
+        )
+
+    return route_cmeta
+
+
+def compile_routes(
+        routercontent: Dict[str, Any], rtr_file: str
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Validates and normalizes all routes of a parsed router file into a route
+    table, a list of route metadata dictionaries in router file order.
+    Metadata keys (starting with $ or #) are skipped. The $defaults and
+    $overrides of the router file are applied to every route here, and the
+    paths they describe are resolved against the router file's directory, so
+    the route table holds the final route data.
+    Also returns the template directory that template names were resolved
+    against, or None if none were.
+    Raises:
+        ValueError: If a route definition, $defaults or $overrides is invalid.
+    """
+    values, specs = split_defaults(routercontent.get('$defaults', {}))
+    overrides = check_overrides(
+        routercontent.get('$overrides', {}), rtr_file
+    )
+    root = router_root(rtr_file)
+
+    routes, template_root = [], None
+    for raw_route, route_data in routercontent.items():
+        if raw_route.startswith('$') or raw_route.startswith('#'):
+            continue
+        if isinstance(route_data, dict):
+            route_data, resolved = layer_route(
+                route_data, values, specs, overrides, root
+            )
+            template_root = template_root or resolved
+        routes.append(compile_route(raw_route, route_data))
+    return routes, template_root
+
+
+def parse_router(content: bytes, rtr_file: str) -> Dict[str, Any]:
+    """
+    Parses the raw bytes of a router file and checks its version. Returns the
+    snapshot dictionary holding the compiled route table.
+    Raises:
+        ValueError: If the router file version does not match the current
+        Conductor Router version, or if a route definition is invalid.
+    """
+    routercontent = json.loads(content)
+    version = routercontent.get('$version', "unset")
+
+    # Versioning checks
+    if version != _CONDUCTOR_ROUTER_VERSION:
+        raise ValueError(
+            f"Router file version {version} does not match current"
+            f" Conductor Router version {_CONDUCTOR_ROUTER_VERSION}. "
+            "Please update the router file or the Conductor framework."
+        )
+
+    routes, template_root = compile_routes(routercontent, rtr_file)
+    return {
+        'format': _SNAPSHOT_FORMAT,
+        'router_version': _CONDUCTOR_ROUTER_VERSION,
+        'hash': router_hash(content),
+        'source': os.path.abspath(rtr_file),
+        'version': version,
+        'defaults': routercontent.get('$defaults', {}),
+        'overrides': routercontent.get('$overrides', {}),
+        # The directory resolved template names are relative to, if any
+        'template_root': template_root,
+        'routes': routes
+    }
+
+
+def load_snapshot(
+    path: str, content_hash: str, source: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Loads a compiled snapshot if it exists and is fresh, meaning it was
+    compiled from a router file with the same content hash by a Conductor
+    with the same router version and snapshot format. If source is given, the
+    snapshot must also be compiled from the router file at that path, since
+    it holds paths resolved against the router file's directory.
+    Returns None otherwise.
+    Snapshots are plain JSON, so loading one never runs any code.
+    """
+    try:
+        with open(path, encoding='utf-8') as snapshot_file:
+            snapshot = json.load(snapshot_file)
+    except Exception:
+        # Missing, unreadable or corrupt snapshots are simply ignored
+        return None
+
+    if (
+        not isinstance(snapshot, dict)
+        or snapshot.get('format') != _SNAPSHOT_FORMAT
+        or snapshot.get('router_version') != _CONDUCTOR_ROUTER_VERSION
+        or snapshot.get('hash') != content_hash
+        or (source and snapshot.get('source') != os.path.abspath(source))
+    ):
+        return None
+    return snapshot
+
+
+def compile_router(rtr_file: str, out_file: Optional[str] = None) -> str:
+    """
+    Compiles a router file into a validated, normalized route table snapshot
+    that Router loads directly while the router file is unchanged.
+    Returns the path of the written snapshot.
+    Usage:
+        compile_router('router.json')
+        # or from the command line
+        python -m conductor compile router.json
+    """
+    with open(rtr_file, 'rb') as router_file:
+        content = router_file.read()
+    snapshot = parse_router(content, rtr_file)
+
+    out_file = out_file if out_file else snapshot_path(rtr_file)
+    os.makedirs(os.path.dirname(os.path.abspath(out_file)), exist_ok=True)
+    # Write to a temporary file first so readers never see a partial snapshot
+    tmp_file = f"{out_file}.{os.getpid()}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as snapshot_file:
+        json.dump(snapshot, snapshot_file)
+    os.replace(tmp_file, out_file)
+    return out_file
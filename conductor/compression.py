@@ -0,0 +1,176 @@
+import gzip
+import hashlib
+import zlib
+from typing import Any, Dict, List, Optional
+
+from flask import Response, request
+from werkzeug.http import parse_accept_header
+
+from .caching import LRUCache
+
+
+_COMPRESS_KEYS = ('level', 'min_size', 'mimetypes')
+_ENCODINGS = ['gzip', 'deflate']
+_DEFAULT_MIMETYPES = [
+    'text/html', 'text/css', 'text/plain', 'text/xml', 'text/javascript',
+    'application/javascript', 'application/json', 'application/xml',
+    'image/svg+xml'
+]
+
+
+def compress_config(raw_route: str, config: Any) -> Dict[str, Any]:
+    """
+    Validates the $compress option of a route. `"$compress": true` compresses
+    the route with the Conductor's settings, `false` never compresses it, and
+    a dictionary overrides the level, min_size or mimetypes settings.
+    Returns the overrides, with an `enabled` flag.
+    Raises:
+        ValueError: If the $compress option is invalid.
+    """
+    if isinstance(config, bool):
+        return {'enabled': config}
+    if not isinstance(config, dict):
+        raise ValueError(
+            f"Invalid $compress for route {raw_route}. "
+            f"Expected true, false or a dictionary, got "
+            f"{type(config).__name__}."
+        )
+    for key in config:
+        if key not in _COMPRESS_KEYS:
+            raise ValueError(
+                f"Invalid $compress key {key} for route {raw_route}. "
+                f"Allowed keys are {', '.join(_COMPRESS_KEYS)}."
+            )
+    level = config.get('level', 6)
+    if not isinstance(level, int) or not 1 <= level <= 9:
+        raise ValueError(
+            f"Invalid $compress level for route {raw_route}. "
+            f"Expected an integer between 1 and 9, got {level}."
+        )
+    min_size = config.get('min_size', 0)
+    if not isinstance(min_size, int) or min_size < 0:
+        raise ValueError(
+            f"Invalid $compress min_size for route {raw_route}. "
+            f"Expected a positive integer, got {min_size}."
+        )
+    if not isinstance(config.get('mimetypes', []), list):
+        raise ValueError(
+            f"Invalid $compress mimetypes for route {raw_route}. "
+            f"Expected a list of mimetypes."
+        )
+    return {'enabled': True, **config}
+
+
+# Used to compress a body. gzip output does not carry a timestamp, so equal
+# bodies always compress to equal bytes.
+def compress_body(body: bytes, encoding: str, level: int) -> bytes:
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=level, mtime=0)
+    return zlib.compress(body, level)
+
+
+class Compressor:
+    """
+    Compresses responses with gzip or deflate, whichever the client prefers
+    in its Accept-Encoding. Only 200 responses with a compressible mimetype
+    and at least min_size bytes are compressed; streamed responses, files
+    sent with direct passthrough and responses that are already encoded or
+    marked no-transform are sent as they are.
+    Responses with an ETag, such as those of $cache routes, have their
+    compressed variants kept in an LRU cache keyed by a digest of the body
+    and the encoding, so the same bytes are only compressed once. ETags are
+    only unique per resource, so they are not part of the key. The ETag of a
+    compressed response is made weak, so conditional requests still match it.
+    Routes opt in or out with their $compress option, other responses follow
+    the enabled setting.
+    Args:
+        router (Router): The router whose routes' $compress options apply.
+        enabled (bool, optional): Whether responses are compressed by
+        default. Default False, meaning only routes with $compress.
+        level (int, optional): The compression level, 1 to 9. Default 6.
+        min_size (int, optional): The minimum body size in bytes. Default 500.
+        mimetypes (list, optional): The mimetypes that are compressed.
+        Default is text, JSON, JavaScript, XML and SVG.
+        cache_entries (int, optional): The maximum number of cached variants.
+        Default 256.
+        cache_size (int, optional): The maximum total size in bytes of the
+        cached variants. Default 32 MiB.
+    Usage:
+        compressor = Compressor(router, enabled=True)
+        app.after_request(compressor.after_request)
+    """
+    def __init__(
+        self, router: Any, enabled: bool = False, level: int = 6,
+        min_size: int = 500, mimetypes: Optional[List[str]] = None,
+        cache_entries: int = 256, cache_size: int = 32 * 1024 * 1024
+    ) -> None:
+        self.router = router
+        self.settings = compress_config('Conductor', {
+            'level': level,
+            'min_size': min_size,
+            'mimetypes': mimetypes if mimetypes else _DEFAULT_MIMETYPES
+        })
+        self.settings['enabled'] = enabled
+        self.variants = LRUCache(
+            max_entries=cache_entries, max_size=cache_size
+        )
+        # Effective settings by endpoint, rebuilt when the route table changes
+        self._routes = None
+        self._by_endpoint: Dict[str, Dict[str, Any]] = {}
+
+    def _route_settings(self, endpoint: Optional[str]) -> Dict[str, Any]:
+        routes = self.router.routes
+        if routes is not self._routes:
+            self._by_endpoint = {
+                route_cmeta['endpoint']: {
+                    **self.settings, **route_cmeta['compress']
+                }
+                for route_cmeta in routes
+                if route_cmeta['compress'] is not None
+                and route_cmeta['url_rule'] is not None
+            }
+            self._routes = routes
+        return self._by_endpoint.get(endpoint, self.settings)
+
+    def after_request(self, response: Response) -> Response:
+        """
+        Compresses a response if the route, the response and the client
+        allow it. Registered as an after_request function by Conductor.
+        """
+        settings = self._route_settings(request.endpoint)
+        if (
+            not settings['enabled']
+            or response.status_code != 200
+            or response.direct_passthrough
+            or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in settings['mimetypes']
+            or response.cache_control.no_transform
+        ):
+            return response
+        body = response.get_data()
+        if len(body) < settings['min_size']:
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = parse_accept_header(
+            request.headers.get('Accept-Encoding')
+        ).best_match(_ENCODINGS)
+        if encoding is None:
+            return response
+
+        level = settings['level']
+        etag, _ = response.get_etag()
+        if etag:
+            key = (hashlib.sha1(body).digest(), encoding, level)
+            compressed = self.variants.get(key)
+            if compressed is None:
+                compressed = compress_body(body, encoding, level)
+                self.variants.set(key, compressed, size=len(compressed))
+            response.set_etag(etag, weak=True)
+        else:
+            compressed = compress_body(body, encoding, level)
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -1,11 +1,14 @@
 from .routing import Router
 from .configuration import Config
+from .background import BackgroundExecutor
+from .compression import Compressor
+from .warmup import warm_routes
 from conductor import _default_app_starter
 
 import functools
-from typing import Dict, Optional
+from typing import Any, Dict, List, Optional
 
-from flask import Flask
+from flask import Flask, after_this_request, has_request_context
 
 
 class Conductor:
@@ -21,7 +24,21 @@ class Conductor:
         host (str, optional): The host to run the application on. Default None.
         port (int, optional): The port to run the application on. Default None.
         **kwargs: Additional keyword arguments, such as config for configuring
-        the flask app
+        the flask app, starter for the function that serves the app, and the
+        background executor settings: background_workers (default 4),
+        background_queue_size (default 1024), background_policy ('block',
+        'drop' or 'caller_runs', default 'block'),
+        background_block_timeout, the seconds the 'block' policy waits for a
+        free slot before dropping the call (default 1, None waits forever),
+        and background_timeout, the seconds shutdown waits for queued work
+        (default 30). Responses
+        are compressed with compress=True, or for routes with $compress; the
+        compress_level (default 6), compress_min_size (default 500 bytes),
+        compress_mimetypes, compress_cache_entries (default 256) and
+        compress_cache_size (default 32 MiB) settings are passed on to
+        compression.Compressor. Routes are warmed up before the starter
+        binds the socket unless warmup=False; warmup may also be a list of
+        raw routes to warm, see warmup.warm_routes.
     """
     def __init__(
         self, app: Flask,   router: Router, config: Optional[Config],
@@ -41,73 +58,231 @@ class Conductor:
 
         self.starter: callable = kwargs.get('starter', _default_app_starter)
 
+        # Functions registered with before_start, run first by start()
+        self._before_start_funcs: List[callable] = []
+        # Routes to warm up on start, True for the default set
+        self.warmup: Any = kwargs.get('warmup', True)
+        # Seconds each URL took to warm up, by URL
+        self.warmup_times: Dict[str, float] = {}
+
+        # Functions registered with on_shutdown, run once per process
+        self._shutdown_funcs: List[callable] = []
+        self._shut_down = False
+        # Lets starters and extensions find the Conductor of an app
+        self.app.extensions['conductor'] = self
+
+        # Runs deferred work off the request thread, see defer()
+        self.executor = BackgroundExecutor(
+            workers=kwargs.get('background_workers', 4),
+            queue_size=kwargs.get('background_queue_size', 1024),
+            policy=kwargs.get('background_policy', 'block'),
+            block_timeout=kwargs.get('background_block_timeout', 1.0),
+            logger=self.app.logger
+        )
+        self.background_timeout: float = kwargs.get('background_timeout', 30.0)
+
+        # Compresses responses, see compression.Compressor
+        self.compressor = Compressor(
+            router,
+            enabled=kwargs.get('compress', False),
+            level=kwargs.get('compress_level', 6),
+            min_size=kwargs.get('compress_min_size', 500),
+            mimetypes=kwargs.get('compress_mimetypes'),
+            cache_entries=kwargs.get('compress_cache_entries', 256),
+            cache_size=kwargs.get('compress_cache_size', 32 * 1024 * 1024)
+        )
+        self.app.after_request(self.compressor.after_request)
+
     def start(self) -> None:
         """
         Starts the Conductor application.
-        First, it activates the router, then it starts the Flask app using the
-        user specified starter function or the default starter if none is set.
-        Throws an error when the host or port is not set. Otherwise, it starts.
+        First, it runs the before_start functions and activates the router,
+        then it warms up the routes, and then it starts the Flask app using
+        the user specified starter function or the default starter if none is
+        set.
+        Throws an error when the host or port is not set, and a RuntimeError
+        when a route fails to warm up, before any socket is bound. Otherwise,
+        it starts.
+        Starters with a true `forks_workers` attribute, like PreforkStarter,
+        get a process without the background threads and the router watcher,
+        which do not survive a fork. Every worker starts its own in
+        _worker_started.
         """
         if self.host and self.port:
+            for func in self._before_start_funcs:
+                func()
             self.router.activate_router(self.app)
-            self.starter(self.app, host=self.host, port=self.port)
+            forks = getattr(self.starter, 'forks_workers', False)
+            if not forks:
+                self.executor.start()
+            try:
+                if self.warmup:
+                    self.warmup_times = warm_routes(
+                        self.app, self.router,
+                        None if self.warmup is True else self.warmup
+                    )
+                if forks:
+                    # Runs the work deferred during the warmup
+                    self.router.stop_watching()
+                    self.executor.shutdown(self.background_timeout)
+                self.starter(self.app, host=self.host, port=self.port)
+            finally:
+                self.shutdown()
         else:
             raise ValueError("Host and port must be set to start application.")
 
+    def shutdown(self) -> None:
+        """
+        Runs the queued background work, then the functions registered with
+        on_shutdown. Called when the starter returns, and by multi-process
+        starters in every worker before it exits. Only the first call in a
+        process has an effect.
+        """
+        if self._shut_down:
+            return
+        self._shut_down = True
+        self.router.stop_watching()
+        self.router.flush_profiles()
+        self.executor.shutdown(self.background_timeout)
+        for func in self._shutdown_funcs:
+            try:
+                func()
+            except Exception:
+                self.app.logger.exception(
+                    "Shutdown function %s failed.", func.__name__
+                )
+
+    def _worker_started(self) -> None:
+        """
+        Called by multi-process starters in every worker process right after
+        it was forked, to restart the per-process services that do not
+        survive a fork.
+        """
+        if self.router.watch:
+            self.router.start_watching()
+        self.executor.start()
+
+    def defer(self, func: callable, *args: Any, **kwargs: Any) -> bool:
+        """
+        Runs func(*args, **kwargs) on the background executor. The call runs
+        outside of the request, so pass it the request values it needs.
+        Returns False if the queue was full and the call was dropped.
+        Usage:
+            conductor.defer(audit_log, user_id, 'login')
+        """
+        return self.executor.submit(func, *args, **kwargs)
+
+    def after_response(
+        self, func: callable, *args: Any, **kwargs: Any
+    ) -> None:
+        """
+        Like defer(), but during a request the call is only queued once the
+        response has been sent, so it never competes with sending it.
+        Outside of a request the call is queued right away.
+        Usage:
+            conductor.after_response(warm_cache, '/reports')
+        """
+        if not has_request_context():
+            self.defer(func, *args, **kwargs)
+            return
+
+        @after_this_request
+        def queue_on_close(response):
+            response.call_on_close(
+                lambda: self.defer(func, *args, **kwargs)
+            )
+            return response
+
     def before_start(self, func: callable) -> callable:
         """
         Decorator to register a function to be called before the app starts.
+        The functions are called by start() in the order they were registered,
+        before the router is activated and the routes are warmed up.
         Usage:
             @conductor.before_start
             def my_func():
                 # Code to run before the app starts
                 pass
         """
-        self.app.before_first_request(func)
+        self._before_start_funcs.append(func)
         return func
 
-    def after_start(self, func: callable) -> callable:
+    def after_start(
+        self, func: Optional[callable] = None, background: bool = False
+    ) -> callable:
         """
         Decorator to register a function to be called after the app starts.
+        With background=True the function is called with the response on the
+        background executor once the response has been sent, instead of on
+        the request thread; its return value is ignored.
         Usage:
             @conductor.after_start
-            def my_func():
+            def my_func(response):
                 # Code to run after the app starts
-                pass
+                return response
+
+            @conductor.after_start(background=True)
+            def log_response(response):
+                ...
         """
-        self.app.after_request(func)
+        if func is None:
+            return functools.partial(self.after_start, background=background)
+        if not background:
+            self.app.after_request(func)
+            return func
+
+        def queue_on_close(response):
+            response.call_on_close(lambda: self.defer(func, response))
+            return response
+        self.app.after_request(queue_on_close)
         return func
 
     def on_shutdown(self, func: callable) -> callable:
         """
         Decorator to register a function to be called when app is stopping.
+        The function is called once per process, after the server stopped
+        accepting requests and finished the ones in flight.
         Usage:
             @conductor.on_shutdown
             def my_func():
                 # Code to run when the app is stopping
                 pass
         """
-        self.app.teardown_appcontext(func)
+        self._shutdown_funcs.append(func)
         return func
 
-    def register_hook(hook_func, when='before'):
+    def register_hook(
+        self, hook_func: callable, when: str = 'before',
+        background: bool = False
+    ) -> callable:
         """
         Decorator factory to add hook_func before or after the decorated func.
+        With background=True the hook is queued on the background executor
+        instead of being called, so it does not add to the caller's latency.
         Usage:
             @conductor.register_hook(my_hook, when='before')
             def my_func(...): ...
+
+            @conductor.register_hook(audit_hook, when='after', background=True)
+            def my_func(...): ...
         """
+        if when not in ('before', 'after'):
+            raise ValueError("when must be 'before' or 'after'")
+
+        def call_hook(*args, **kwargs):
+            if background:
+                self.defer(hook_func, *args, **kwargs)
+            else:
+                hook_func(*args, **kwargs)
+
         def decorator(target_func):
             @functools.wraps(target_func)
             def wrapper(*args, **kwargs):
                 if when == 'before':
-                    hook_func(*args, **kwargs)
+                    call_hook(*args, **kwargs)
                     return target_func(*args, **kwargs)
-                elif when == 'after':
-                    result = target_func(*args, **kwargs)
-                    hook_func(*args, **kwargs)
-                    return result
-                else:
-                    raise ValueError("when must be 'before' or 'after'")
+                result = target_func(*args, **kwargs)
+                call_hook(*args, **kwargs)
+                return result
             return wrapper
         return decorator
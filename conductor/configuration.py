@@ -6,8 +6,9 @@ import json
 class Config:
     """
     The configuration class for the Conductor framework. Configurations are
-    loaded from a JSON string and parsed into attributes. It also contains
-    overrides and defaults.
+    loaded from a JSON string and parsed into attributes. Values in $defaults
+    are used for keys the config does not set, values in $overrides replace
+    the config's own.
     Args:
         config (str): A string containing the path for the JSON config file.
     Usage:
@@ -31,8 +32,18 @@ class Config:
 
         self.defaults = self._config_parsed.get('$defaults', {})
         self.overrides = self._config_parsed.get('$overrides', {})
+        for name in ('defaults', 'overrides'):
+            if not isinstance(getattr(self, name), dict):
+                raise ValueError(
+                    f"Configuration ${name} must be a dictionary, got "
+                    f"{type(getattr(self, name)).__name__}."
+                )
 
-        for key, value in self._config_parsed.items():
+        # Layered once here: defaults, then the config file, then overrides
+        settings = {**self.defaults}
+        settings.update(self._config_parsed)
+        settings.update(self.overrides)
+        for key, value in settings.items():
             if key.startswith('$') or key.startswith('#'):
                 continue
             setattr(self, key, value)
@@ -0,0 +1,142 @@
+import json
+import os
+import runpy
+import threading
+import time
+from typing import Any, Dict, Tuple
+
+from .mapdb import MapDB
+
+
+# The variants a data source can have, and the one its `use` key selects
+_DATA_VARIANTS = ('pythonic', 'jsonic', 'mapdb')
+
+
+# Used to tell data sources apart from other dictionaries in the route data.
+def is_data_source(value: Any) -> bool:
+    return (
+        isinstance(value, dict) and 'use' in value
+        and any(variant in value for variant in _DATA_VARIANTS)
+    )
+
+
+def data_source_config(
+        raw_route: str, name: str, source: Dict[str, Any]
+) -> Dict[str, str]:
+    """
+    Validates a data source of a route and selects the variant named by its
+    `use` key. Returns the variant and the path of its file.
+    Usage:
+        "contact-list": {
+            "jsonic": "contact-list.json",
+            "mapdb": "contact-list.map",
+            "use": "mapdb"
+        }
+    Raises:
+        ValueError: If the data source is invalid.
+    """
+    variant = source['use']
+    if variant not in _DATA_VARIANTS:
+        raise ValueError(
+            f"Invalid use {variant} for data source {name} of route "
+            f"{raw_route}. Allowed variants are {', '.join(_DATA_VARIANTS)}."
+        )
+    path = source.get(variant)
+    if not isinstance(path, str) or not path:
+        raise ValueError(
+            f"Data source {name} of route {raw_route} uses {variant}, but "
+            f"has no {variant} file."
+        )
+    return {'variant': variant, 'path': path}
+
+
+def _load_pythonic(path: str) -> Any:
+    namespace = runpy.run_path(path)
+    if 'data' not in namespace:
+        raise ValueError(
+            f"Pythonic data source {path} must define a `data` variable."
+        )
+    return namespace['data']
+
+
+def _load_jsonic(path: str) -> Any:
+    with open(path, 'rb') as file:
+        return json.load(file)
+
+
+_LOADERS = {
+    'pythonic': _load_pythonic,
+    'jsonic': _load_jsonic,
+    'mapdb': MapDB
+}
+
+
+class DataSourceLoader:
+    """
+    Loads the files of data sources and memoizes them by path, so every file
+    is loaded once per process no matter how many routes use it. A file is
+    loaded again once its modification time or size changed, which is checked
+    at most every check_interval seconds.
+    Pythonic sources are Python files defining a `data` variable, jsonic
+    sources JSON files, and mapdb sources are memory-mapped, see mapdb.MapDB.
+    The loaded data is shared, so it must not be modified.
+    Args:
+        check_interval (float, optional): Seconds between the modification
+        checks of a file. Default 1.0.
+    Usage:
+        loader = DataSourceLoader()
+        contacts = loader.load({'variant': 'jsonic', 'path': 'contacts.json'})
+    """
+    def __init__(self, check_interval: float = 1.0) -> None:
+        self.check_interval = check_interval
+        # (variant, absolute path) -> (data, (mtime, size), last check)
+        self._data: Dict[Tuple[str, str], Tuple[Any, Any, float]] = {}
+        self._lock = threading.RLock()
+
+    def load(self, source: Dict[str, str]) -> Any:
+        """
+        Gets the data of a data source, loading its file if it was not loaded
+        yet or changed since.
+        Raises:
+            FileNotFoundError: If the file of the data source does not exist.
+        """
+        key = (source['variant'], os.path.abspath(source['path']))
+        entry = self._data.get(key)
+        now = time.monotonic()
+        if entry is not None and now - entry[2] < self.check_interval:
+            return entry[0]
+
+        signature = self._signature(key[1])
+        if entry is not None and entry[1] == signature:
+            self._data[key] = (entry[0], signature, now)
+            return entry[0]
+        with self._lock:
+            # Another thread may have loaded the new file while we waited
+            entry = self._data.get(key)
+            if entry is not None and entry[1] == signature:
+                return entry[0]
+            data = _LOADERS[key[0]](key[1])
+            self._data[key] = (data, signature, now)
+            return data
+
+    @staticmethod
+    def _signature(path: str) -> Tuple[int, int]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            raise FileNotFoundError(
+                f"Data source file {path} not found. "
+                f"Ensure the path is correct."
+            ) from None
+        return st.st_mtime_ns, st.st_size
+
+    def clear(self) -> None:
+        """
+        Drops all loaded data, so every source is loaded again when used.
+        """
+        with self._lock:
+            self._data.clear()
+
+
+# The loader shared by all routes, used by rdata()
+data_loader = DataSourceLoader()
@@ -0,0 +1,235 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import Flask
+from werkzeug.routing import Map, MapAdapter, Rule, UnicodeConverter
+
+from .reloading import copy_url_map
+
+
+# A whole path segment that is a parameter with the default converter, like
+# <name> or <string:name>. Converters with arguments are left to werkzeug.
+_PARAM_SEGMENT = re.compile(r'^<(?:(?:default|string):)?(\w+)>$')
+
+# Returned when the fast path found something it cannot decide on its own,
+# such as a rule that does not allow the method, and werkzeug must match.
+_FALLBACK = object()
+
+
+class _Node:
+    """
+    A node of a segment trie. `rules` holds (rule, parameter names) pairs of
+    the rules ending at this node.
+    """
+    __slots__ = ('static', 'dynamic', 'rules')
+
+    def __init__(self) -> None:
+        self.static: Dict[str, _Node] = {}
+        self.dynamic: Optional[_Node] = None
+        self.rules: List[Tuple[Rule, Tuple[str, ...]]] = []
+
+
+class FastMap(Map):
+    """
+    A werkzeug URL map that matches most rules without werkzeug's matcher.
+    Literal rules are found with one dictionary lookup, rules whose parameters
+    are whole segments with the default converter are found by walking a
+    segment trie. Everything else, and every request the fast path cannot
+    decide on with certainty (redirects, 405s, rules with defaults, custom
+    converters, host or subdomain matching), is matched by werkzeug, so
+    matching gives the same results as a plain Map.
+    Router installs it as the app's URL map when fast_dispatch is True. It
+    keeps werkzeug's matcher next to its own tables, so it trades some memory
+    for speed.
+    """
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        # Map.__init__ adds the rules it is given, so the tables come first
+        self._static: Dict[str, List[Rule]] = {}
+        self._trie = _Node()
+        # Literal prefixes of the rules the fast path cannot match. Paths
+        # below one of them always go to werkzeug.
+        self._slow = _Node()
+        super().__init__(*args, **kwargs)
+
+    def add(self, rulefactory: Any) -> None:
+        for rule in rulefactory.get_rules(self):
+            super().add(rule)
+            self._index(rule)
+
+    def bind(self, *args: Any, **kwargs: Any) -> MapAdapter:
+        adapter = super().bind(*args, **kwargs)
+        # Map.bind always creates a MapAdapter. FastMapAdapter adds no state,
+        # so the adapter is converted in place rather than built twice.
+        adapter.__class__ = FastMapAdapter
+        return adapter
+
+    def _eligible(self, rule: Rule) -> bool:
+        return (
+            rule.redirect_to is None
+            and not rule.defaults
+            and not rule.host
+            and not rule.websocket
+            and not rule.alias
+            and rule.subdomain == self.default_subdomain
+        )
+
+    def _index(self, rule: Rule) -> None:
+        if rule.build_only:
+            return
+        segments = rule.rule.split('/')[1:]
+        names = []
+        fast = self._eligible(rule)
+        for segment in segments:
+            if '<' not in segment:
+                continue
+            match = _PARAM_SEGMENT.match(segment)
+            if (
+                match is None
+                or type(rule._converters.get(match.group(1)))
+                is not UnicodeConverter
+            ):
+                fast = False
+                break
+            names.append(match.group(1))
+
+        if fast and not names:
+            self._static.setdefault(rule.rule, []).append(rule)
+            return
+        if fast:
+            node = self._trie
+            for segment in segments:
+                if '<' in segment:
+                    if node.dynamic is None:
+                        node.dynamic = _Node()
+                    node = node.dynamic
+                else:
+                    node = node.static.setdefault(segment, _Node())
+            node.rules.append((rule, tuple(names)))
+            return
+
+        # Mark the literal prefix of the rule as slow
+        node = self._slow
+        for segment in segments:
+            if '<' in segment:
+                break
+            node = node.static.setdefault(segment, _Node())
+        node.rules.append((rule, ()))
+        if '<' not in rule.rule:
+            # A literal rule werkzeug must match shadows the fast one
+            self._static.setdefault(rule.rule, []).append(None)
+
+    def fast_match(
+            self, path_info: str, method: str
+    ) -> Any:
+        """
+        Matches a path with the fast path. Returns (rule, view args), or None
+        if werkzeug has to match the path.
+        """
+        if not path_info:
+            return None
+        path = '/' + path_info.lstrip('/')
+
+        rules = self._static.get(path)
+        if rules is not None:
+            rule = rules[0]
+            if (
+                len(rules) == 1
+                and rule is not None
+                and (rule.methods is None or method in rule.methods)
+                and self._single_rule(rule)
+            ):
+                return rule, {}
+            return None
+
+        if self._slow.rules or not (self._trie.static or self._trie.dynamic):
+            return None
+        parts = path[1:].split('/')
+        node = self._slow
+        for part in parts:
+            node = node.static.get(part)
+            if node is None:
+                break
+            if node.rules:
+                return None
+
+        result = _walk(self._trie, parts, 0, [], method)
+        if result is None or result is _FALLBACK:
+            return None
+        rule, names, values = result
+        # werkzeug redirects to the slash variant of a literal rule first
+        if path + '/' in self._static or not self._single_rule(rule):
+            return None
+        return rule, dict(zip(names, values))
+
+    def _single_rule(self, rule: Rule) -> bool:
+        # Other rules of the same endpoint may redirect to their defaults
+        return (
+            not self.redirect_defaults
+            or len(self._rules_by_endpoint[rule.endpoint]) == 1
+        )
+
+
+def _walk(
+        node: _Node, parts: List[str], index: int, values: List[str],
+        method: str
+) -> Any:
+    """
+    Finds the rule for parts below node, trying literal segments before
+    parameters like werkzeug does. Returns (rule, names, values), None if no
+    rule matches, or _FALLBACK if werkzeug has to decide.
+    """
+    if index == len(parts):
+        if not node.rules:
+            # werkzeug would redirect to the slash variant
+            return _FALLBACK if '' in node.static else None
+        if len(node.rules) > 1:
+            return _FALLBACK
+        rule, names = node.rules[0]
+        if rule.methods is not None and method not in rule.methods:
+            return _FALLBACK
+        return rule, names, values
+
+    part = parts[index]
+    child = node.static.get(part)
+    if child is not None:
+        result = _walk(child, parts, index + 1, values, method)
+        if result is not None:
+            return result
+    if node.dynamic is not None and part:
+        return _walk(node.dynamic, parts, index + 1, values + [part], method)
+    return None
+
+
+class FastMapAdapter(MapAdapter):
+    """
+    The URL adapter of a FastMap, trying the fast path before werkzeug.
+    """
+    def match(
+        self, path_info: Optional[str] = None, method: Optional[str] = None,
+        return_rule: bool = False, query_args: Any = None,
+        websocket: Optional[bool] = None
+    ) -> Tuple[Any, Dict[str, Any]]:
+        fast_map = self.map
+        if (
+            not fast_map.host_matching
+            and not (self.websocket if websocket is None else websocket)
+            and self.subdomain == fast_map.default_subdomain
+        ):
+            result = fast_map.fast_match(
+                self.path_info if path_info is None else path_info,
+                (method or self.default_method).upper()
+            )
+            if result is not None:
+                rule, view_args = result
+                return (rule if return_rule else rule.endpoint), view_args
+        return super().match(
+            path_info, method, return_rule, query_args, websocket
+        )
+
+
+# Used to replace the URL map of an app by a FastMap holding the same rules.
+def install_fast_map(app: Flask) -> None:
+    if isinstance(app.url_map, FastMap):
+        return
+    app.url_map_class = FastMap
+    app.url_map = copy_url_map(app)
@@ -0,0 +1,232 @@
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from flask import abort
+from jinja2 import TemplateNotFound
+
+from .registry import RendererRegistry
+
+
+# A URL parameter in a renderer, template or data source path, like <name>
+_PATH_PARAM = re.compile(r'<(\w+)>')
+# The route data keys whose paths may hold URL parameters
+_DYNAMIC_KEYS = ('python-renderer', 'template')
+# Characters a parameter value may not contain, so a value can only ever
+# replace a single path segment, or part of one
+_UNSAFE_CHARS = ('/', '\\', '\0')
+
+
+# Used to tell paths holding URL parameters apart from literal paths.
+def is_dynamic_path(path: Any) -> bool:
+    return isinstance(path, str) and _PATH_PARAM.search(path) is not None
+
+
+def dynamic_paths(
+        raw_route: str, url_rule: Optional[str], route_data: Dict[str, Any]
+) -> Dict[str, str]:
+    """
+    Finds the renderer and template paths of a route that hold URL
+    parameters, and checks that every parameter they use is one of the
+    route's URL parameters. Returns the paths by route data key.
+    Usage:
+        "@/software/<name>": {
+            "python-renderer": "/software/<name>/renderer.py",
+            "template": "/software/<name>/page.html"
+        }
+    Raises:
+        ValueError: If a path uses a parameter the route does not have.
+    """
+    paths = {
+        key: route_data[key] for key in _DYNAMIC_KEYS
+        if is_dynamic_path(route_data.get(key))
+    }
+    for key, path in paths.items():
+        check_path_params(raw_route, url_rule, key, path)
+    return paths
+
+
+def check_path_params(
+        raw_route: str, url_rule: Optional[str], key: str, path: str
+) -> None:
+    """
+    Checks that the URL parameters a path uses are parameters of its route.
+    Raises:
+        ValueError: If the path uses a parameter the route does not have.
+    """
+    rule_params = set(re.findall(r'<(?:[^<>:]+:)?([^<>:]+)>', url_rule or ''))
+    for param in _PATH_PARAM.findall(path):
+        if param not in rule_params:
+            raise ValueError(
+                f"The {key} path {path} of route {raw_route} uses the URL "
+                f"parameter {param}, which the route does not have."
+            )
+
+
+# substitute_path = fills the URL parameters of a path with the values of the
+# current request. Returns None if a value is not safe to put in a path.
+def substitute_path(path: str, values: Dict[str, Any]) -> Optional[str]:
+    """
+    Substitutes the <param> parts of a path with request values. Values of
+    converters like <int:id> or <uuid:id> are turned into strings first. A
+    value must then be a non-empty string without path separators or NUL
+    characters, and not '.' or '..', so it can never leave the directory the
+    path names.
+    Usage:
+        substitute_path('/software/<name>/page.html', {'name': 'conductor'})
+        # '/software/conductor/page.html'
+        substitute_path('/software/<name>/page.html', {'name': '..'})
+        # None
+    """
+    strings = {}
+    for param in _PATH_PARAM.findall(path):
+        if values.get(param) is None:
+            return None
+        value = str(values[param])
+        if (
+            value in ('', '.', '..')
+            or any(char in value for char in _UNSAFE_CHARS)
+        ):
+            return None
+        strings[param] = value
+    return _PATH_PARAM.sub(lambda match: strings[match.group(1)], path)
+
+
+class RendererCache:
+    """
+    A bounded LRU cache of the renderer modules of dynamic renderer paths, so
+    routes can have thousands of per-item renderers of which only the used
+    ones are imported. The least recently used module is dropped once there
+    are more than max_entries, and a module is imported again once its file
+    changed, which is checked at most every check_interval seconds.
+    Modules are imported by a registry of their own, so they are not part of
+    the router's hot reload.
+    Args:
+        max_entries (int, optional): The maximum number of imported modules.
+        Default 256.
+        check_interval (float, optional): Seconds between the modification
+        checks of a module's file. Default 1.0.
+    Usage:
+        renderers = RendererCache(max_entries=1024)
+        func = renderers.get('/abs/software/conductor/renderer.py')
+    """
+    def __init__(
+        self, max_entries: int = 256, check_interval: float = 1.0
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1.")
+        self.max_entries = max_entries
+        self.check_interval = check_interval
+        self.registry = RendererRegistry()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # absolute path -> (renderer, mtime, last check)
+        self._entries: "OrderedDict[str, Tuple[Callable, int, float]]"
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, path: str) -> Optional[Callable]:
+        """
+        Gets the @renderer of a renderer file, importing it if needed.
+        Returns None if the file does not exist.
+        Raises:
+            ValueError: If the renderer file has no @renderer.
+        """
+        abs_path = os.path.abspath(path)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(abs_path)
+            if entry is not None and now - entry[2] < self.check_interval:
+                self._entries.move_to_end(abs_path)
+                self.hits += 1
+                return entry[0]
+
+            try:
+                mtime = os.stat(abs_path).st_mtime_ns
+            except OSError:
+                if entry is not None:
+                    self._evict(abs_path)
+                return None
+            if entry is not None and entry[1] == mtime:
+                self._entries[abs_path] = (entry[0], mtime, now)
+                self._entries.move_to_end(abs_path)
+                self.hits += 1
+                return entry[0]
+
+            self.misses += 1
+            if entry is not None:
+                self._evict(abs_path)
+            func = self.registry.get_renderer(abs_path)
+            if func is None:
+                self._evict(abs_path)
+                raise ValueError(f"No @renderer found in renderer {path}.")
+            self._entries[abs_path] = (func, mtime, now)
+            while len(self._entries) > self.max_entries:
+                self._evict(next(iter(self._entries)))
+                self.evictions += 1
+            return func
+
+    def _evict(self, abs_path: str) -> None:
+        # The lock must be held by the caller
+        self._entries.pop(abs_path, None)
+        self.registry.forget(abs_path)
+        sys.modules.pop(RendererRegistry.module_name(abs_path), None)
+
+    def clear(self) -> None:
+        """
+        Drops all imported modules.
+        """
+        with self._lock:
+            for abs_path in list(self._entries):
+                self._evict(abs_path)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Gets the hit, miss and eviction counters and the number of modules.
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._entries)
+        }
+
+
+# Used to resolve the dynamic paths of a route for a request. Returns the view
+# function and the resolved paths, which replace the route data values for
+# the request. Requests whose values are unsafe, or whose renderer file does
+# not exist, get a 404.
+def _path_resolver(
+        paths: Dict[str, str], renderers: RendererCache,
+        view_func: Optional[Callable], render: Callable
+) -> Callable[[Dict[str, Any]], Tuple[Callable, Dict[str, str]]]:
+    renderer_path = paths.get('python-renderer')
+
+    def render_template_path(template: str) -> Callable:
+        def template_view(*args, **kwargs):
+            try:
+                return render(template)
+            except TemplateNotFound:
+                abort(404)
+        return template_view
+
+    def resolve(values: Dict[str, Any]) -> Tuple[Callable, Dict[str, str]]:
+        resolved = {}
+        for key, path in paths.items():
+            resolved[key] = substitute_path(path, values)
+            if resolved[key] is None:
+                abort(404)
+        func = view_func
+        if renderer_path:
+            func = renderers.get(resolved['python-renderer'])
+            if func is None:
+                abort(404)
+        elif func is None:
+            func = render_template_path(resolved['template'])
+        return func, resolved
+    return resolve
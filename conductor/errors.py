@@ -0,0 +1,168 @@
+import threading
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+from flask import Flask, Response, current_app, request
+from werkzeug.exceptions import NotFound, default_exceptions
+
+from .caching import LRUCache
+
+
+# Set in the WSGI environ of requests whose 404 came from URL matching
+_NEGATIVE_KEY = 'conductor.negative_lookup'
+# Set in the WSGI environ of requests answered by a static error route
+_STATIC_KEY = 'conductor.static_error'
+
+
+# Used to give the responses of error routes the status of their error.
+# Renderers and templates return a body, which Flask would send with a 200.
+def _error_view(view: Callable, error_code: int) -> Callable:
+    def error_view(*args, **kwargs):
+        rv = view(*args, **kwargs)
+        if isinstance(rv, (Response, tuple)):
+            return rv
+        return rv, error_code
+    return error_view
+
+
+# Used to serve an error route with `"$static": true` from bytes rendered
+# once, outside of any request, so a hit does not run the renderer or touch
+# `g`. The route is rendered on activation if render_now is True, otherwise
+# on its first hit.
+def _static_error_view(
+        app: Flask, view: Callable, error_code: int, render_now: bool
+) -> Callable:
+    lock = threading.Lock()
+    rendered: Optional[Tuple[bytes, int, List[Tuple[str, str]]]] = None
+
+    def render() -> Tuple[bytes, int, List[Tuple[str, str]]]:
+        nonlocal rendered
+        with lock:
+            if rendered is None:
+                with app.test_request_context():
+                    response = app.make_response(
+                        view(default_exceptions[error_code]())
+                    )
+                    if response.is_streamed:
+                        raise ValueError(
+                            f"Static error route @error/{error_code} must "
+                            f"not stream its response."
+                        )
+                    rendered = (
+                        response.get_data(), response.status_code,
+                        [
+                            (name, value)
+                            for name, value in response.headers.items()
+                            if name != 'Set-Cookie'
+                        ]
+                    )
+        return rendered
+
+    def static_error_view(error):
+        body, status, headers = rendered if rendered else render()
+        request.environ[_STATIC_KEY] = True
+        return Response(body, status=status, headers=headers)
+
+    if render_now:
+        render()
+    return static_error_view
+
+
+# Used to tell whether an app or one of the request's blueprints handles an
+# error, looked up in the public error_handler_spec in the order Flask uses:
+# by code, then by exception class, blueprints before the app.
+def _has_error_handler(
+        app: Flask, error: Exception, blueprints: Iterable[str]
+) -> bool:
+    code = getattr(error, 'code', None)
+    for handler_code in ((code, None) if code is not None else (None,)):
+        for name in (*blueprints, None):
+            handlers = app.error_handler_spec.get(name, {}).get(
+                handler_code, {}
+            )
+            if any(handlers.get(cls) for cls in type(error).__mro__):
+                return True
+    return False
+
+
+class NegativeLookupCache:
+    """
+    WSGI middleware that remembers the paths that matched no URL rule, and
+    answers repeated requests for them with the stored 404 response, without
+    entering Flask. Scanners requesting the same unknown paths over and over
+    then cost a dictionary lookup each. Only 404s raised by URL matching are
+    stored, never those of views, and never responses that set cookies.
+    The stored response is replayed to every client, so it is only stored if
+    it cannot depend on the request: when it comes from a `$static` error
+    route or from Flask's default handler. Replayed responses also skip the
+    app's before_request and after_request functions.
+    Entries expire after ttl seconds, and Router clears the cache whenever a
+    reload changes the URL rules.
+    Args:
+        app (Flask): The app to wrap. Its wsgi_app is replaced.
+        max_entries (int, optional): The maximum number of paths. Default
+        1024.
+        ttl (float, optional): Seconds a path is remembered. Default 60.
+    Usage:
+        negative_lookups = NegativeLookupCache(app)
+        negative_lookups.cache.stats()
+    """
+    def __init__(
+        self, app: Flask, max_entries: int = 1024, ttl: float = 60.0
+    ) -> None:
+        self.cache = LRUCache(max_entries=max_entries)
+        self.ttl = ttl
+        self.wsgi_app = app.wsgi_app
+        app.wsgi_app = self
+        app.after_request(self._mark)
+
+    def _mark(self, response: Response) -> Response:
+        error = request.routing_exception
+        if (
+            isinstance(error, NotFound)
+            and response.status_code == 404
+            and 'Set-Cookie' not in response.headers
+            and (
+                request.environ.get(_STATIC_KEY)
+                or not _has_error_handler(
+                    current_app, error, request.blueprints
+                )
+            )
+        ):
+            request.environ[_NEGATIVE_KEY] = True
+        return response
+
+    def __call__(
+        self, environ: dict, start_response: Callable
+    ) -> Iterable[bytes]:
+        key = (
+            environ.get('REQUEST_METHOD'), environ.get('HTTP_HOST'),
+            environ.get('SCRIPT_NAME', ''), environ.get('PATH_INFO', '')
+        )
+        cached = self.cache.get(key)
+        if cached is not None:
+            status, headers, body = cached
+            start_response(status, headers)
+            return [body]
+
+        captured: List[Any] = []
+
+        def capture_start_response(status, headers, exc_info=None):
+            captured[:] = [status, headers]
+            return start_response(status, headers, exc_info)
+
+        app_iter = self.wsgi_app(environ, capture_start_response)
+        if not environ.get(_NEGATIVE_KEY) or not captured:
+            return app_iter
+        try:
+            body = b''.join(app_iter)
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+        self.cache.set(key, (captured[0], captured[1], body), self.ttl)
+        return [body]
+
+    def clear(self) -> None:
+        """
+        Forgets all paths, so they are matched against the URL rules again.
+        """
+        self.cache.clear()
@@ -0,0 +1,146 @@
+import mimetypes
+import os
+import re
+import stat
+from typing import Any, Dict, Tuple
+
+from flask import Response, abort, request
+from werkzeug.security import safe_join
+from werkzeug.wsgi import wrap_file
+
+from .caching import LRUCache
+
+
+_PARAM_PATTERN = re.compile(r'<(?:[^<>:]+:)?([^<>:]+)>')
+
+# Marks paths that were looked up and do not exist, so repeated requests for
+# missing files are answered from the stat cache as well
+_MISSING = ()
+
+
+# Used to validate the options of a `"$type": "$file"` route.
+def file_config(
+        raw_route: str, route_data: Dict[str, Any], url_rule: str
+) -> Dict[str, Any]:
+    """
+    Validates a file route and fills in the defaults. A file route serves the
+    files below its $directory, the file path is taken from its single URL
+    parameter, usually a path converter.
+    Usage:
+        "@/images/<path:imagepath>": {
+            "$type": "$file",
+            "$directory": "static/images",
+            "$max_age": 3600
+        }
+    Raises:
+        ValueError: If the file route is invalid.
+    """
+    params = _PARAM_PATTERN.findall(url_rule)
+    if len(params) != 1:
+        raise ValueError(
+            f"File route {raw_route} must have exactly one URL parameter "
+            f"holding the file path, got {len(params)}."
+        )
+    directory = route_data.get('$directory')
+    if not isinstance(directory, str) or not directory:
+        raise ValueError(
+            f"File route {raw_route} must have a $directory to serve files "
+            f"from."
+        )
+    for key in ('$stat_ttl', '$stat_entries', '$max_age'):
+        value = route_data.get(key)
+        if value is not None and (
+            not isinstance(value, (int, float)) or value < 0
+        ):
+            raise ValueError(
+                f"Invalid {key} for file route {raw_route}. "
+                f"Expected a positive number, got {value}."
+            )
+    return {
+        'directory': directory,
+        'param': params[0],
+        'stat_ttl': route_data.get('$stat_ttl', 1.0),
+        'stat_entries': route_data.get('$stat_entries', 1024),
+        'max_age': route_data.get('$max_age')
+    }
+
+
+def _stat_file(root: str, subpath: str) -> Tuple[Any, ...]:
+    """
+    Resolves a requested path below root and stats it. Returns
+    (path, size, mtime, etag, mimetype, encoding), or _MISSING if the path is
+    not a regular file inside root.
+    """
+    path = safe_join(root, subpath)
+    if path is None:
+        return _MISSING
+    # safe_join rejects '..' segments, symlinks may still point outside root
+    path = os.path.realpath(path)
+    if not path.startswith(root.rstrip(os.sep) + os.sep):
+        return _MISSING
+    try:
+        st = os.stat(path)
+    except OSError:
+        return _MISSING
+    if not stat.S_ISREG(st.st_mode):
+        return _MISSING
+    mimetype, encoding = mimetypes.guess_type(path)
+    etag = f"{st.st_mtime_ns:x}-{st.st_size:x}"
+    return (
+        path, st.st_size, st.st_mtime, etag,
+        mimetype or 'application/octet-stream', encoding
+    )
+
+
+# Used as the view of a file route. File metadata comes from a stat cache, so
+# hot files cost one open() per request, and the body is sent through the
+# server's wsgi.file_wrapper (sendfile where available). Conditional and Range
+# requests are answered by make_conditional.
+def _file_view(directory: str, config: Dict[str, Any]) -> callable:
+    root = os.path.realpath(directory)
+    param = config['param']
+    stat_ttl = config['stat_ttl']
+    max_age = config['max_age']
+    stats = LRUCache(max(1, int(config['stat_entries'])))
+
+    def file_view(**kwargs):
+        subpath = kwargs[param]
+        entry = stats.get(subpath)
+        if entry is None:
+            entry = _stat_file(root, subpath)
+            stats.set(subpath, entry, stat_ttl)
+        if entry is _MISSING:
+            abort(404)
+
+        path, size, mtime, etag, mimetype, encoding = entry
+        try:
+            file = open(path, 'rb')
+        except OSError:
+            # Removed since it was stat'ed
+            stats.pop(subpath)
+            abort(404)
+
+        response = Response(
+            wrap_file(request.environ, file), mimetype=mimetype,
+            direct_passthrough=True
+        )
+        response.content_length = size
+        response.last_modified = mtime
+        response.set_etag(etag)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        if max_age is not None:
+            response.cache_control.public = True
+            response.cache_control.max_age = int(max_age)
+        else:
+            response.cache_control.no_cache = True
+        try:
+            return response.make_conditional(
+                request.environ, accept_ranges=True, complete_length=size
+            )
+        except Exception:
+            file.close()
+            raise
+
+    file_view.stats = stats
+    return file_view
@@ -0,0 +1,68 @@
+import hashlib
+import json
+from typing import Any, Callable, Optional
+
+from jinja2 import nodes
+from jinja2.environment import Environment
+from jinja2.ext import Extension
+from jinja2.parser import Parser
+
+from .caching import LRUCache
+
+
+class FragmentCacheExtension(Extension):
+    """
+    A Jinja extension adding a `{% cache key, ttl %}` block, which renders its
+    body once and reuses the output for every render with the same key until
+    the ttl in seconds passes. Without a ttl the output is kept until it is
+    evicted. Keys are any JSON serializable value, so they can combine
+    rvar()/gvar() values and the path args in request.view_args. Every block
+    has its own key space.
+    The output is stored in the LRUCache `environment.fragment_cache`, bounded
+    by entry count and total size in characters.
+    Usage:
+        {% cache ('fruits', request.view_args.fruit), 300 %}
+            {% for name, color in gvar('fruit_dict').items() %}...{% endfor %}
+        {% endcache %}
+    """
+    tags = {'cache'}
+
+    def __init__(self, environment: Environment) -> None:
+        super().__init__(environment)
+        environment.extend(fragment_cache=LRUCache(
+            max_entries=1024, max_size=8 * 1024 * 1024
+        ))
+
+    def parse(self, parser: Parser) -> nodes.Node:
+        lineno = next(parser.stream).lineno
+        # Blocks are told apart by template and by their order in it, so
+        # blocks sharing a line get their own key space as well
+        parser._cache_blocks = getattr(parser, '_cache_blocks', 0) + 1
+        index = parser._cache_blocks
+        key = parser.parse_expression()
+        ttl = nodes.Const(None)
+        if parser.stream.skip_if('comma'):
+            ttl = parser.parse_expression()
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        if parser.name is None:
+            # Templates without a name, like those of from_string, are told
+            # apart by the source of the block
+            source = repr((key, body)).encode('utf-8')
+            block_id = f"<string>:{hashlib.sha1(source).hexdigest()}"
+        else:
+            block_id = f"{parser.name}:{index}"
+        block = nodes.Const(block_id)
+        return nodes.CallBlock(
+            self.call_method('_cache', [block, key, ttl]), [], [], body
+        ).set_lineno(lineno)
+
+    def _cache(
+        self, block: str, key: Any, ttl: Optional[float], caller: Callable
+    ) -> str:
+        cache = self.environment.fragment_cache
+        cache_key = (block, json.dumps(key, default=str, sort_keys=True))
+        output = cache.get(cache_key)
+        if output is None:
+            output = caller()
+            cache.set(cache_key, output, ttl, size=len(output))
+        return output
@@ -0,0 +1,178 @@
+import os
+from typing import Any, Dict, Optional, Tuple
+
+from .datasources import _DATA_VARIANTS, is_data_source
+
+
+# Keys of a $defaults entry that describe how the values of a key are
+# resolved, rather than being default values themselves.
+_SPEC_KEYS = ('$type', '$directory')
+_PATH_TYPES = ['$file']
+# Keys that are always paths, and so are resolved with the $all spec when they
+# have no spec of their own
+_PATH_KEYS = ('template', 'python-renderer')
+# Prefix of resolved template names, so they never shadow the app's templates
+TEMPLATE_PREFIX = '@router'
+
+
+def split_defaults(
+        raw_defaults: Any
+) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+    """
+    Splits a $defaults block into default values and path specs.
+    `$all` holds default values for every route. Its $type/$directory apply
+    to those keys, to templates and renderers, to the $directory of $file
+    routes and to the files of data sources, unless they have a spec of their
+    own. Any other entry is either a spec for the key it is named after, when
+    it has a $type or $directory, with an optional default under $value, or
+    the key's default value.
+    Returns the default values and the path specs by key, the $all spec is
+    also kept under '$all'.
+    Raises:
+        ValueError: If the $defaults block is invalid.
+    """
+    if not isinstance(raw_defaults, dict):
+        raise ValueError(
+            f"Invalid $defaults. Expected a dictionary, got "
+            f"{type(raw_defaults).__name__}."
+        )
+
+    values, specs = {}, {}
+    all_defaults = raw_defaults.get('$all', {})
+    if not isinstance(all_defaults, dict):
+        raise ValueError(
+            f"Invalid $defaults $all. Expected a dictionary, got "
+            f"{type(all_defaults).__name__}."
+        )
+    for key, value in all_defaults.items():
+        if key not in _SPEC_KEYS:
+            values[key] = value
+    all_spec = {k: all_defaults[k] for k in _SPEC_KEYS if k in all_defaults}
+    if all_spec:
+        all_spec = _check_spec('$all', all_spec)
+        for key in ['$all', *values, *_PATH_KEYS, '$directory']:
+            specs[key] = all_spec
+
+    for key, value in raw_defaults.items():
+        if key == '$all':
+            continue
+        if isinstance(value, dict) and any(k in value for k in _SPEC_KEYS):
+            specs[key] = _check_spec(
+                key, {k: value[k] for k in _SPEC_KEYS if k in value}
+            )
+            if '$value' in value:
+                values[key] = value['$value']
+        else:
+            values[key] = value
+    return values, specs
+
+
+def _check_spec(key: str, spec: Dict[str, Any]) -> Dict[str, Any]:
+    path_type = spec.get('$type', '$file')
+    if path_type not in _PATH_TYPES:
+        raise ValueError(
+            f"Invalid $type for $defaults {key}. "
+            f"Allowed types are {', '.join(_PATH_TYPES)}."
+        )
+    directory = spec.get('$directory', '/')
+    if not isinstance(directory, str):
+        raise ValueError(
+            f"Invalid $directory for $defaults {key}. "
+            f"Expected a string, got {type(directory).__name__}."
+        )
+    return {'$type': path_type, '$directory': directory}
+
+
+# relative_path = path of a value below the router root, as a '/' separated
+# relative path. A leading '/' means the router root, anything else is
+# relative to the spec's $directory.
+def relative_path(value: str, spec: Dict[str, Any]) -> str:
+    """
+    Resolves a path value against a spec into a path relative to the router
+    root.
+    Usage:
+        relative_path('index.html', {'$directory': '/templates/'})
+        # 'templates/index.html'
+        relative_path('/harmony/index.html', {'$directory': '/templates/'})
+        # 'harmony/index.html'
+    """
+    if value.startswith('/'):
+        path = value
+    else:
+        path = spec['$directory'].rstrip('/') + '/' + value
+    return os.path.normpath(path.lstrip('/')).replace(os.sep, '/')
+
+
+def layer_route(
+        route_data: Dict[str, Any], values: Dict[str, Any],
+        specs: Dict[str, Dict[str, Any]], overrides: Dict[str, Any],
+        router_root: str
+) -> Tuple[Dict[str, Any], Optional[str]]:
+    """
+    Computes the effective route data of a route: the $all defaults, then the
+    per-key defaults, then the route itself, then the overrides. String values
+    of keys with a path spec are then resolved: templates into names relative
+    to the router root under TEMPLATE_PREFIX, which a loader rooted there
+    finds, everything else into absolute paths. A $directory is only
+    resolved on $file routes. The variant files of data sources are resolved
+    with the spec named after the data source, or the $all spec.
+    Returns the route data and the router root if a template name was
+    resolved, otherwise None.
+    """
+    layered = {**values, **route_data, **overrides}
+    if not specs:
+        return layered, None
+
+    template_root = None
+    for key, value in list(layered.items()):
+        spec = specs.get(key)
+        if is_data_source(value):
+            spec = spec or specs.get('$all')
+            if spec is not None:
+                layered[key] = _resolve_data_source(value, spec, router_root)
+            continue
+        if spec is None or not isinstance(value, str) or not value:
+            continue
+        if key == '$directory' and layered.get('$type') != '$file':
+            continue
+        path = relative_path(value, spec)
+        if key == 'template':
+            # Prefixed, so only these names reach the router root loader
+            layered[key] = f"{TEMPLATE_PREFIX}/{path}"
+            template_root = router_root
+        else:
+            layered[key] = os.path.join(router_root, path)
+    return layered, template_root
+
+
+def _resolve_data_source(
+        source: Dict[str, Any], spec: Dict[str, Any], router_root: str
+) -> Dict[str, Any]:
+    resolved = dict(source)
+    for variant in _DATA_VARIANTS:
+        value = source.get(variant)
+        if isinstance(value, str) and value:
+            resolved[variant] = os.path.join(
+                router_root, relative_path(value, spec)
+            )
+    return resolved
+
+
+def check_overrides(raw_overrides: Any, source: str) -> Dict[str, Any]:
+    """
+    Checks that an $overrides block is a dictionary of key to value.
+    Raises:
+        ValueError: If the $overrides block is invalid.
+    """
+    if not isinstance(raw_overrides, dict):
+        raise ValueError(
+            f"Invalid $overrides in {source}. Expected a dictionary, got "
+            f"{type(raw_overrides).__name__}."
+        )
+    return raw_overrides
+
+
+# Used to find the router root of a router file, the directory that paths
+# starting with '/' are relative to.
+def router_root(rtr_file: str) -> str:
+    return os.path.dirname(os.path.abspath(rtr_file))
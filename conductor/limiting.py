@@ -0,0 +1,155 @@
+import os
+import threading
+import weakref
+from typing import Any, Dict, Optional
+
+from werkzeug.exceptions import ServiceUnavailable
+
+
+# All limiters, so their state can be reset in forked workers
+_limiters: "weakref.WeakSet[ConcurrencyLimiter]" = weakref.WeakSet()
+
+
+def limit_config(
+        raw_route: str, route_data: Dict[str, Any]
+) -> Optional[Dict[str, Any]]:
+    """
+    Validates the concurrency limit of a route. `$max_concurrency` is the
+    number of requests the route handles at once, `$queue_timeout` the
+    seconds a request waits for a free slot before it is shed with a 503
+    (default 0, shed at once), and `$retry_after` the seconds clients are
+    told to wait in the Retry-After header (default 1).
+    Returns None if the route has no limit.
+    Usage:
+        "@/form": {
+            "python-renderer": "form.py",
+            "$max_concurrency": 4,
+            "$queue_timeout": 0.05
+        }
+    Raises:
+        ValueError: If the limit is invalid.
+    """
+    if '$max_concurrency' not in route_data:
+        for key in ('$queue_timeout', '$retry_after'):
+            if key in route_data:
+                raise ValueError(
+                    f"Route {raw_route} has a {key} but no $max_concurrency."
+                )
+        return None
+
+    max_concurrency = route_data['$max_concurrency']
+    if (
+        not isinstance(max_concurrency, int)
+        or isinstance(max_concurrency, bool) or max_concurrency < 1
+    ):
+        raise ValueError(
+            f"Invalid $max_concurrency for route {raw_route}. "
+            f"Expected a positive integer, got {max_concurrency}."
+        )
+    for key in ('$queue_timeout', '$retry_after'):
+        value = route_data.get(key, 0)
+        if not isinstance(value, (int, float)) or value < 0:
+            raise ValueError(
+                f"Invalid {key} for route {raw_route}. "
+                f"Expected a positive number, got {value}."
+            )
+    return {
+        'max_concurrency': max_concurrency,
+        'queue_timeout': route_data.get('$queue_timeout', 0),
+        'retry_after': int(route_data.get('$retry_after', 1))
+    }
+
+
+class ConcurrencyLimiter:
+    """
+    Bounds the number of requests a route handles at once. Requests that find
+    no free slot within the queue timeout are shed: they get a 503 with a
+    Retry-After header right away instead of tying up a worker thread.
+    Slots and counters are per process, and reset in forked workers.
+    Args:
+        config (dict): The route's validated limit, see limit_config().
+    Usage:
+        limiter = ConcurrencyLimiter(config)
+        limiter.stats()  # {'admitted': 10, 'shed': 2, 'in_flight': 1, ...}
+    """
+    def __init__(self, config: Dict[str, Any]) -> None:
+        self.config = config
+        self.max_concurrency = config['max_concurrency']
+        self.queue_timeout = config['queue_timeout']
+        self.retry_after = config['retry_after']
+        self._lock = threading.Lock()
+        self.reset()
+        _limiters.add(self)
+
+    def reset(self) -> None:
+        """
+        Frees all slots and sets the counters back to zero.
+        """
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self.admitted = 0
+        self.shed = 0
+        self.in_flight = 0
+
+    def acquire(self) -> bool:
+        """
+        Takes a slot, waiting at most the queue timeout. Returns False if the
+        request was shed.
+        """
+        if self.queue_timeout:
+            acquired = self._slots.acquire(timeout=self.queue_timeout)
+        else:
+            acquired = self._slots.acquire(blocking=False)
+        with self._lock:
+            if acquired:
+                self.admitted += 1
+                self.in_flight += 1
+            else:
+                self.shed += 1
+        return acquired
+
+    def release(self) -> None:
+        """
+        Gives a slot back.
+        """
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Gets the admitted and shed counters, and the current usage.
+        """
+        return {
+            'admitted': self.admitted,
+            'shed': self.shed,
+            'in_flight': self.in_flight,
+            'max_concurrency': self.max_concurrency
+        }
+
+
+def _reset_after_fork() -> None:
+    # Slots held by threads of the parent would never be released
+    for limiter in list(_limiters):
+        limiter._lock = threading.Lock()
+        limiter.reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+# Used to wrap a view so that it runs at most max_concurrency times at once.
+# Shed requests raise a 503, which the app's 503 error handler, if any,
+# renders. The slot is held until the view returns, so the body of a streamed
+# response is sent outside of the limit.
+def _limited_view(view: callable, limiter: ConcurrencyLimiter) -> callable:
+    def limited_view(*args, **kwargs):
+        if not limiter.acquire():
+            raise ServiceUnavailable(retry_after=limiter.retry_after)
+        try:
+            return view(*args, **kwargs)
+        finally:
+            limiter.release()
+
+    limited_view.limiter = limiter
+    return limited_view
@@ -0,0 +1,176 @@
+import json
+import mmap
+import os
+import struct
+from typing import Any, Dict, Iterator, Mapping, Optional
+
+
+# The layout of a mapdb file, all integers little endian:
+#   header  magic (8 bytes), format version (u16), key width (u16),
+#           entry count (u32), index offset (u64), data offset (u64)
+#   index   one fixed-width entry per key, sorted by key bytes:
+#           key (UTF-8, NUL padded to the key width), value offset (u64),
+#           value length (u32). The value offset is relative to the data
+#           offset.
+#   data    the values as UTF-8 JSON, one after another
+# A lookup is a binary search over the index, so only the pages of the index
+# entries it compares and of the value it returns are read from disk. Every
+# process mapping the same file shares those pages through the page cache.
+_MAGIC = b'CNDMAPDB'
+_MAPDB_VERSION = 1
+_HEADER = struct.Struct('<8sHHIQQ')
+_ENTRY = struct.Struct('<QI')
+
+
+class MapDB(Mapping):
+    """
+    A read-only, memory-mapped key-value file written by write_mapdb(). Keys
+    are strings, values anything JSON can hold. Values are decoded on every
+    lookup, so store them in a variable if they are used more than once.
+    Args:
+        path (str): The path of the mapdb file.
+    Raises:
+        ValueError: If the file is not a mapdb file of a supported version,
+        or is truncated.
+    Usage:
+        contacts = MapDB('contact-list.map')
+        contacts.get('alice')
+    """
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            header = _HEADER.unpack_from(self._map, 0)
+        except struct.error:
+            header = (b'',) + (0,) * 5
+        magic, version, key_width, count, index_offset, data_offset = header
+        if magic != _MAGIC or version != _MAPDB_VERSION:
+            self._map.close()
+            raise ValueError(
+                f"{path} is not a mapdb file of version {_MAPDB_VERSION}."
+            )
+        self._key_width = key_width
+        self._count = count
+        self._index_offset = index_offset
+        self._data_offset = data_offset
+        self._entry_width = key_width + _ENTRY.size
+        if not self._complete():
+            self._map.close()
+            raise ValueError(
+                f"{path} is a truncated or corrupt mapdb file. "
+                f"Ensure it was written completely by write_mapdb."
+            )
+
+    # Used to check that the sections fit the file. Values are written in
+    # index order, so the last index entry ends the data section.
+    def _complete(self) -> bool:
+        if (
+            self._index_offset != _HEADER.size
+            or self._data_offset
+            != self._index_offset + self._count * self._entry_width
+            or len(self._map) < self._data_offset
+        ):
+            return False
+        data_size = 0
+        if self._count:
+            offset, length = _ENTRY.unpack_from(
+                self._map, self._data_offset - _ENTRY.size
+            )
+            data_size = offset + length
+        return len(self._map) == self._data_offset + data_size
+
+    def _key_at(self, position: int) -> bytes:
+        start = self._index_offset + position * self._entry_width
+        return self._map[start:start + self._key_width]
+
+    def _find(self, key: str) -> Optional[int]:
+        encoded = key.encode('utf-8')
+        if len(encoded) > self._key_width or b'\0' in encoded:
+            return None
+        padded = encoded.ljust(self._key_width, b'\0')
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_at(middle) < padded:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._count and self._key_at(low) == padded:
+            return low
+        return None
+
+    def __getitem__(self, key: str) -> Any:
+        position = self._find(key) if isinstance(key, str) else None
+        if position is None:
+            raise KeyError(key)
+        offset, length = _ENTRY.unpack_from(
+            self._map,
+            self._index_offset + position * self._entry_width
+            + self._key_width
+        )
+        start = self._data_offset + offset
+        return json.loads(self._map[start:start + length])
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._find(key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        for position in range(self._count):
+            yield self._key_at(position).rstrip(b'\0').decode('utf-8')
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        """
+        Unmaps the file. Lookups fail afterwards.
+        """
+        self._map.close()
+
+
+# Used to write a mapping of string keys to JSON values as a mapdb file. The
+# file is written next to its path first and then moved into place, so readers
+# never map a partial file.
+def write_mapdb(path: str, data: Dict[str, Any]) -> int:
+    """
+    Writes a dictionary as a mapdb file. Returns the number of entries.
+    Raises:
+        ValueError: If a key is not a string, contains a NUL character, or is
+        longer than 65535 bytes, or if a value cannot be encoded as JSON.
+    Usage:
+        write_mapdb('contact-list.map', json.load(open('contact-list.json')))
+    """
+    entries = []
+    for key, value in data.items():
+        if not isinstance(key, str) or '\0' in key:
+            raise ValueError(
+                f"Invalid mapdb key {key!r}. Keys must be strings without "
+                f"NUL characters."
+            )
+        entries.append((key.encode('utf-8'), json.dumps(value).encode()))
+    entries.sort(key=lambda entry: entry[0])
+
+    key_width = max((len(key) for key, _ in entries), default=1)
+    if key_width > 0xFFFF:
+        raise ValueError(
+            f"mapdb keys can be at most 65535 bytes long, got {key_width}."
+        )
+    index_offset = _HEADER.size
+    data_offset = index_offset + len(entries) * (key_width + _ENTRY.size)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as file:
+        file.write(_HEADER.pack(
+            _MAGIC, _MAPDB_VERSION, key_width, len(entries),
+            index_offset, data_offset
+        ))
+        offset = 0
+        for key, value in entries:
+            file.write(key.ljust(key_width, b'\0'))
+            file.write(_ENTRY.pack(offset, len(value)))
+            offset += len(value)
+        for _, value in entries:
+            file.write(value)
+    os.replace(tmp_path, path)
+    return len(entries)
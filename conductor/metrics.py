@@ -0,0 +1,254 @@
+import bisect
+import os
+import threading
+import time
+import weakref
+from typing import Any, Dict, List, Tuple
+
+from flask import Response
+from werkzeug.exceptions import HTTPException
+
+from .limiting import ConcurrencyLimiter
+
+
+# Upper bounds in seconds of the latency histogram buckets
+_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# Counters are split over stripes, each with its own lock, so concurrent
+# requests rarely wait on each other
+_STRIPES = 16
+_LABELS = ('raw_route', 'endpoint', 'renderer')
+
+# All registries, so their counters can be reset in forked workers
+_registries: "weakref.WeakSet[MetricsRegistry]" = weakref.WeakSet()
+
+
+class RouteMetrics:
+    """
+    Request count, error count and latency histogram of a single route.
+    Each stripe holds [requests, errors, latency sum, bucket counts...] and is
+    chosen by the current thread, so the hot path takes an uncontended lock.
+    """
+    def __init__(self, labels: Dict[str, str]) -> None:
+        self.labels = labels
+        self._locks = [threading.Lock() for _ in range(_STRIPES)]
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Sets all counters back to zero.
+        """
+        self._stripes = [
+            [0, 0, 0.0] + [0] * (len(_BUCKETS) + 1) for _ in range(_STRIPES)
+        ]
+
+    def observe(self, seconds: float, error: bool) -> None:
+        """
+        Records one request that took the given time.
+        """
+        index = threading.get_ident() % _STRIPES
+        bucket = 3 + bisect.bisect_left(_BUCKETS, seconds)
+        with self._locks[index]:
+            stripe = self._stripes[index]
+            stripe[0] += 1
+            if error:
+                stripe[1] += 1
+            stripe[2] += seconds
+            stripe[bucket] += 1
+
+    def totals(self) -> List[Any]:
+        """
+        Gets the counters summed over all stripes, in the stripe layout.
+        """
+        totals = [0, 0, 0.0] + [0] * (len(_BUCKETS) + 1)
+        for lock, stripe in zip(self._locks, self._stripes):
+            with lock:
+                for i, value in enumerate(stripe):
+                    totals[i] += value
+        return totals
+
+
+class MetricsRegistry:
+    """
+    The metrics of all routes of a router. Counters are kept per process and
+    reset in forked workers, so every worker reports its own requests under
+    its own pid label.
+    Usage:
+        registry = MetricsRegistry()
+        route_metrics = registry.route({'raw_route': '/', ...})
+        registry.render_prometheus()
+    """
+    def __init__(self) -> None:
+        self._routes: Dict[Tuple[str, ...], RouteMetrics] = {}
+        # Concurrency limiters of routes with a $max_concurrency
+        self._limiters: Dict[Tuple[str, ...], ConcurrencyLimiter] = {}
+        self._lock = threading.Lock()
+        _registries.add(self)
+
+    def route(self, labels: Dict[str, str]) -> RouteMetrics:
+        """
+        Gets the metrics for a set of labels, creating them if needed. Routes
+        rebuilt by a hot reload keep counting in the same metrics.
+        """
+        key = tuple(labels[name] for name in _LABELS)
+        with self._lock:
+            route_metrics = self._routes.get(key)
+            if route_metrics is None:
+                route_metrics = RouteMetrics(labels)
+                self._routes[key] = route_metrics
+            return route_metrics
+
+    def add_limiter(
+        self, labels: Dict[str, str], limiter: ConcurrencyLimiter
+    ) -> None:
+        """
+        Publishes the shed and in-flight counters of a route's concurrency
+        limiter, replacing the limiter previously added for the same labels.
+        """
+        key = tuple(labels[name] for name in _LABELS)
+        with self._lock:
+            self._limiters[key] = limiter
+
+    def reset(self) -> None:
+        """
+        Sets the counters of all routes back to zero.
+        """
+        with self._lock:
+            for route_metrics in self._routes.values():
+                route_metrics.reset()
+
+    def render_prometheus(self) -> str:
+        """
+        Renders all metrics in the Prometheus text exposition format.
+        """
+        pid = str(os.getpid())
+        with self._lock:
+            routes = list(self._routes.values())
+            limiters = list(self._limiters.items())
+
+        requests, errors, histogram = [], [], []
+        for route_metrics in routes:
+            totals = route_metrics.totals()
+            labels = _format_labels(route_metrics.labels, pid)
+            requests.append(
+                f"conductor_requests_total{{{labels}}} {totals[0]}"
+            )
+            errors.append(
+                f"conductor_request_errors_total{{{labels}}} {totals[1]}"
+            )
+            cumulative = 0
+            for bound, count in zip(_BUCKETS + ('+Inf',), totals[3:]):
+                cumulative += count
+                histogram.append(
+                    "conductor_request_duration_seconds_bucket"
+                    f"{{{labels},le=\"{bound}\"}} {cumulative}"
+                )
+            histogram.append(
+                f"conductor_request_duration_seconds_sum{{{labels}}} "
+                f"{totals[2]}"
+            )
+            histogram.append(
+                f"conductor_request_duration_seconds_count{{{labels}}} "
+                f"{totals[0]}"
+            )
+
+        shed, in_flight = [], []
+        for key, limiter in limiters:
+            labels = _format_labels(dict(zip(_LABELS, key)), pid)
+            stats = limiter.stats()
+            shed.append(
+                f"conductor_requests_shed_total{{{labels}}} {stats['shed']}"
+            )
+            in_flight.append(
+                f"conductor_requests_in_flight{{{labels}}} "
+                f"{stats['in_flight']}"
+            )
+
+        lines = [
+            "# HELP conductor_requests_total Requests handled by a route.",
+            "# TYPE conductor_requests_total counter",
+            *requests,
+            "# HELP conductor_request_errors_total Requests of a route that "
+            "raised or answered with a 5xx status.",
+            "# TYPE conductor_request_errors_total counter",
+            *errors,
+            "# HELP conductor_request_duration_seconds Time spent in the "
+            "route's view.",
+            "# TYPE conductor_request_duration_seconds histogram",
+            *histogram,
+            "# HELP conductor_requests_shed_total Requests of a route that "
+            "were answered with a 503 because it was at $max_concurrency.",
+            "# TYPE conductor_requests_shed_total counter",
+            *shed,
+            "# HELP conductor_requests_in_flight Requests a route with a "
+            "$max_concurrency is handling.",
+            "# TYPE conductor_requests_in_flight gauge",
+            *in_flight
+        ]
+        return '\n'.join(lines) + '\n'
+
+
+def _format_labels(labels: Dict[str, str], pid: str) -> str:
+    def escape(value: str) -> str:
+        return (
+            value.replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n')
+        )
+    pairs = [f'{name}="{escape(labels[name])}"' for name in _LABELS]
+    pairs.append(f'pid="{pid}"')
+    return ','.join(pairs)
+
+
+def _reset_after_fork() -> None:
+    for registry in list(_registries):
+        registry.reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+# Used to get the labels of a route from its route metadata.
+def route_labels(route_cmeta: Dict[str, Any]) -> Dict[str, str]:
+    return {
+        'raw_route': route_cmeta['raw_route'],
+        'endpoint': route_cmeta['endpoint'] or '',
+        'renderer': route_cmeta['renderer'] or ''
+    }
+
+
+# Used to wrap a view so that every call is counted and timed. A call is an
+# error if it raises (other than an HTTP error below 500) or answers with a
+# 5xx status.
+def _metered_view(view: callable, route_metrics: RouteMetrics) -> callable:
+    observe = route_metrics.observe
+    perf_counter = time.perf_counter
+
+    def metered_view(*args, **kwargs):
+        start = perf_counter()
+        try:
+            rv = view(*args, **kwargs)
+        except HTTPException as error:
+            observe(perf_counter() - start, (error.code or 500) >= 500)
+            raise
+        except Exception:
+            observe(perf_counter() - start, True)
+            raise
+        if isinstance(rv, Response):
+            status = rv.status_code
+        elif isinstance(rv, tuple) and len(rv) > 1 and isinstance(rv[1], int):
+            status = rv[1]
+        else:
+            status = 200
+        observe(perf_counter() - start, status >= 500)
+        return rv
+    return metered_view
+
+
+# Used as the view of the metrics endpoint.
+def _metrics_endpoint(registry: MetricsRegistry) -> callable:
+    def metrics_view():
+        return Response(
+            registry.render_prometheus(),
+            mimetype='text/plain; version=0.0.4'
+        )
+    return metrics_view
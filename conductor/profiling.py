@@ -0,0 +1,173 @@
+import cProfile
+import hashlib
+import os
+import pstats
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+_PROFILE_KEYS = ('rate', 'enabled', 'flush_interval')
+# Characters of an endpoint that are kept in the stats file name
+_UNSAFE_NAME_CHARS = re.compile(r'[^A-Za-z0-9_-]')
+
+# cProfile can only have one active profiler per process on newer Pythons,
+# and concurrent profiles would mix their frames anyway. A sampled request
+# that finds another one being profiled simply runs unprofiled.
+_active = threading.Lock()
+
+
+def profile_config(raw_route: str, config: Any) -> Dict[str, Any]:
+    """
+    Validates the $profile block of a route and fills in the defaults.
+    `"$profile": true` profiles 1% of the requests to the route, and writes
+    the stats at most once a second.
+    Raises:
+        ValueError: If the $profile block is invalid.
+    """
+    if config is True:
+        config = {}
+    if not isinstance(config, dict):
+        raise ValueError(
+            f"Invalid $profile for route {raw_route}. "
+            f"Expected true or a dictionary, got {type(config).__name__}."
+        )
+    for key in config:
+        if key not in _PROFILE_KEYS:
+            raise ValueError(
+                f"Invalid $profile key {key} for route {raw_route}. "
+                f"Allowed keys are {', '.join(_PROFILE_KEYS)}."
+            )
+    rate = config.get('rate', 0.01)
+    if not isinstance(rate, (int, float)) or not 0 <= rate <= 1:
+        raise ValueError(
+            f"Invalid $profile rate for route {raw_route}. "
+            f"Expected a number between 0 and 1, got {rate}."
+        )
+    flush_interval = config.get('flush_interval', 1.0)
+    if (
+        not isinstance(flush_interval, (int, float))
+        or isinstance(flush_interval, bool) or flush_interval <= 0
+    ):
+        raise ValueError(
+            f"Invalid $profile flush_interval for route {raw_route}. "
+            f"Expected a positive number, got {flush_interval}."
+        )
+    return {
+        'rate': rate,
+        'enabled': bool(config.get('enabled', True)),
+        'flush_interval': flush_interval
+    }
+
+
+class RouteProfiler:
+    """
+    Samples requests of a single route with cProfile and aggregates their
+    stats. The stats are written to `<endpoint>-<hash>.<pid>.prof` in the
+    profile directory, so every worker process keeps its own file. Characters
+    of the endpoint other than letters, digits, '_' and '-' are replaced,
+    and the hash keeps the files of similar endpoints apart. Load them with
+    pstats, or any viewer that reads pstats files such as snakeviz.
+    Args:
+        name (str): The file name stem, normally the route endpoint.
+        directory (str): The directory the stats are written to.
+        config (dict): The route's validated $profile block.
+    Usage:
+        profiler = RouteProfiler('index', '__conductor__/profiles', config)
+        profiler.rate = 0.5  # change the sample rate at runtime
+        profiler.flush()
+    """
+    def __init__(
+        self, name: str, directory: str, config: Dict[str, Any]
+    ) -> None:
+        self.name = name
+        # Endpoints may hold path separators, the file name must not
+        digest = hashlib.sha1(name.encode('utf-8')).hexdigest()[:8]
+        self.stem = f"{_UNSAFE_NAME_CHARS.sub('_', name)}-{digest}"
+        self.directory = directory
+        self.config = config
+        self.rate = config['rate']
+        self.enabled = config['enabled']
+        self.flush_interval = config['flush_interval']
+        self.samples = 0
+        self._stats: Optional[pstats.Stats] = None
+        self._flushed = 0.0
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, f"{self.stem}.{os.getpid()}.prof")
+
+    def sampled(self) -> bool:
+        """
+        Whether the current request should be profiled.
+        """
+        return self.enabled and random.random() < self.rate
+
+    def add(self, profile: cProfile.Profile) -> None:
+        """
+        Adds the stats of one profiled request, writing the aggregated stats
+        if the flush interval passed.
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked workers start with their own, empty stats
+                self._stats, self.samples = None, 0
+                self._pid = os.getpid()
+            if self._stats is None:
+                self._stats = pstats.Stats(profile)
+            else:
+                self._stats.add(profile)
+            self.samples += 1
+            if time.monotonic() - self._flushed >= self.flush_interval:
+                self._write()
+
+    def flush(self) -> Optional[str]:
+        """
+        Writes the aggregated stats now. Returns the path of the stats file,
+        or None if no request was sampled yet.
+        """
+        with self._lock:
+            if self._stats is None:
+                return None
+            return self._write()
+
+    def reset(self) -> None:
+        """
+        Drops the aggregated stats, the stats file is left as it is.
+        """
+        with self._lock:
+            self._stats, self.samples = None, 0
+
+    def _write(self) -> str:
+        path = self.path
+        os.makedirs(self.directory, exist_ok=True)
+        # Write to a temporary file first so readers never see partial stats
+        tmp_path = f"{path}.tmp"
+        self._stats.dump_stats(tmp_path)
+        os.replace(tmp_path, path)
+        self._flushed = time.monotonic()
+        return path
+
+
+# Used to wrap a view so that a sample of its calls is profiled. Calls that
+# are not sampled only pay for the sampled() check.
+def _profiled_view(view: callable, profiler: RouteProfiler) -> callable:
+    sampled = profiler.sampled
+
+    def profiled_view(*args, **kwargs):
+        if not sampled() or not _active.acquire(blocking=False):
+            return view(*args, **kwargs)
+        try:
+            profile = cProfile.Profile()
+            try:
+                rv = profile.runcall(view, *args, **kwargs)
+            finally:
+                profiler.add(profile)
+        finally:
+            _active.release()
+        return rv
+    return profiled_view
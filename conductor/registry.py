@@ -0,0 +1,171 @@
+import hashlib
+import importlib.util
+import os
+import sys
+import threading
+import time
+from types import ModuleType
+from typing import Callable, Dict, List, Optional
+
+
+class RendererRegistry:
+    """
+    A registry of imported python-renderer modules. Each renderer file is
+    imported once, keyed by its absolute path, and registered in `sys.modules`
+    under a unique module name so that several routes (or error handlers)
+    pointing at the same file share a single module and renderer callable.
+    Usage:
+        registry = RendererRegistry()
+        func = registry.get_renderer('renderers/index.py')
+        registry.import_times  # {'/abs/renderers/index.py': 0.0012, ...}
+    """
+    def __init__(self) -> None:
+        self._modules: Dict[str, ModuleType] = {}
+        self._renderers: Dict[str, Optional[Callable]] = {}
+        # Import time in seconds for every file imported by this registry.
+        self.import_times: Dict[str, float] = {}
+        # Modification time of every file when it was imported, used to find
+        # the modules that changed on disk.
+        self._mtimes: Dict[str, int] = {}
+        # Reentrant so a renderer module may itself trigger a lookup.
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def module_name(abs_path: str) -> str:
+        """
+        Computes the unique `sys.modules` name used for a renderer file.
+        The name contains the file stem for readability and a short hash of the
+        absolute path so that equally named files in different directories do
+        not collide.
+        """
+        stem = os.path.splitext(os.path.basename(abs_path))[0]
+        stem = ''.join(c if c.isalnum() else '_' for c in stem)
+        digest = hashlib.sha1(abs_path.encode('utf-8')).hexdigest()[:12]
+        return f"_conductor_renderer_{stem}_{digest}"
+
+    def load_module(self, path: str) -> ModuleType:
+        """
+        Imports the renderer module at `path`, or returns it if it has already
+        been imported by this registry.
+        Raises:
+            FileNotFoundError: If the renderer file does not exist.
+            ImportError: If no import spec can be created for the file.
+        """
+        abs_path = os.path.abspath(path)
+        module = self._modules.get(abs_path)
+        if module is not None:
+            return module
+
+        with self._lock:
+            # Another thread may have finished the import while we waited.
+            module = self._modules.get(abs_path)
+            if module is not None:
+                return module
+
+            if not os.path.exists(abs_path):
+                raise FileNotFoundError(
+                    f"Renderer file {path} not found. "
+                    f"Ensure the path is correct."
+                )
+            name = self.module_name(abs_path)
+            spec = importlib.util.spec_from_file_location(name, abs_path)
+            if spec is None or spec.loader is None:
+                raise ImportError(
+                    f"Could not load spec for renderer {path}."
+                )
+
+            mtime = os.stat(abs_path).st_mtime_ns
+            start = time.perf_counter()
+            module = importlib.util.module_from_spec(spec)
+            sys.modules[name] = module
+            try:
+                spec.loader.exec_module(module)
+            except BaseException:
+                sys.modules.pop(name, None)
+                raise
+            self.import_times[abs_path] = time.perf_counter() - start
+            self._mtimes[abs_path] = mtime
+
+            self._modules[abs_path] = module
+            return module
+
+    def get_renderer(self, path: str) -> Optional[Callable]:
+        """
+        Gets the @renderer callable of the renderer file at `path`, importing
+        the file first if needed. Returns None if the module has no @renderer.
+        The lookup through the module attributes is only done once per file.
+        """
+        abs_path = os.path.abspath(path)
+        if abs_path in self._renderers:
+            return self._renderers[abs_path]
+
+        with self._lock:
+            if abs_path in self._renderers:
+                return self._renderers[abs_path]
+
+            module = self.load_module(abs_path)
+            found = None
+            for attr_name in dir(module):
+                attr = getattr(module, attr_name)
+                if (
+                    callable(attr)
+                    and getattr(attr, '_is_conductor_renderer', False)
+                ):
+                    found = attr
+                    break
+            self._renderers[abs_path] = found
+            return found
+
+    def changed_modules(self) -> List[str]:
+        """
+        Gets the absolute paths of all imported renderer files that were
+        modified or removed since they were imported.
+        """
+        changed = []
+        for abs_path, mtime in list(self._mtimes.items()):
+            try:
+                if os.stat(abs_path).st_mtime_ns != mtime:
+                    changed.append(abs_path)
+            except OSError:
+                changed.append(abs_path)
+        return changed
+
+    def reload_module(self, path: str) -> ModuleType:
+        """
+        Imports the renderer file at `path` again, replacing the cached module
+        and renderer. Views built from the previous module keep using it until
+        they are rebuilt.
+        """
+        abs_path = os.path.abspath(path)
+        with self._lock:
+            self.forget(abs_path)
+            return self.load_module(abs_path)
+
+    def forget(self, path: str) -> None:
+        """
+        Drops a renderer file from the registry, so that the next lookup
+        imports it again.
+        """
+        abs_path = os.path.abspath(path)
+        with self._lock:
+            self._modules.pop(abs_path, None)
+            self._renderers.pop(abs_path, None)
+            self._mtimes.pop(abs_path, None)
+            self.import_times.pop(abs_path, None)
+
+    def mark_changed(self, path: str) -> None:
+        """
+        Drops a renderer file like forget(), but keeps reporting it from
+        changed_modules() until it is imported again, so a reload that failed
+        to import it is retried on the next poll.
+        """
+        abs_path = os.path.abspath(path)
+        with self._lock:
+            self.forget(abs_path)
+            self._mtimes[abs_path] = -1
+
+    def modules(self) -> Dict[str, ModuleType]:
+        """
+        Gets all imported renderer modules, keyed by absolute path.
+        """
+        return dict(self._modules)
@@ -0,0 +1,173 @@
+import os
+import threading
+from typing import Any, Callable, Dict, Iterable, List
+
+from flask import Flask
+from werkzeug.exceptions import default_exceptions
+
+
+# Keys of the route metadata that end up in the URL rule itself. If only other
+# keys change, the view function is swapped and the URL map is left alone.
+_RULE_KEYS = ('url_rule', 'methods', 'endpoint')
+
+
+def diff_routes(
+        old_routes: Dict[str, Dict[str, Any]],
+        new_routes: Dict[str, Dict[str, Any]],
+        changed_renderers: Iterable[str]
+) -> Dict[str, List[str]]:
+    """
+    Computes the difference between two route tables, keyed by raw route.
+    Routes whose definition is unchanged but whose renderer file changed on
+    disk are reported as changed too.
+    Returns a dictionary with the raw routes that were added, removed and
+    changed, and the changed routes whose URL rule must be replaced.
+    """
+    changed_renderers = set(changed_renderers)
+    diff = {'added': [], 'removed': [], 'changed': [], 'rules': []}
+    for raw_route, route_cmeta in new_routes.items():
+        old_cmeta = old_routes.get(raw_route)
+        if old_cmeta is None:
+            diff['added'].append(raw_route)
+            continue
+        renderer = route_cmeta['renderer']
+        if (
+            old_cmeta != route_cmeta
+            or (renderer and os.path.abspath(renderer) in changed_renderers)
+        ):
+            diff['changed'].append(raw_route)
+            if any(old_cmeta[k] != route_cmeta[k] for k in _RULE_KEYS):
+                diff['rules'].append(raw_route)
+    diff['removed'] = [r for r in old_routes if r not in new_routes]
+    return diff
+
+
+# Creates the werkzeug Rule for a route the same way Flask.add_url_rule does,
+# which can no longer be used once the app handled its first request.
+def _make_rule(app: Flask, route_cmeta: Dict[str, Any]) -> Any:
+    methods = {m.upper() for m in route_cmeta['methods']}
+    provide_automatic_options = (
+        'OPTIONS' not in methods
+        and app.config.get('PROVIDE_AUTOMATIC_OPTIONS', True)
+    )
+    if provide_automatic_options:
+        methods.add('OPTIONS')
+    rule = app.url_rule_class(
+        route_cmeta['url_rule'],
+        methods=methods,
+        endpoint=route_cmeta['endpoint']
+    )
+    rule.provide_automatic_options = provide_automatic_options
+    return rule
+
+
+def copy_url_map(app: Flask, remove_endpoints: Iterable[str] = ()) -> Any:
+    """
+    Creates a new URL map of the app's url_map_class with the settings and
+    rules of the current one, leaving out the rules of remove_endpoints.
+    """
+    remove_endpoints = set(remove_endpoints)
+    old_map = app.url_map
+    new_map = app.url_map_class(
+        default_subdomain=old_map.default_subdomain,
+        strict_slashes=old_map.strict_slashes,
+        merge_slashes=old_map.merge_slashes,
+        redirect_defaults=old_map.redirect_defaults,
+        converters=old_map.converters,
+        sort_parameters=old_map.sort_parameters,
+        sort_key=old_map.sort_key,
+        host_matching=old_map.host_matching
+    )
+    for rule in old_map.iter_rules():
+        if rule.endpoint not in remove_endpoints:
+            # Rules are bound to a single map, so they are copied
+            new_rule = rule.empty()
+            new_rule.provide_automatic_options = getattr(
+                rule, 'provide_automatic_options', False
+            )
+            new_map.add(new_rule)
+    return new_map
+
+
+def swap_url_rules(
+        app: Flask,
+        remove_endpoints: Iterable[str],
+        add_routes: Iterable[Dict[str, Any]],
+        views: Dict[str, Callable]
+) -> None:
+    """
+    Replaces URL rules of a running app. A new URL map is built from the rules
+    that are kept plus the new ones, then swapped in with a single assignment,
+    so requests always match against either the old or the new map.
+    `views` maps endpoints to the view functions of the added routes.
+    """
+    remove_endpoints = set(remove_endpoints)
+    new_map = copy_url_map(app, remove_endpoints)
+    for route_cmeta in add_routes:
+        new_map.add(_make_rule(app, route_cmeta))
+
+    # New views must exist before the map that routes to them does, and old
+    # views may only go after the map that routes to them is gone.
+    app.view_functions.update(views)
+    app.url_map = new_map
+    for endpoint in remove_endpoints - set(views):
+        app.view_functions.pop(endpoint, None)
+
+
+def set_error_handler(
+        app: Flask, error_code: int, handler: Callable = None
+) -> None:
+    """
+    Sets or, if handler is None, removes the app wide handler of an HTTP error
+    code, without the setup checks of Flask.errorhandler.
+    """
+    exc_class = default_exceptions[error_code]
+    handlers = app.error_handler_spec[None][error_code]
+    if handler is None:
+        handlers.pop(exc_class, None)
+    else:
+        handlers[exc_class] = handler
+
+
+class RouterWatcher(threading.Thread):
+    """
+    A daemon thread that polls the modification time of a router file and of
+    the renderer files it imported, and calls `on_change` when one changed.
+    Errors raised by `on_change` are passed to `on_error` and the watcher
+    keeps running, so a broken edit can be fixed without a restart.
+    """
+    def __init__(
+        self, rtr_file: str, registry: Any, on_change: Callable,
+        on_error: Callable, interval: float = 1.0
+    ) -> None:
+        super().__init__(name='conductor-router-watcher', daemon=True)
+        self.rtr_file = rtr_file
+        self.registry = registry
+        self.on_change = on_change
+        self.on_error = on_error
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._mtime = self._router_mtime()
+
+    def _router_mtime(self) -> int:
+        try:
+            return os.stat(self.rtr_file).st_mtime_ns
+        except OSError:
+            return -1
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            mtime = self._router_mtime()
+            if mtime == self._mtime and not self.registry.changed_modules():
+                continue
+            self._mtime = mtime
+            try:
+                self.on_change()
+            except Exception as error:
+                self.on_error(error)
+
+    def stop(self) -> None:
+        """
+        Stops the watcher after its current poll.
+        """
+        self._stopped.set()
@@ -1,6 +1,11 @@
-from typing import Dict, Any, List
+import threading
+import types
+from collections import ChainMap
+from typing import Callable, Dict, Any, Iterator, List, Tuple
 
-from flask import g
+from flask import Response, current_app, g, stream_with_context
+
+from .bindings import GlobalsBinding, RouteContext
 
 
 # Decorator to mark a function as a renderer view method.
@@ -20,23 +25,91 @@ def renderer(func) -> callable:
 
 # Used to wrap renderer methods to inject global variables and route data into
 # the renderer method. These can be fetched using gvar<s>() and rvar<s>().
+# Everything is stored in one `g` slot, see bindings.GlobalsBinding for the
+# 'live' and 'snapshot' globals modes.
 def _wrap_renderer(
         renderer_func: callable,
         route_data: Dict[str, Any],
         accessed_globals: List[str],
-        route_computed_metadata: Dict[str, Any]
+        route_computed_metadata: Dict[str, Any],
+        globals_mode: str = 'live'
+) -> callable:
+    context = GlobalsBinding(
+        accessed_globals, route_data, route_computed_metadata, globals_mode
+    ).context
+
+    def wrapped_view(*args, **kwargs):
+        g._CONDUCTOR = g_context = context()
+        return _streamed(renderer_func(*args, **kwargs), g_context)
+    return wrapped_view
 
+
+# Used like _wrap_renderer for routes with URL parameters in their renderer or
+# template paths. resolve gets the view args and returns the renderer for the
+# request and the resolved paths, which rvar<s>() return in place of the
+# route data values. See dynamic._path_resolver.
+def _wrap_dynamic_renderer(
+        resolve: Callable[[Dict[str, Any]], Tuple[Callable, Dict[str, Any]]],
+        route_data: Dict[str, Any],
+        accessed_globals: List[str],
+        route_computed_metadata: Dict[str, Any],
+        globals_mode: str = 'live'
 ) -> callable:
-    import __main__
+    context = GlobalsBinding(
+        accessed_globals, route_data, route_computed_metadata, globals_mode
+    ).context
 
     def wrapped_view(*args, **kwargs):
-        GLOBALS = {}
-        for name in accessed_globals:
-            # Fetch the current value of the global variable
-            value = getattr(__main__, name, None)
-            GLOBALS[name] = value
-        g._GLOBALS = GLOBALS
-        g._ROUTEDATA = route_data
-        g._ROUTEMETA = route_computed_metadata
-        return renderer_func(*args, **kwargs)
+        renderer_func, paths = resolve(kwargs)
+        base = context()
+        g._CONDUCTOR = g_context = RouteContext(
+            base.globals, ChainMap(paths, base.route_data), base.route_meta
+        )
+        return _streamed(renderer_func(*args, **kwargs), g_context)
     return wrapped_view
+
+
+# Used to stream the generators returned by renderers. Streamed responses run
+# after the view returned, so the request context and the Conductor slot are
+# kept alive until they end.
+def _streamed(rv: Any, g_context: Any) -> Any:
+    if isinstance(rv, types.GeneratorType):
+        return Response(stream_with_context(_keep_context(rv, g_context)))
+    return rv
+
+
+# Used to restore the Conductor `g` slot around a streamed renderer. Before
+# Flask 3.1, stream_with_context pushes a fresh app context, and so a fresh g.
+def _keep_context(generator: Iterator, g_context: Any) -> Iterator:
+    g._CONDUCTOR = g_context
+    yield from generator
+
+
+# Used to render a template as a stream of strings for `"$stream": true`
+# routes. flask.stream_template only exists since Flask 2.2.
+def _stream_template(template_name: str, **context: Any) -> Iterator[str]:
+    try:
+        from flask import stream_template
+    except ImportError:
+        app = current_app._get_current_object()
+        app.update_template_context(context)
+        template = app.jinja_env.get_or_select_template(template_name)
+        return template.generate(context)
+    return stream_template(template_name, **context)
+
+
+# Used to defer building a wrapped renderer until its route is first requested.
+# The build runs once, even if the first requests arrive concurrently. If the
+# build fails, the error is raised and the next request tries again.
+def _lazy_view(build_view: callable) -> callable:
+    lock = threading.Lock()
+    view = None
+
+    def lazy_view(*args, **kwargs):
+        nonlocal view
+        if view is None:
+            with lock:
+                if view is None:
+                    view = build_view()
+        return view(*args, **kwargs)
+    return lazy_view
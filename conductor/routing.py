@@ -1,13 +1,51 @@
-from conductor import (
-    _CONDUCTOR_ROUTER_VERSION,
-    _VALID_ENDPOINT_CHARS
+from .compiler import (
+    load_snapshot,
+    parse_router,
+    router_hash,
+    snapshot_path
+)
+from .rendering import (
+    _wrap_dynamic_renderer,
+    _wrap_renderer,
+    _lazy_view,
+    _stream_template
 )
-from .rendering import _wrap_renderer
 from .accessors import rvar
+from .bindings import _GLOBALS_MODES
+from .building import _prebuilt_view, load_manifest
+from .caching import LRUCache, _cache_view
+from .coalescing import _coalesced_view
+from .dispatch import install_fast_map
+from .errors import NegativeLookupCache, _error_view, _static_error_view
+from .dynamic import RendererCache, _path_resolver, is_dynamic_path
+from .files import _file_view
+from .layering import router_root
+from .metrics import (
+    MetricsRegistry,
+    _metered_view,
+    _metrics_endpoint,
+    route_labels
+)
+from .limiting import ConcurrencyLimiter, _limited_view
+from .profiling import RouteProfiler, _profiled_view
+from .registry import RendererRegistry
+from .templating import (
+    install_bytecode_cache,
+    install_fragment_cache,
+    install_template_root,
+    precompile_templates
+)
+from .reloading import (
+    RouterWatcher,
+    diff_routes,
+    set_error_handler,
+    swap_url_rules
+)
 
-import importlib.util
-import json
 import os
+import threading
+import warnings
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 from flask import Flask, render_template
 
@@ -20,6 +58,62 @@ class Router:
     variables defined in the router file.
     Args:
         rtr_file (str): The path to the router file in JSON format.
+        registry (RendererRegistry, optional): The registry used to import
+        python-renderer modules. Routers sharing a registry share imported
+        modules. Default is a new registry per router.
+        lazy (bool, optional): If True, renderers are only imported and wrapped
+        when their route is first requested. Default False.
+        snapshot (str, optional): The path of the compiled snapshot of the
+        router file. It is only used if it is fresh, meaning it was compiled
+        from the current router file contents. Default is the path written by
+        `python -m conductor compile`.
+        watch (bool, optional): If True, the router file and the imported
+        renderer files are polled for changes once activated, and the router
+        is reloaded in place when they change. Default False.
+        watch_interval (float, optional): Seconds between polls. Default 1.0.
+        globals_mode (str, optional): How $global values are bound. 'live'
+        reads them from the app main module on every request, 'snapshot'
+        reuses a read-only view until conductor.publish_globals() is called.
+        Default 'live'.
+        precompile_templates (bool, optional): If True, every template used by
+        a route is compiled on activation, failing fast on missing or broken
+        templates. Default None, meaning only when not activating lazily.
+        template_cache_dir (str, optional): The directory of the Jinja bytecode
+        cache that is configured on activation, unless the app already has
+        one. False disables the cache, so activation writes nothing there.
+        Default is the __conductor__/jinja directory next to the router file.
+        prebuilt_dir (str, optional): A directory written by build_static() or
+        `python -m conductor build`. Routes with a prebuilt file serve it
+        directly instead of invoking their renderer. The directory is ignored
+        if it was built from different router file, renderer, template or
+        data source contents. Default None.
+        metrics (bool, optional): If True, every route view records request
+        counts, error counts and a latency histogram, which are served in the
+        Prometheus text format at metrics_path. Default False.
+        metrics_path (str, optional): The URL of the metrics endpoint.
+        Default '/_conductor/metrics'.
+        profile_dir (str, optional): The directory that routes with a $profile
+        option write their aggregated cProfile stats to. Default is the
+        __conductor__/profiles directory next to the router file.
+        fast_dispatch (bool, optional): If True, the app's URL map is replaced
+        on activation by a dispatch.FastMap, which matches literal routes with
+        a hash table and simple parameterized routes with a segment trie, and
+        leaves the rest to werkzeug. It replaces the URL map class of the
+        whole app, including rules Conductor does not own. Default False.
+        renderer_cache_size (int, optional): The maximum number of renderer
+        modules of renderer paths with URL parameters, like
+        "/software/<name>/renderer.py", that are kept imported. Default 256.
+        negative_cache_size (int, optional): The maximum number of unknown
+        paths whose 404 response is remembered and answered in front of Flask,
+        see errors.NegativeLookupCache. Only 404s of a `$static` error route
+        or of Flask's default handler are remembered. Default 0, disabled.
+        negative_cache_ttl (float, optional): Seconds an unknown path is
+        remembered. Default 60.
+        fragment_cache_entries (int, optional): The maximum number of
+        fragments the `{% cache key, ttl %}` template block keeps, see
+        fragments.FragmentCacheExtension. Default 1024.
+        fragment_cache_size (int, optional): The maximum total size of those
+        fragments in characters. Default 8 MiB.
     Raises:
         FileNotFoundError: If the router file does not exist.
         ValueError: If the router file is not a valid JSON file or if the
@@ -30,8 +124,31 @@ class Router:
         router = Router('path/to/router.json')
         router.activate_router(app)  # app is a Flask object instance
     """
-    def __init__(self, rtr_file: str):
+    def __init__(
+        self, rtr_file: str, registry: Optional[RendererRegistry] = None,
+        lazy: bool = False, snapshot: Optional[str] = None,
+        watch: bool = False, watch_interval: float = 1.0,
+        globals_mode: str = 'live',
+        precompile_templates: Optional[bool] = None,
+        template_cache_dir: Union[str, bool, None] = None,
+        prebuilt_dir: Optional[str] = None,
+        metrics: bool = False, metrics_path: str = '/_conductor/metrics',
+        profile_dir: Optional[str] = None, fast_dispatch: bool = False,
+        renderer_cache_size: int = 256, negative_cache_size: int = 0,
+        negative_cache_ttl: float = 60.0,
+        fragment_cache_entries: int = 1024,
+        fragment_cache_size: int = 8 * 1024 * 1024
+    ):
         self.rtr_file = rtr_file
+        self.lazy = lazy
+        self.globals_mode = globals_mode
+        if globals_mode not in _GLOBALS_MODES:
+            raise ValueError(
+                f"Invalid globals mode {globals_mode}. "
+                f"Allowed modes are {', '.join(_GLOBALS_MODES)}."
+            )
+        # Each renderer file is imported once and shared across routes
+        self.registry = registry if registry else RendererRegistry()
         # Throw all the error handling here to avoid cluttering the main logic
         if not os.path.exists(self.rtr_file):
             raise FileNotFoundError(
@@ -54,216 +171,542 @@ class Router:
                 " Ensure you entered a valid path to the router file."
             )
 
-        with open(self.rtr_file, 'r') as router_file:
-            self.routercontent = json.load(router_file)
+        with open(self.rtr_file, 'rb') as router_file:
+            content = router_file.read()
 
-        self.version = self.routercontent.get('$version', "unset")
+        # Use the compiled snapshot when it is fresh, otherwise parse and
+        # validate the router file (see `python -m conductor compile`).
+        self.snapshot_file = snapshot if snapshot else snapshot_path(rtr_file)
+        compiled, self.from_snapshot = self._compile(content)
 
-        # Versioning checks
-        if self.version != _CONDUCTOR_ROUTER_VERSION:
-            raise ValueError(
-                f"Router file version {self.version} does not match current"
-                f" Conductor Router version {_CONDUCTOR_ROUTER_VERSION}. "
-                "Please update the router file or the Conductor framework."
+        self.version = compiled['version']
+        self.content_hash = router_hash(content)
+        # The validated, normalized route table in router file order
+        self.routes: List[Dict[str, Any]] = compiled['routes']
+        self.routercontent = {
+            route_cmeta['raw_route']: route_cmeta['route_data']
+            for route_cmeta in self.routes
+        }
+
+        # Defaults are not required, but are incredibly useful. They and the
+        # overrides are already applied to the route data of every route.
+        self.defaults = compiled['defaults']
+        self.overrides = compiled['overrides']
+        self.template_root = compiled['template_root']
+
+        self.precompile_templates = precompile_templates
+        if template_cache_dir is None or template_cache_dir is True:
+            template_cache_dir = os.path.join(
+                os.path.dirname(self.snapshot_file), 'jinja'
             )
+        self.template_cache_dir = template_cache_dir
+        # Compile time in seconds per template, filled in on activation
+        self.template_times: Dict[str, float] = {}
+
+        # Prebuilt files by raw route, see building.build_static
+        self.prebuilt_dir = prebuilt_dir
+        self.prebuilt: Dict[str, Dict[str, Any]] = {}
+        if prebuilt_dir:
+            manifest = load_manifest(
+                prebuilt_dir, self.content_hash, router_root(self.rtr_file)
+            )
+            if manifest is None:
+                warnings.warn(
+                    f"Prebuilt directory {prebuilt_dir} is missing a manifest "
+                    f"or was built from a different router file, renderers "
+                    f"or templates. Rebuild it to serve prebuilt files."
+                )
+            else:
+                self.prebuilt = manifest['routes']
 
-        # Defaults are not required, but are incredibly useful
-        self.defaults = self.routercontent.get('defaults', {})
-        # Not yet implemented, but will be heavily used in the future
+        # Per-route request metrics, see metrics.MetricsRegistry
+        self.metrics = MetricsRegistry() if metrics else None
+        self.metrics_path = metrics_path
 
-    def activate_router(self, app: Flask) -> None:
+        # Request profilers of routes with a $profile option, by raw route
+        if not profile_dir:
+            profile_dir = os.path.join(
+                os.path.dirname(self.snapshot_file), 'profiles'
+            )
+        self.profile_dir = profile_dir
+        self.profilers: Dict[str, RouteProfiler] = {}
+        # Concurrency limiters of routes with a $max_concurrency, by raw route
+        self.limiters: Dict[str, ConcurrencyLimiter] = {}
+
+        self.fast_dispatch = fast_dispatch
+
+        # Renderers of renderer paths with URL parameters, imported on use
+        self.dynamic_renderers = RendererCache(max_entries=renderer_cache_size)
+
+        # Installed in front of the app on activation, cleared on reload
+        self.negative_cache_size = negative_cache_size
+        self.negative_cache_ttl = negative_cache_ttl
+        self.negative_lookups: Optional[NegativeLookupCache] = None
+
+        # The fragment cache of the app's templates, set up on activation
+        self.fragment_cache_entries = fragment_cache_entries
+        self.fragment_cache_size = fragment_cache_size
+        self.fragment_cache: Optional[LRUCache] = None
+
+        # Hot reload state, set up when the router is activated
+        self.watch = watch
+        self.watch_interval = watch_interval
+        self.app: Optional[Flask] = None
+        self._active_lazy = self.lazy
+        self._views: Dict[str, Callable] = {}
+        self._reload_lock = threading.Lock()
+        self._watcher: Optional[RouterWatcher] = None
+
+    def _compile(self, content: bytes) -> Tuple[Dict[str, Any], bool]:
+        """
+        Gets the compiled route table for the given router file contents,
+        from the snapshot if it is fresh. Also returns whether the snapshot
+        was used.
+        """
+        compiled = load_snapshot(
+            self.snapshot_file, router_hash(content), self.rtr_file
+        )
+        if compiled is not None:
+            return compiled, True
+        return parse_router(content, self.rtr_file), False
+
+    def activate_router(
+        self, app: Flask, lazy: Optional[bool] = None
+    ) -> None:
         """
         Activates the router by creating all necessary routes.
+        If lazy is True, URL rules and error handlers are registered with a
+        stub that imports and wraps the real renderer on the first request.
+        If lazy is None, the mode given to the Router is used.
+        If the router watches its file, the watcher is started here.
         """
-        # Remove metadata keys
-        self.routercontent = {
-            k: v for k, v in self.routercontent.items()
-            if not k.startswith('$')
-            and not k.startswith('#')
-        }
+        lazy = self.lazy if lazy is None else lazy
 
-        for raw_route, route_data in self.routercontent.items():
-            if not isinstance(route_data, dict):
-                raise ValueError(
-                    f"Invalid route data for {raw_route}. "
-                    f"Expected a dictionary, got {type(route_data).__name__}."
+        if self.fast_dispatch:
+            install_fast_map(app)
+        if self.template_cache_dir:
+            install_bytecode_cache(app, self.template_cache_dir)
+        if self.template_root:
+            install_template_root(app, self.template_root)
+        self.fragment_cache = install_fragment_cache(
+            app, self.fragment_cache_entries, self.fragment_cache_size
+        )
+        if self._precompiles(lazy):
+            self.template_times.update(precompile_templates(
+                app, [
+                    route_cmeta for route_cmeta in self.routes
+                    if route_cmeta['raw_route'] not in self.prebuilt
+                ]
+            ))
+
+        if self.negative_cache_size and self.negative_lookups is None:
+            self.negative_lookups = NegativeLookupCache(
+                app, self.negative_cache_size, self.negative_cache_ttl
+            )
+
+        for route_cmeta in self.routes:
+            wrapped_func = self._build_view(route_cmeta, lazy, app=app)
+            self._views[route_cmeta['raw_route']] = wrapped_func
+
+            if route_cmeta['url_rule'] is None:
+                # Handle error routes
+                app.errorhandler(route_cmeta['error_code'])(wrapped_func)
+                continue
+
+            endpoint = route_cmeta['endpoint']
+            app.add_url_rule(
+                rule=route_cmeta['url_rule'],
+                endpoint=endpoint if endpoint else None,
+                view_func=wrapped_func,
+                methods=route_cmeta['methods']
+            )
+
+        if self.metrics is not None:
+            app.add_url_rule(
+                rule=self.metrics_path,
+                endpoint='_conductor_metrics',
+                view_func=_metrics_endpoint(self.metrics),
+                methods=['GET']
+            )
+
+        self.app = app
+        self._active_lazy = lazy
+        if self.watch:
+            self.start_watching()
+
+    def reload(self) -> Dict[str, List[str]]:
+        """
+        Reloads the router file of an activated router without restarting the
+        app. Only routes that were added, removed or changed are touched, and
+        only renderer modules that changed on disk are imported again.
+        Unchanged routes keep their view functions and any warm state.
+        All new views are built before anything is applied, so a broken router
+        or renderer file raises and leaves the active routes untouched.
+        Returns the raw routes that were added, removed and changed.
+        Raises:
+            RuntimeError: If the router has not been activated yet.
+        """
+        if self.app is None:
+            raise RuntimeError(
+                "Router must be activated before it can be reloaded."
+            )
+        app = self.app
+
+        with self._reload_lock:
+            with open(self.rtr_file, 'rb') as router_file:
+                content = router_file.read()
+            content_hash = router_hash(content)
+            changed_renderers = self.registry.changed_modules()
+            if content_hash == self.content_hash and not changed_renderers:
+                return {'added': [], 'removed': [], 'changed': []}
+
+            compiled, _ = self._compile(content)
+            old_routes = {c['raw_route']: c for c in self.routes}
+            new_routes = {c['raw_route']: c for c in compiled['routes']}
+            diff = diff_routes(old_routes, new_routes, changed_renderers)
+
+            for abs_path in changed_renderers:
+                self.registry.forget(abs_path)
+            try:
+                built = {
+                    raw_route: self._build_view(
+                        new_routes[raw_route], self._active_lazy,
+                        prebuilt=False, app=app
+                    )
+                    for raw_route in diff['added'] + diff['changed']
+                }
+            except BaseException:
+                # Report the renderers again, so fixing them is picked up
+                for abs_path in changed_renderers:
+                    self.registry.mark_changed(abs_path)
+                raise
+            if compiled['template_root']:
+                install_template_root(app, compiled['template_root'])
+            if self._precompiles(self._active_lazy):
+                self.template_times.update(precompile_templates(
+                    app, [new_routes[r] for r in built]
+                ))
+
+            # Error handlers
+            for raw_route in diff['removed']:
+                if old_routes[raw_route]['url_rule'] is None:
+                    set_error_handler(
+                        app, old_routes[raw_route]['error_code'], None
+                    )
+            for raw_route, view in built.items():
+                if new_routes[raw_route]['url_rule'] is None:
+                    set_error_handler(
+                        app, new_routes[raw_route]['error_code'], view
+                    )
+
+            # URL rules, the URL map is only rebuilt if rules changed
+            rule_routes = [
+                r for r in diff['added'] + diff['rules']
+                if new_routes[r]['url_rule'] is not None
+            ]
+            removed_endpoints = [
+                old_routes[r]['endpoint']
+                for r in diff['removed'] + diff['rules']
+                if old_routes[r]['url_rule'] is not None
+            ]
+            if rule_routes or removed_endpoints:
+                swap_url_rules(
+                    app, removed_endpoints,
+                    [new_routes[r] for r in rule_routes],
+                    {new_routes[r]['endpoint']: built[r] for r in rule_routes}
                 )
+                # Paths that matched nothing may match the new rules
+                if self.negative_lookups is not None:
+                    self.negative_lookups.clear()
+            # Cached fragments may come from changed globals or templates
+            if self.fragment_cache is not None:
+                self.fragment_cache.clear()
+            for raw_route in diff['changed']:
+                route_cmeta = new_routes[raw_route]
+                if (
+                    raw_route not in diff['rules']
+                    and route_cmeta['url_rule'] is not None
+                ):
+                    app.view_functions[route_cmeta['endpoint']] = (
+                        built[raw_route]
+                    )
 
-            route_cmeta = {
-                'raw_route': raw_route,
-                'route_data': route_data,
-                'route': None,
-                'error_code': None,
-                'methods': None,
-                'globals_list': None,
-                'endpoint': None,
-                'template': None,
-                'renderer': None
+            # Swap the route table, rebuilt routes no longer use their
+            # prebuilt files since those may be outdated
+            for raw_route in built:
+                self.prebuilt.pop(raw_route, None)
+            views = {
+                raw_route: built.get(raw_route, self._views.get(raw_route))
+                for raw_route in new_routes
+            }
+            self._views = views
+            self.routes = compiled['routes']
+            self.routercontent = {
+                raw_route: route_cmeta['route_data']
+                for raw_route, route_cmeta in new_routes.items()
             }
+            self.version = compiled['version']
+            self.defaults = compiled['defaults']
+            self.overrides = compiled['overrides']
+            self.template_root = compiled['template_root']
+            self.content_hash = content_hash
 
-            if raw_route.startswith('@'):
-                if raw_route.startswith('@error'):
-                    # Handle error routes
-                    error_code = int(raw_route.split('/')[1])
-                    methods = route_data.get('$methods', ['GET'])
-                    globals_list = route_data.get('$global', [])
-                    endpoint = route_data.get('$endpointurl', None)
-                    template = route_data.get('template')
-                    renderer = route_data.get('python-renderer')
-
-                    route_cmeta['route'] = raw_route
-                    route_cmeta['error_code'] = error_code
-                    route_cmeta['methods'] = methods
-                    route_cmeta['globals_list'] = globals_list
-                    route_cmeta['endpoint'] = endpoint
-                    route_cmeta['template'] = template
-                    route_cmeta['renderer'] = renderer
-
-                    if not template and not renderer:
-                        raise ValueError(
-                            f"Error route {raw_route} must have either a "
-                            f"template or a python-renderer defined."
-                        )
-
-                    # Validate methods
-                    if not isinstance(methods, list):
-                        raise ValueError(
-                            f"Invalid methods for error route {raw_route}. "
-                            f"Expected a list, got {type(methods).__name__}."
-                        )
-                    for method in methods:
-                        if method not in ['GET', 'POST', 'PUT', 'DELETE']:
-                            raise ValueError(
-                                f"Invalid method for error route {raw_route}. "
-                                f"Allowed methods are GET, POST, PUT, DELETE."
-                            )
-
-                    view_func = None
-                    if renderer:
-                        abs_path = os.path.abspath(renderer)
-                        if not os.path.exists(abs_path):
-                            raise FileNotFoundError(
-                                f"Renderer file {renderer} not found. "
-                                f"Ensure the path is correct."
-                            )
-                        spec = importlib.util.spec_from_file_location(
-                            "renderer_module", abs_path
-                        )
-                        if spec is None or spec.loader is None:
-                            raise ImportError(
-                                f"Could not load spec for renderer {renderer}."
-                            )
-                        module = importlib.util.module_from_spec(spec)
-                        spec.loader.exec_module(module)
-                        for attr_name in dir(module):
-                            attr = getattr(module, attr_name)
-                            if (
-                                callable(attr)
-                                and getattr(
-                                    attr,
-                                    '_is_conductor_renderer',
-                                    False
-                                )
-                            ):
-                                view_func = attr
-                                break
-                        if not view_func:
-                            raise ValueError(
-                                f"No @renderer found in renderer {renderer} "
-                                f"for error route {raw_route}."
-                            )
-
-                    wrapped_func = _wrap_renderer(
-                        view_func if view_func
-                        else lambda: render_template(rvar('template')),
-                        route_data, globals_list, route_cmeta
-                    )
+        app.logger.info(
+            "Reloaded router %s: %d added, %d removed, %d changed.",
+            self.rtr_file, len(diff['added']), len(diff['removed']),
+            len(diff['changed'])
+        )
+        return {k: diff[k] for k in ('added', 'removed', 'changed')}
 
-                    app.errorhandler(error_code)(wrapped_func)
+    def start_watching(self) -> None:
+        """
+        Starts polling the router file and the imported renderer files for
+        changes, reloading the router whenever one of them changed.
+        """
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        app = self.app
 
-                    continue  # Skip to next route after handling error
+        def on_error(error: Exception) -> None:
+            app.logger.error(
+                "Reloading router %s failed, keeping the active routes: %s",
+                self.rtr_file, error
+            )
 
-            # Route and endpoint
-            route = '/' + '/'.join(raw_route.split('/')[1:])
-            methods = route_data.get('$methods', ['GET'])
-            globals_list = route_data.get('$global', [])
-            endpoint = route_data.get(
-                '$endpointurl',
-                ''.join(
-                    c if c in _VALID_ENDPOINT_CHARS else '_' for c in raw_route
-                )
+        self._watcher = RouterWatcher(
+            self.rtr_file, self.registry, self.reload, on_error,
+            self.watch_interval
+        )
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        """
+        Stops polling the router file for changes, waiting for a reload in
+        progress to finish.
+        """
+        watcher = self._watcher
+        if watcher is not None:
+            watcher.stop()
+            self._watcher = None
+            if watcher is not threading.current_thread():
+                watcher.join()
+
+    def set_profiling(
+        self, raw_route: str, enabled: bool = True,
+        rate: Optional[float] = None
+    ) -> RouteProfiler:
+        """
+        Turns profiling of a route on or off at runtime, optionally changing
+        its sample rate. Only routes with a $profile option can be profiled,
+        `"$profile": {"enabled": false}` declares a route that is only
+        profiled once turned on here. Returns the route's profiler.
+        Raises:
+            ValueError: If the route has no $profile option.
+        Usage:
+            router.set_profiling('/search', rate=0.1)
+            router.set_profiling('/search', enabled=False)
+        """
+        profiler = self.profilers.get(raw_route)
+        if profiler is None:
+            raise ValueError(
+                f"Route {raw_route} cannot be profiled. "
+                f"Add a $profile option to it in the router file."
             )
-            template = route_data.get('template')
-            renderer = route_data.get('python-renderer')
-
-            route_cmeta['route'] = raw_route
-            route_cmeta['error_code'] = 200
-            route_cmeta['methods'] = methods
-            route_cmeta['globals_list'] = globals_list
-            route_cmeta['endpoint'] = endpoint
-            route_cmeta['template'] = template
-            route_cmeta['renderer'] = renderer
-
-            if not template and not renderer:
+        if rate is not None:
+            if not 0 <= rate <= 1:
                 raise ValueError(
-                    f"Route {raw_route} must have either a template "
-                    f"or a python-renderer defined."
+                    f"Invalid profile rate {rate}. "
+                    f"Expected a number between 0 and 1."
                 )
+            profiler.rate = rate
+        profiler.enabled = enabled
+        return profiler
 
-            # Validate methods
-            if not isinstance(methods, list):
-                raise ValueError(
-                    f"Invalid methods for route {raw_route}. "
-                    f"Expected a list, got {type(methods).__name__}."
+    def flush_profiles(self) -> Dict[str, str]:
+        """
+        Writes the aggregated stats of all profiled routes now. Returns the
+        written stats file by raw route.
+        """
+        paths = {}
+        for raw_route, profiler in list(self.profilers.items()):
+            path = profiler.flush()
+            if path:
+                paths[raw_route] = path
+        return paths
+
+    def _profiler(self, route_cmeta: Dict[str, Any]) -> RouteProfiler:
+        """
+        Gets the profiler of a route. A route rebuilt by a hot reload keeps
+        its profiler and stats, unless its $profile option changed.
+        """
+        raw_route = route_cmeta['raw_route']
+        config = route_cmeta['profile']
+        profiler = self.profilers.get(raw_route)
+        if profiler is None or profiler.config != config:
+            name = route_cmeta['endpoint'] or (
+                f"error_{route_cmeta['error_code']}"
+            )
+            profiler = RouteProfiler(name, self.profile_dir, config)
+            self.profilers[raw_route] = profiler
+        return profiler
+
+    def _limiter(self, route_cmeta: Dict[str, Any]) -> ConcurrencyLimiter:
+        """
+        Gets the concurrency limiter of a route. A route rebuilt by a hot
+        reload keeps its limiter, unless its limit changed, since requests
+        admitted by the old view still hold slots of it.
+        """
+        raw_route = route_cmeta['raw_route']
+        config = route_cmeta['limit']
+        limiter = self.limiters.get(raw_route)
+        if limiter is None or limiter.config != config:
+            limiter = ConcurrencyLimiter(config)
+            self.limiters[raw_route] = limiter
+            if self.metrics is not None:
+                self.metrics.add_limiter(route_labels(route_cmeta), limiter)
+        return limiter
+
+    def _precompiles(self, lazy: bool) -> bool:
+        """
+        Whether templates are compiled on activation and reload.
+        """
+        if self.precompile_templates is None:
+            return not lazy
+        return self.precompile_templates
+
+    def _build_view(
+        self, route_cmeta: Dict[str, Any], lazy: bool, prebuilt: bool = True,
+        app: Optional[Flask] = None
+    ) -> Callable:
+        """
+        Builds the view function of a route, wrapped with the stages that
+        apply to every kind of route view, such as metrics.
+        """
+        view = self._build_route_view(route_cmeta, lazy, prebuilt, app)
+        if self.metrics is not None:
+            view = _metered_view(
+                view, self.metrics.route(route_labels(route_cmeta))
+            )
+        return view
+
+    def _build_route_view(
+        self, route_cmeta: Dict[str, Any], lazy: bool, prebuilt: bool = True,
+        app: Optional[Flask] = None
+    ) -> Callable:
+        """
+        Builds the wrapped view function for a route. In lazy mode only the
+        existence of the renderer file is checked here, the import and the
+        wrapping happen on the first request.
+        Routes with a prebuilt file serve it without touching their renderer,
+        unless prebuilt is False. File routes serve their directory directly.
+        Error routes answer with their error code, and $static error routes
+        are rendered once, with app, on activation or when lazy on first use.
+        """
+        entry = self.prebuilt.get(route_cmeta['raw_route'])
+        if prebuilt and entry:
+            return _prebuilt_view(self.prebuilt_dir, entry)
+
+        if route_cmeta['file']:
+            directory = os.path.abspath(route_cmeta['file']['directory'])
+            if not os.path.isdir(directory):
+                raise FileNotFoundError(
+                    f"Directory {directory} of file route "
+                    f"{route_cmeta['raw_route']} not found. "
+                    f"Ensure the path is correct."
                 )
-            for method in methods:
-                if method not in ['GET', 'POST', 'PUT', 'DELETE']:
-                    raise ValueError(
-                        f"Invalid method for route {raw_route}. "
-                        f"Allowed methods are GET, POST, PUT, DELETE."
-                    )
+            return _file_view(directory, route_cmeta['file'])
 
-            # Renderer logic
+        dynamic = route_cmeta['dynamic']
+        # Dynamic renderers are resolved per request, see dynamic.py
+        renderer = (
+            None if 'python-renderer' in dynamic else route_cmeta['renderer']
+        )
+        route_kind = 'route' if route_cmeta['url_rule'] else 'error route'
+
+        # Data sources are loaded on first use by rdata(), check them here so
+        # a missing file fails on activation like a missing renderer does
+        for name, source in route_cmeta['data_sources'].items():
+            if is_dynamic_path(source['path']):
+                continue
+            if not os.path.exists(os.path.abspath(source['path'])):
+                raise FileNotFoundError(
+                    f"File {source['path']} of data source {name} of "
+                    f"{route_kind} {route_cmeta['raw_route']} not found. "
+                    f"Ensure the path is correct."
+                )
+
+        def build_view() -> Callable:
             view_func = None
             if renderer:
-                abs_path = os.path.abspath(renderer)
-                if not os.path.exists(abs_path):
-                    raise FileNotFoundError(
-                        f"Renderer file {renderer} not found. "
-                        f"Ensure the path is correct."
-                    )
-                spec = importlib.util.spec_from_file_location(
-                    "renderer_module", abs_path
+                view_func = self._load_renderer(
+                    renderer, route_cmeta['raw_route'], route_kind
                 )
-                if spec is None or spec.loader is None:
-                    raise ImportError(
-                        f"Could not load spec for renderer {renderer}."
-                    )
-                module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(module)
-                for attr_name in dir(module):
-                    attr = getattr(module, attr_name)
-                    if (
-                        callable(attr)
-                        and getattr(attr, '_is_conductor_renderer', False)
-                    ):
-                        view_func = attr
-                        break
-                if not view_func:
-                    raise ValueError(
-                        f"No @renderer found in renderer {renderer} "
-                        f"for route {raw_route}."
-                    )
-
-            wrapped_func = _wrap_renderer(
-                view_func if view_func
-                else lambda: render_template(rvar('template')),
-                route_data, globals_list, route_cmeta
+            # Generators returned by renderers are always streamed, $stream
+            # streams the template of template-only routes
+            render = (
+                _stream_template if route_cmeta['stream'] else render_template
             )
+            if dynamic:
+                view = _wrap_dynamic_renderer(
+                    _path_resolver(
+                        dynamic, self.dynamic_renderers, view_func, render
+                    ),
+                    route_cmeta['route_data'], route_cmeta['globals_list'],
+                    route_cmeta, self.globals_mode
+                )
+            else:
+                view = _wrap_renderer(
+                    view_func if view_func
+                    else lambda *args, **kwargs: render(rvar('template')),
+                    route_cmeta['route_data'], route_cmeta['globals_list'],
+                    route_cmeta, self.globals_mode
+                )
+            if route_cmeta['profile']:
+                view = _profiled_view(view, self._profiler(route_cmeta))
+            # Inside the cache, so only cache misses are coalesced
+            if route_cmeta['coalesce']:
+                view = _coalesced_view(view, route_cmeta['coalesce'])
+            # Outside of coalescing, waiting followers hold a worker too
+            if route_cmeta['limit']:
+                view = _limited_view(view, self._limiter(route_cmeta))
+            if route_cmeta['cache']:
+                view = _cache_view(view, route_cmeta, route_cmeta['cache'])
+            return view
 
-            app.add_url_rule(
-                rule=route,
-                endpoint=endpoint if endpoint else None,
-                view_func=wrapped_func,
-                methods=methods
+        if not lazy:
+            view = build_view()
+        else:
+            # Still fail fast on missing files, it only costs a stat call
+            if renderer and not os.path.exists(os.path.abspath(renderer)):
+                raise FileNotFoundError(
+                    f"Renderer file {renderer} not found. "
+                    f"Ensure the path is correct."
+                )
+            view = _lazy_view(build_view)
+
+        if route_cmeta['url_rule'] is None:
+            view = _error_view(view, route_cmeta['error_code'])
+            if route_cmeta['static']:
+                view = _static_error_view(
+                    app, view, route_cmeta['error_code'], render_now=not lazy
+                )
+        return view
+
+    def _load_renderer(
+        self, renderer: str, raw_route: str, route_kind: str
+    ) -> Callable:
+        """
+        Gets the @renderer callable from the renderer file through the
+        registry, so every file is only imported and scanned once.
+        Raises:
+            FileNotFoundError: If the renderer file does not exist.
+            ImportError: If the renderer file cannot be imported.
+            ValueError: If the renderer file has no @renderer.
+        """
+        view_func = self.registry.get_renderer(renderer)
+        if not view_func:
+            raise ValueError(
+                f"No @renderer found in renderer {renderer} "
+                f"for {route_kind} {raw_route}."
             )
+        return view_func
@@ -0,0 +1,172 @@
+import gc
+import os
+import signal
+import socket
+import threading
+import time
+from typing import Dict, Optional
+
+from flask import Flask
+from werkzeug.serving import make_server
+
+
+class PreforkStarter:
+    """
+    A starter for Conductor.start that serves the app with several worker
+    processes. The router is activated once in the parent process, which then
+    forks the workers, so route tables, imported renderers and compiled
+    templates are shared copy-on-write. Workers that die are restarted.
+    On SIGTERM or SIGINT the workers stop accepting connections, finish their
+    in-flight requests, run the Conductor on_shutdown functions and exit.
+    Args:
+        workers (int, optional): The number of worker processes. Default is the
+        number of CPUs.
+        threaded (bool, optional): Whether every worker handles requests in
+        threads. Default True.
+        reuse_port (bool, optional): If True, every worker binds its own socket
+        with SO_REUSEPORT and the kernel balances connections between them.
+        Otherwise the parent binds one socket that the workers inherit.
+        Default False.
+        drain_timeout (float, optional): Seconds the workers get to finish
+        their in-flight requests before they are killed. Default 30.
+        backlog (int, optional): The listen backlog of the socket. Default 128.
+    Raises:
+        RuntimeError: If the platform does not support fork.
+    Usage:
+        conductor = Conductor(
+            app, router, config, host='0.0.0.0', port=8000,
+            starter=PreforkStarter(workers=4)
+        )
+        conductor.start()
+    """
+    # Tells Conductor.start to leave the threads to the workers
+    forks_workers = True
+
+    def __init__(
+        self, workers: Optional[int] = None, threaded: bool = True,
+        reuse_port: bool = False, drain_timeout: float = 30.0,
+        backlog: int = 128
+    ) -> None:
+        if not hasattr(os, 'fork'):
+            raise RuntimeError(
+                "PreforkStarter needs os.fork, which this platform lacks."
+            )
+        self.workers = workers if workers else (os.cpu_count() or 1)
+        self.threaded = threaded
+        self.reuse_port = reuse_port
+        self.drain_timeout = drain_timeout
+        self.backlog = backlog
+        self._children: Dict[int, float] = {}
+        self._stopping = False
+        self._deadline = 0.0
+
+    def _bind(self, host: str, port: int) -> socket.socket:
+        family = socket.AF_INET6 if ':' in host else socket.AF_INET
+        return socket.create_server(
+            (host, port), family=family, backlog=self.backlog,
+            reuse_port=self.reuse_port
+        )
+
+    def __call__(self, app: Flask, host: str, port: int) -> None:
+        sock = None if self.reuse_port else self._bind(host, port)
+        # Objects created so far are shared with the workers. Freezing them
+        # keeps the garbage collector from touching, and so copying, them.
+        gc.collect()
+        gc.freeze()
+
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        app.logger.info(
+            "Conductor prefork parent %d serving on %s:%d with %d workers.",
+            os.getpid(), host, port, self.workers
+        )
+        try:
+            for _ in range(self.workers):
+                self._spawn(app, host, port, sock)
+            self._supervise(app, host, port, sock)
+        finally:
+            if sock is not None:
+                sock.close()
+
+    def _stop(self, signum: int, frame) -> None:
+        if self._stopping:
+            return
+        self._stopping = True
+        self._deadline = time.monotonic() + self.drain_timeout
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _spawn(
+        self, app: Flask, host: str, port: int, sock: Optional[socket.socket]
+    ) -> None:
+        pid = os.fork()
+        if pid:
+            self._children[pid] = time.monotonic()
+            return
+        # In the worker, never return into the parent's code
+        status = 0
+        try:
+            self._serve(app, host, port, sock)
+        except BaseException:
+            app.logger.exception("Conductor worker %d failed.", os.getpid())
+            status = 1
+        finally:
+            os._exit(status)
+
+    def _supervise(
+        self, app: Flask, host: str, port: int, sock: Optional[socket.socket]
+    ) -> None:
+        while self._children:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                if self._stopping and time.monotonic() > self._deadline:
+                    for child in list(self._children):
+                        os.kill(child, signal.SIGKILL)
+                time.sleep(0.1)
+                continue
+            started = self._children.pop(pid, None)
+            if started is None or self._stopping:
+                continue
+            app.logger.warning(
+                "Conductor worker %d exited with wait status %d, restarting "
+                "it.", pid, status
+            )
+            # Back off a little if workers die right after starting
+            if time.monotonic() - started < 1.0:
+                time.sleep(1.0)
+            if not self._stopping:
+                self._spawn(app, host, port, sock)
+
+    def _serve(
+        self, app: Flask, host: str, port: int, sock: Optional[socket.socket]
+    ) -> None:
+        self._children = {}
+        if sock is None:
+            sock = self._bind(host, port)
+        server = make_server(
+            host, port, app, threaded=self.threaded, fd=sock.fileno()
+        )
+        if self.threaded:
+            # Track request threads, so closing the server waits for them
+            server.daemon_threads = False
+            server.block_on_close = True
+
+        def drain(signum: int, frame) -> None:
+            # shutdown() waits for serve_forever, so it needs its own thread
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+        signal.signal(signal.SIGTERM, drain)
+        signal.signal(signal.SIGINT, drain)
+
+        conductor = app.extensions.get('conductor')
+        if conductor is not None:
+            conductor._worker_started()
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            if conductor is not None:
+                conductor.shutdown()
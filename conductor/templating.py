@@ -0,0 +1,141 @@
+import os
+import time
+import warnings
+from typing import Any, Dict, Iterable
+
+from flask import Flask
+from jinja2 import (
+    ChoiceLoader,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    PrefixLoader,
+    TemplateNotFound,
+    TemplateSyntaxError
+)
+from jinja2.utils import LRUCache
+
+from .accessors import gvar, rdata, rvar
+from .caching import LRUCache as FragmentLRUCache
+from .fragments import FragmentCacheExtension
+from .layering import TEMPLATE_PREFIX
+
+
+def install_bytecode_cache(app: Flask, directory: str) -> None:
+    """
+    Configures a filesystem bytecode cache for the app's Jinja environment,
+    so restarted and forked workers load compiled templates from disk instead
+    of compiling them again. A bytecode cache configured by the app is kept.
+    If the directory cannot be created or written to, such as on a read-only
+    deploy, a warning is issued and templates are compiled without a cache.
+    """
+    jinja_env = app.jinja_env
+    if jinja_env.bytecode_cache is not None:
+        return
+    try:
+        os.makedirs(directory, exist_ok=True)
+    except OSError as error:
+        warnings.warn(
+            f"Template cache directory {directory} could not be created "
+            f"({error}). Templates are compiled without a bytecode cache."
+        )
+        return
+    if not os.access(directory, os.W_OK):
+        warnings.warn(
+            f"Template cache directory {directory} is not writable. "
+            f"Templates are compiled without a bytecode cache."
+        )
+        return
+    jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+
+
+def install_template_root(app: Flask, directory: str) -> None:
+    """
+    Adds a template loader rooted at directory, the router root, that finds
+    the template names $defaults resolved under TEMPLATE_PREFIX. Other names
+    never reach it, so it does not shadow the app's templates. Replaces the
+    loader of a previously installed directory.
+    """
+    jinja_env = app.jinja_env
+    loader = jinja_env.loader
+    loaders = loader.loaders if isinstance(loader, ChoiceLoader) else [loader]
+    loaders = [
+        existing for existing in loaders
+        if not (
+            isinstance(existing, PrefixLoader)
+            and TEMPLATE_PREFIX in existing.mapping
+        )
+    ]
+    jinja_env.loader = ChoiceLoader([
+        *loaders,
+        PrefixLoader({TEMPLATE_PREFIX: FileSystemLoader(directory)})
+    ])
+
+
+def install_fragment_cache(
+        app: Flask, max_entries: int = 1024, max_size: int = 8 * 1024 * 1024
+) -> FragmentLRUCache:
+    """
+    Adds the `{% cache key, ttl %}` block of fragments.FragmentCacheExtension
+    to the app's Jinja environment, with a cache of the given bounds, and
+    makes rvar, gvar and rdata available to templates for building keys.
+    Installing it again keeps the extension and only replaces the cache.
+    Returns the cache.
+    """
+    jinja_env = app.jinja_env
+    jinja_env.add_extension(FragmentCacheExtension)
+    jinja_env.fragment_cache = FragmentLRUCache(
+        max_entries=max_entries, max_size=max_size
+    )
+    for func in (rvar, gvar, rdata):
+        jinja_env.globals.setdefault(func.__name__, func)
+    return jinja_env.fragment_cache
+
+
+def precompile_templates(
+        app: Flask, routes: Iterable[Dict[str, Any]]
+) -> Dict[str, float]:
+    """
+    Compiles every template referenced by the given routes into the app's
+    Jinja environment, so first requests do not pay for compilation.
+    Templates whose path holds URL parameters are compiled on first use.
+    The environment's template cache is grown if it cannot hold them all.
+    Returns the compile time in seconds per template name.
+    Raises:
+        FileNotFoundError: If a template does not exist.
+        ValueError: If a template has a syntax error.
+    """
+    templates = {}
+    for route_cmeta in routes:
+        template = route_cmeta['template']
+        if 'template' in route_cmeta['dynamic']:
+            continue
+        if template and template not in templates:
+            templates[template] = route_cmeta['raw_route']
+
+    jinja_env = app.jinja_env
+    if (
+        jinja_env.cache is not None
+        and getattr(jinja_env.cache, 'capacity', 0) < len(templates)
+    ):
+        cache = LRUCache(len(templates) * 2)
+        for key, value in jinja_env.cache.items():
+            cache[key] = value
+        jinja_env.cache = cache
+
+    timings = {}
+    for template, raw_route in templates.items():
+        start = time.perf_counter()
+        try:
+            jinja_env.get_template(template)
+        except TemplateNotFound as error:
+            raise FileNotFoundError(
+                f"Template {template} not found for route {raw_route}. "
+                f"Ensure the path is correct."
+            ) from error
+        except TemplateSyntaxError as error:
+            raise ValueError(
+                f"Template {template} for route {raw_route} could not be "
+                f"compiled: {error.message} (line {error.lineno})."
+            ) from error
+        timings[template] = time.perf_counter() - start
+    return timings
@@ -0,0 +1,148 @@
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import Flask
+from werkzeug.routing import BuildError
+
+
+def warmup_config(raw_route: str, config: Any) -> List[Dict[str, Any]]:
+    """
+    Validates the $warmup option of a route. `"$warmup": false` leaves the
+    route out of the warmup, `true` warms a route without URL parameters,
+    and a dictionary of URL parameters, or a list of them, warms the route
+    once for every set of sample args.
+    Returns the sets of args, an empty list if the route is left out.
+    Usage:
+        "@/other/<fruit>": {
+            "python-renderer": "other.py",
+            "$warmup": [{"fruit": "apple"}, {"fruit": "kiwi"}]
+        }
+    Raises:
+        ValueError: If the $warmup option is invalid.
+    """
+    if isinstance(config, bool):
+        return [{}] if config else []
+    samples = [config] if isinstance(config, dict) else config
+    if not isinstance(samples, list):
+        raise ValueError(
+            f"Invalid $warmup for route {raw_route}. "
+            f"Expected true, false, a dictionary or a list of dictionaries, "
+            f"got {type(config).__name__}."
+        )
+    for args in samples:
+        if not isinstance(args, dict) or not all(
+            isinstance(value, (str, int, float))
+            and not isinstance(value, bool)
+            for value in args.values()
+        ):
+            raise ValueError(
+                f"Invalid $warmup args for route {raw_route}. "
+                f"Expected a dictionary of URL parameters to strings or "
+                f"numbers, got {args}."
+            )
+    return samples
+
+
+# Used to get the URLs a route is warmed with. Without a $warmup, GET routes
+# without URL parameters are warmed once.
+def _warmup_urls(
+        app: Flask, route_cmeta: Dict[str, Any], listed: bool
+) -> List[str]:
+    url_rule = route_cmeta['url_rule']
+    samples = route_cmeta['warmup']
+    if samples is None:
+        if 'GET' not in route_cmeta['methods']:
+            samples = []
+        elif '<' not in url_rule:
+            samples = [{}]
+        elif listed:
+            raise ValueError(
+                f"Route {route_cmeta['raw_route']} has URL parameters but no "
+                f"$warmup args to warm it with. Ensure the route has $warmup."
+            )
+        else:
+            samples = []
+
+    adapter = app.url_map.bind('localhost')
+    urls = []
+    for args in samples:
+        try:
+            urls.append(adapter.build(route_cmeta['endpoint'], args))
+        except BuildError:
+            raise ValueError(
+                f"Invalid $warmup args {args} for route "
+                f"{route_cmeta['raw_route']}. "
+                f"Ensure they match the URL parameters of {url_rule}."
+            )
+    return urls
+
+
+def warm_routes(
+        app: Flask, router: Any, raw_routes: Optional[List[str]] = None
+) -> Dict[str, float]:
+    """
+    Sends a GET through the Flask test client to every route of an activated
+    router, so lazy imports, template compilation and the caches of routes
+    and renderers are done before the first real request. By default all GET
+    routes without URL parameters are warmed, and routes with URL parameters
+    once for every set of sample args in their $warmup. raw_routes limits
+    the warmup to the listed routes.
+    Every route is tried, then the ones that raised or answered with a 5xx
+    status are reported together. The router's metrics are reset afterwards,
+    so they only count real requests.
+    Returns the seconds each URL took, by URL.
+    Raises:
+        ValueError: If a listed route does not exist or cannot be warmed.
+        RuntimeError: If any route failed.
+    Usage:
+        router.activate_router(app)
+        warm_routes(app, router)
+    """
+    routes = {
+        route_cmeta['raw_route']: route_cmeta
+        for route_cmeta in router.routes
+        if route_cmeta['url_rule'] is not None
+    }
+    for raw_route in raw_routes or []:
+        if raw_route not in routes:
+            raise ValueError(
+                f"Warmup route {raw_route} is not a route of the router. "
+                f"Ensure the route is correct."
+            )
+    urls = [
+        url
+        for raw_route in (raw_routes or routes)
+        for url in _warmup_urls(
+            app, routes[raw_route], raw_routes is not None
+        )
+    ]
+
+    client = app.test_client()
+    times: Dict[str, float] = {}
+    failures: List[Tuple[str, str]] = []
+    for url in urls:
+        start = time.perf_counter()
+        try:
+            response = client.get(url)
+            response.get_data()
+            response.close()
+        except Exception as error:
+            failures.append((url, f"{type(error).__name__}: {error}"))
+            continue
+        times[url] = time.perf_counter() - start
+        if response.status_code >= 500:
+            failures.append((url, response.status))
+        else:
+            app.logger.info(
+                "Warmed up %s in %.1f ms.", url, times[url] * 1000
+            )
+
+    if router.metrics is not None:
+        router.metrics.reset()
+    if failures:
+        raise RuntimeError(
+            "Warmup failed for "
+            + ', '.join(f"{url} ({reason})" for url, reason in failures)
+            + "."
+        )
+    return times
@@ -0,0 +1,26 @@
+import json
+
+import pytest
+from flask import Flask
+
+from conductor import Router
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """
+    Builds an app from a router definition and template files written to
+    tmp_path. Returns the app and its activated router.
+    """
+    def make_app(routes, templates=None, files=None, **router_kwargs):
+        for name, source in {**(templates or {}), **(files or {})}.items():
+            path = tmp_path / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(source)
+        rtr_file = tmp_path / 'router.json'
+        rtr_file.write_text(json.dumps({'$version': '0.1', **routes}))
+        app = Flask(__name__, template_folder=str(tmp_path))
+        router = Router(str(rtr_file), **router_kwargs)
+        router.activate_router(app)
+        return app, router
+    return make_app
@@ -0,0 +1,82 @@
+import threading
+import time
+
+import pytest
+
+from conductor import Conductor
+from conductor.background import BackgroundExecutor
+
+
+def test_shutdown_honors_timeout_with_a_full_queue():
+    release = threading.Event()
+    executor = BackgroundExecutor(workers=1, queue_size=1)
+    try:
+        executor.submit(release.wait)
+        time.sleep(0.05)
+        executor.submit(lambda: None)
+        start = time.monotonic()
+        assert executor.shutdown(timeout=0.2) is False
+        assert time.monotonic() - start < 1.0
+    finally:
+        release.set()
+
+
+def test_shutdown_runs_queued_calls():
+    done = []
+    executor = BackgroundExecutor(workers=2, queue_size=8)
+    for i in range(6):
+        executor.submit(done.append, i)
+    assert executor.shutdown(timeout=5) is True
+    assert sorted(done) == list(range(6))
+
+
+def test_block_policy_drops_after_block_timeout():
+    release = threading.Event()
+    executor = BackgroundExecutor(workers=1, queue_size=1, block_timeout=0.1)
+    try:
+        executor.submit(release.wait)
+        time.sleep(0.05)
+        executor.submit(lambda: None)
+        start = time.monotonic()
+        assert executor.submit(lambda: None) is False
+        assert time.monotonic() - start < 1.0
+        assert executor.stats['dropped'] == 1
+    finally:
+        release.set()
+        executor.shutdown(timeout=5)
+
+
+def test_invalid_block_timeout():
+    for block_timeout in (0, -1, True, '1'):
+        with pytest.raises(ValueError):
+            BackgroundExecutor(block_timeout=block_timeout)
+
+
+def test_conductor_passes_background_block_timeout(make_app):
+    app, router = make_app({})
+    default = Conductor(app, router, None)
+    assert default.executor.block_timeout == 1.0
+    configured = Conductor(
+        app, router, None, background_block_timeout=None
+    )
+    assert configured.executor.block_timeout is None
+
+
+def test_submit_racing_shutdown_is_not_lost():
+    done = []
+    executor = BackgroundExecutor(workers=1, queue_size=8)
+    executor.start()
+    put = executor._queue.put
+
+    # Lands the put after shutdown has woken and drained the workers
+    def slow_put(*args, **kwargs):
+        time.sleep(0.2)
+        put(*args, **kwargs)
+    executor._queue.put = slow_put
+
+    submitter = threading.Thread(target=executor.submit, args=(done.append, 1))
+    submitter.start()
+    time.sleep(0.05)
+    assert executor.shutdown(timeout=5) is True
+    submitter.join()
+    assert done == [1]
@@ -0,0 +1,104 @@
+import __main__
+import json
+
+import pytest
+
+from conductor import gvar, publish_globals, rvar
+from conductor.bindings import GlobalsBinding, RouteContext
+
+
+_RENDERER = '''import json
+
+from conductor import gvars, renderer, rmvals, rvar
+
+
+@renderer
+def render(*args, **kwargs):
+    return json.dumps({
+        'globals': dict(gvars()),
+        'color': rvar('color'),
+        'route': rmvals()['raw_route']
+    })
+'''
+
+
+def _get(client, path='/'):
+    return json.loads(client.get(path).data)
+
+
+@pytest.fixture
+def fruits(monkeypatch):
+    monkeypatch.setattr(__main__, 'fruits', ['apple'], raising=False)
+    return __main__.fruits
+
+
+def _globals_app(make_app, tmp_path, mode):
+    return make_app({
+        '/': {
+            'python-renderer': str(tmp_path / 'page.py'),
+            '$global': ['fruits'], 'color': 'red'
+        },
+        '/other': {
+            'python-renderer': str(tmp_path / 'page.py'), 'color': 'green'
+        }
+    }, files={'page.py': _RENDERER}, globals_mode=mode)
+
+
+def test_live_globals_follow_rebinding(make_app, tmp_path, fruits):
+    app, router = _globals_app(make_app, tmp_path, 'live')
+    client = app.test_client()
+    assert _get(client) == {
+        'globals': {'fruits': ['apple']}, 'color': 'red', 'route': '/'
+    }
+    __main__.fruits = ['kiwi']
+    assert _get(client)['globals'] == {'fruits': ['kiwi']}
+
+
+def test_snapshot_globals_wait_for_publish(make_app, tmp_path, fruits):
+    app, router = _globals_app(make_app, tmp_path, 'snapshot')
+    client = app.test_client()
+    assert _get(client)['globals'] == {'fruits': ['apple']}
+
+    # Mutations are seen, rebinding only once published
+    fruits.append('fig')
+    assert _get(client)['globals'] == {'fruits': ['apple', 'fig']}
+    __main__.fruits = ['kiwi']
+    assert _get(client)['globals'] == {'fruits': ['apple', 'fig']}
+    publish_globals()
+    assert _get(client)['globals'] == {'fruits': ['kiwi']}
+
+
+def test_route_context_belongs_to_its_request(make_app, tmp_path, fruits):
+    app, router = _globals_app(make_app, tmp_path, 'live')
+    client = app.test_client()
+    assert _get(client)['color'] == 'red'
+    assert _get(client, '/other') == {
+        'globals': {}, 'color': 'green', 'route': '/other'
+    }
+    # Nothing is left behind for code outside of a route
+    with app.test_request_context('/'):
+        assert gvar('fruits') is None
+        assert rvar('color') is None
+
+
+def test_snapshot_context_is_shared_and_read_only(fruits):
+    binding = GlobalsBinding(['fruits'], {}, {}, 'snapshot')
+    context = binding.context()
+    assert isinstance(context, RouteContext)
+    assert binding.context() is context
+    with pytest.raises(TypeError):
+        context.globals['fruits'] = []
+    publish_globals()
+    assert binding.context() is not context
+
+
+def test_live_context_is_fresh_per_request(fruits):
+    binding = GlobalsBinding(['fruits', 'missing'], {}, {})
+    first = binding.context()
+    assert first.globals == {'fruits': ['apple'], 'missing': None}
+    assert binding.context() is not first
+
+
+def test_invalid_globals_mode():
+    with pytest.raises(ValueError):
+        GlobalsBinding([], {}, {}, 'frozen')
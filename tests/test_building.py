@@ -0,0 +1,97 @@
+import json
+import os
+
+import pytest
+
+from conductor.__main__ import main
+from conductor.building import build_static, load_manifest
+from conductor.layering import router_root
+
+
+_RENDERER = '''from conductor import renderer, rvar
+from flask import render_template
+
+
+@renderer
+def render(*args, **kwargs):
+    return render_template(rvar('template'))
+'''
+
+_APP = '''import os
+
+from flask import Flask
+
+from conductor import Conductor, Router
+
+directory = os.path.dirname(os.path.abspath(__file__))
+app = Flask(__name__, template_folder=directory)
+router = Router(os.path.join(directory, 'router.json'))
+router.activate_router(app)
+conductor = Conductor(app, router, None)
+'''
+
+
+def test_build_static_stays_in_the_output_directory(make_app, tmp_path):
+    app, router = make_app({
+        '/': {
+            'python-renderer': None, 'template': 'index.html',
+            '$endpointurl': '../../escaped'
+        }
+    }, {'index.html': 'index'})
+    out_dir = tmp_path / 'sub' / 'dir' / 'out'
+    manifest = build_static(app, router, str(out_dir))
+    entry = manifest['routes']['/']
+    assert os.path.dirname(entry['file']) == ''
+    assert (out_dir / entry['file']).read_text() == 'index'
+    assert not (tmp_path / 'sub' / 'escaped.html').exists()
+
+
+def _load(router, out_dir):
+    return load_manifest(
+        str(out_dir), router.content_hash, router_root(router.rtr_file)
+    )
+
+
+@pytest.mark.parametrize('changed', ['base.html', 'page.py'])
+def test_manifest_is_stale_after_a_source_changed(
+        make_app, tmp_path, changed
+):
+    app, router = make_app({
+        '/': {
+            'python-renderer': str(tmp_path / 'page.py'),
+            'template': 'index.html'
+        }
+    }, {
+        'index.html': '{% extends "base.html" %}',
+        'base.html': 'base',
+        'page.py': _RENDERER
+    })
+    out_dir = tmp_path / 'out'
+    manifest = build_static(app, router, str(out_dir))
+    assert manifest['routes']['/']
+    assert {'index.html', 'base.html', 'page.py'} <= set(manifest['sources'])
+    assert _load(router, out_dir) is not None
+
+    (tmp_path / changed).write_text(
+        (tmp_path / changed).read_text() + '\n'
+    )
+    assert _load(router, out_dir) is None
+
+
+def test_build_command_accepts_an_activated_conductor(
+        make_app, tmp_path, monkeypatch
+):
+    (tmp_path / 'index.html').write_text('index')
+    (tmp_path / 'router.json').write_text(json.dumps({
+        '$version': '0.1',
+        '/': {'python-renderer': None, 'template': 'index.html'}
+    }))
+    (tmp_path / 'built_app.py').write_text(_APP)
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    out_dir = tmp_path / 'out'
+    assert main([
+        'build', '--app', 'built_app:conductor', '-o', str(out_dir)
+    ]) == 0
+    manifest = json.loads((out_dir / 'manifest.json').read_text())
+    assert list(manifest['routes']) == ['/']
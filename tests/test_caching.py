@@ -0,0 +1,97 @@
+import pytest
+
+from conductor.caching import (
+    CacheBackend,
+    CachedResponse,
+    SqliteCacheBackend,
+    cache_config
+)
+
+
+_RENDERER = '''import itertools
+
+from conductor import renderer
+
+_calls = itertools.count(1)
+
+
+@renderer
+def render(*args, **kwargs):
+    return str(next(_calls))
+'''
+
+
+def _cached_app(make_app, tmp_path, cache):
+    return make_app({
+        '/page': {
+            'python-renderer': str(tmp_path / 'page.py'),
+            '$cache': cache
+        }
+    }, files={'page.py': _RENDERER})
+
+
+def test_cached_responses_revalidate_with_etag(make_app, tmp_path):
+    app, router = _cached_app(make_app, tmp_path, True)
+    client = app.test_client()
+    first = client.get('/page')
+    assert first.data == b'1' and first.headers['ETag']
+    assert client.get('/page').data == b'1'
+    revalidated = client.get(
+        '/page', headers={'If-None-Match': first.headers['ETag']}
+    )
+    assert revalidated.status_code == 304
+
+
+def test_cache_varies_on_query_and_headers(make_app, tmp_path):
+    app, router = _cached_app(
+        make_app, tmp_path, {'vary': {'headers': ['Accept-Language']}}
+    )
+    client = app.test_client()
+    assert client.get('/page').data == b'1'
+    assert client.get('/page?a=1').data == b'2'
+    assert client.get('/page?a=1').data == b'2'
+    german = client.get('/page', headers={'Accept-Language': 'de'})
+    assert german.data == b'3'
+    assert 'Accept-Language' in german.headers['Vary']
+
+
+def test_memory_cache_evicts_least_recently_used(make_app, tmp_path):
+    app, router = _cached_app(make_app, tmp_path, {'max_entries': 2})
+    client = app.test_client()
+    assert [client.get(f'/page?n={n}').data for n in (1, 2, 1, 3)] == [
+        b'1', b'2', b'1', b'3'
+    ]
+    # n=2 was the least recently used entry
+    assert client.get('/page?n=1').data == b'1'
+    assert client.get('/page?n=2').data == b'4'
+
+
+def test_sqlite_eviction_is_limited_to_the_route(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    small = SqliteCacheBackend(max_entries=2, namespace='/small', path=path)
+    large = SqliteCacheBackend(max_entries=1000, namespace='/large', path=path)
+    response = CachedResponse(b'body', 200, [], 'etag')
+    for i in range(50):
+        large.set(f'key{i}', response, None)
+    for i in range(5):
+        small.set(f'key{i}', response, None)
+    assert all(large.get(f'key{i}') is not None for i in range(50))
+    assert [small.get(f'key{i}') is not None for i in range(5)] == [
+        False, False, False, True, True
+    ]
+    small.clear()
+    assert large.get('key0') is not None
+
+
+def test_cache_backend_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+
+@pytest.mark.parametrize('config', [
+    {'ttl': 0}, {'ttl': -5}, {'ttl': 'soon'}, {'max_entries': 0},
+    {'max_entries': 1.5}, {'max_entries': True}, {'options': []}
+])
+def test_invalid_cache_config_is_rejected(config):
+    with pytest.raises(ValueError):
+        cache_config('/page', config)
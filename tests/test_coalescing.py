@@ -0,0 +1,108 @@
+import threading
+import time
+
+import pytest
+from flask import Flask
+
+from conductor.coalescing import _coalesced_view, coalesce_config
+
+
+def _coalesced_app(config, fail_first=False):
+    """
+    Builds an app whose /<name> view is coalesced and blocks until released.
+    Returns the app, the release event and the list of view calls.
+    """
+    release = threading.Event()
+    calls = []
+
+    def view(name):
+        calls.append(name)
+        release.wait(5)
+        if fail_first and len(calls) == 1:
+            raise RuntimeError("leader failed")
+        return f"{name} {len(calls)}"
+
+    app = Flask(__name__)
+    app.config['PROPAGATE_EXCEPTIONS'] = False
+    coalesced = _coalesced_view(view, coalesce_config('/<name>', config))
+    app.add_url_rule('/<name>', 'coalesced', coalesced)
+    return app, release, calls, coalesced.stats
+
+
+def _get_concurrently(app, paths, release, calls, wait=0.1):
+    results = [None] * len(paths)
+
+    def get(i):
+        response = app.test_client().get(paths[i])
+        results[i] = (response.status_code, response.data)
+    threads = [
+        threading.Thread(target=get, args=(i,)) for i in range(len(paths))
+    ]
+    threads[0].start()
+    # Let the first request become the leader before the others arrive
+    deadline = time.monotonic() + 5
+    while not calls and time.monotonic() < deadline:
+        time.sleep(0.005)
+    for thread in threads[1:]:
+        thread.start()
+    time.sleep(wait)
+    release.set()
+    for thread in threads:
+        thread.join(10)
+    return results
+
+
+def test_followers_share_the_leaders_response():
+    app, release, calls, stats = _coalesced_app(True)
+    results = _get_concurrently(app, ['/apple'] * 5, release, calls)
+    assert calls == ['apple']
+    assert results == [(200, b'apple 1')] * 5
+    assert stats['leaders'] == 1
+    assert stats['shared'] == 4
+
+
+def test_different_args_are_not_coalesced():
+    app, release, calls, stats = _coalesced_app(True)
+    results = _get_concurrently(
+        app, ['/apple', '/kiwi', '/apple?size=2'], release, calls
+    )
+    assert sorted(calls) == ['apple', 'apple', 'kiwi']
+    assert stats['leaders'] == 3
+    assert stats['shared'] == 0
+    assert all(status == 200 for status, body in results)
+
+
+def test_followers_run_the_view_when_the_leader_fails():
+    app, release, calls, stats = _coalesced_app(True, fail_first=True)
+    results = _get_concurrently(app, ['/apple'] * 3, release, calls)
+    assert results[0][0] == 500
+    assert [status for status, body in results[1:]] == [200, 200]
+    assert len(calls) == 3
+    assert stats['unshared'] == 2
+    assert stats['shared'] == 0
+
+
+def test_followers_stop_waiting_after_the_timeout():
+    app, release, calls, stats = _coalesced_app({'timeout': 0.05})
+    results = _get_concurrently(
+        app, ['/apple'] * 3, release, calls, wait=0.3
+    )
+    assert len(calls) == 3
+    assert stats['timeouts'] == 2
+    assert {status for status, body in results} == {200}
+
+
+def test_other_methods_are_not_coalesced():
+    app, release, calls, stats = _coalesced_app({'methods': ['HEAD']})
+    release.set()
+    assert app.test_client().get('/apple').data == b'apple 1'
+    assert stats['leaders'] == 0
+
+
+@pytest.mark.parametrize('config', [
+    'yes', {'timeout': 0}, {'timeout': 'long'}, {'methods': 'GET'},
+    {'other': 1}
+])
+def test_invalid_coalesce_config(config):
+    with pytest.raises(ValueError):
+        coalesce_config('/', config)
@@ -0,0 +1,33 @@
+import json
+import pickle
+
+from conductor.compiler import compile_router, load_snapshot, router_hash
+
+
+def _router_file(tmp_path):
+    rtr_file = tmp_path / 'router.json'
+    rtr_file.write_text(
+        '{"$version": "0.1", '
+        '"/": {"python-renderer": null, "template": "index.html"}}'
+    )
+    return rtr_file
+
+
+def test_snapshots_are_json(tmp_path):
+    rtr_file = _router_file(tmp_path)
+    out_file = compile_router(str(rtr_file))
+    with open(out_file) as snapshot_file:
+        assert json.load(snapshot_file)['routes'][0]['raw_route'] == '/'
+    content_hash = router_hash(rtr_file.read_bytes())
+    assert load_snapshot(out_file, content_hash, str(rtr_file)) is not None
+
+
+def test_pickled_snapshots_are_never_loaded(tmp_path):
+    rtr_file = _router_file(tmp_path)
+    out_file = compile_router(str(rtr_file))
+    with open(out_file) as snapshot_file:
+        snapshot = json.load(snapshot_file)
+    with open(out_file, 'wb') as snapshot_file:
+        pickle.dump(snapshot, snapshot_file)
+    content_hash = router_hash(rtr_file.read_bytes())
+    assert load_snapshot(out_file, content_hash, str(rtr_file)) is None
@@ -0,0 +1,29 @@
+import gzip
+
+from flask import make_response
+
+from conductor.compression import Compressor
+
+
+def test_variants_of_equal_etags_are_not_shared(make_app):
+    app, router = make_app({
+        '/': {'python-renderer': None, 'template': 'index.html'}
+    }, {'index.html': 'index'})
+    compressor = Compressor(router, enabled=True, min_size=0)
+    app.after_request(compressor.after_request)
+
+    def tagged(body):
+        def view():
+            response = make_response(body)
+            response.set_etag('v1')
+            return response
+        return view
+    app.add_url_rule('/etaga', 'etaga', tagged('A' * 50))
+    app.add_url_rule('/etagb', 'etagb', tagged('B' * 50))
+
+    client = app.test_client()
+    for path, body in (('/etaga', b'A'), ('/etagb', b'B'), ('/etaga', b'A')):
+        response = client.get(path, headers={'Accept-Encoding': 'gzip'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(response.data) == body * 50
+    assert compressor.variants.stats()['hits'] == 1
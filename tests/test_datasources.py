@@ -0,0 +1,104 @@
+import json
+import os
+
+import pytest
+
+from conductor.datasources import DataSourceLoader
+from conductor.mapdb import write_mapdb
+
+
+_RENDERER = '''import json
+
+from conductor import renderer, rdata
+
+
+@renderer
+def render(*args, **kwargs):
+    return json.dumps(dict(rdata('fruits')))
+'''
+
+
+def _touch(path, content):
+    path.write_text(content)
+    # Make sure the modification time changes on coarse clocks
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+@pytest.fixture
+def loader(monkeypatch):
+    loader = DataSourceLoader(check_interval=0)
+    monkeypatch.setattr('conductor.accessors.data_loader', loader)
+    return loader
+
+
+def _get(client):
+    return json.loads(client.get('/').data)
+
+
+def _fruit_app(make_app, tmp_path, use):
+    return make_app({
+        '/': {
+            'python-renderer': str(tmp_path / 'page.py'),
+            'fruits': {
+                'jsonic': str(tmp_path / 'fruits.json'),
+                'mapdb': str(tmp_path / 'fruits.map'),
+                'use': use
+            }
+        }
+    }, files={'page.py': _RENDERER})
+
+
+def test_rdata_reloads_a_changed_file(make_app, tmp_path, loader):
+    (tmp_path / 'fruits.json').write_text(json.dumps({'apple': 'red'}))
+    app, router = _fruit_app(make_app, tmp_path, 'jsonic')
+    client = app.test_client()
+    assert _get(client) == {'apple': 'red'}
+
+    _touch(tmp_path / 'fruits.json', json.dumps({'kiwi': 'green'}))
+    assert _get(client) == {'kiwi': 'green'}
+
+
+def test_rdata_keeps_data_within_the_check_interval(tmp_path):
+    path = tmp_path / 'fruits.json'
+    path.write_text(json.dumps({'apple': 'red'}))
+    loader = DataSourceLoader(check_interval=60)
+    source = {'variant': 'jsonic', 'path': str(path)}
+    first = loader.load(source)
+    assert loader.load(source) is first
+
+    _touch(path, json.dumps({'kiwi': 'green'}))
+    assert loader.load(source) is first
+    loader.clear()
+    assert loader.load(source) == {'kiwi': 'green'}
+
+
+def test_rdata_reads_mapdb_sources(make_app, tmp_path, loader):
+    write_mapdb(str(tmp_path / 'fruits.map'), {'apple': 'red'})
+    app, router = _fruit_app(make_app, tmp_path, 'mapdb')
+    client = app.test_client()
+    assert _get(client) == {'apple': 'red'}
+
+    write_mapdb(str(tmp_path / 'fruits.map'), {'kiwi': 'green', 'fig': 1})
+    stat = os.stat(tmp_path / 'fruits.map')
+    os.utime(
+        tmp_path / 'fruits.map',
+        ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9)
+    )
+    assert _get(client) == {'fig': 1, 'kiwi': 'green'}
+
+
+def test_missing_data_source_fails_on_activation(make_app, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        _fruit_app(make_app, tmp_path, 'jsonic')
+
+
+def test_removed_data_source_file(tmp_path):
+    path = tmp_path / 'fruits.json'
+    path.write_text('{}')
+    loader = DataSourceLoader(check_interval=0)
+    source = {'variant': 'jsonic', 'path': str(path)}
+    assert loader.load(source) == {}
+    os.remove(path)
+    with pytest.raises(FileNotFoundError):
+        loader.load(source)
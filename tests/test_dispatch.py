@@ -0,0 +1,112 @@
+import itertools
+import random
+
+import pytest
+from flask import Flask
+from werkzeug.exceptions import MethodNotAllowed, NotFound
+from werkzeug.routing import Map, RequestRedirect, Rule
+
+from conductor.dispatch import FastMap, install_fast_map
+
+
+# Rules covering the cases the fast path must either decide exactly like
+# werkzeug or hand over to it.
+def _rules():
+    return [
+        Rule('/', endpoint='index'),
+        Rule('/about', endpoint='about'),
+        Rule('/docs/', endpoint='docs'),
+        Rule('/user/me', endpoint='me'),
+        Rule('/user/<name>', endpoint='user'),
+        Rule('/user/<name>/posts', endpoint='posts'),
+        Rule('/user/<string:name>/posts/', endpoint='posts_slash'),
+        Rule('/a/<x>/<y>', endpoint='pair'),
+        Rule('/item/<int:id>', endpoint='item'),
+        Rule('/price/<float:value>', endpoint='price'),
+        Rule('/id/<uuid:uid>', endpoint='uid'),
+        Rule('/files/<path:subpath>', endpoint='files'),
+        Rule('/short/<string(length=2):code>', endpoint='code'),
+        Rule('/form', endpoint='form', methods=['POST']),
+        Rule('/both', endpoint='both_get', methods=['GET']),
+        Rule('/both', endpoint='both_post', methods=['POST']),
+        Rule('/page/', endpoint='page', defaults={'num': 1}),
+        Rule('/page/<int:num>', endpoint='page'),
+        Rule('/old', endpoint='old', redirect_to='/about'),
+        Rule('/loose', endpoint='loose', strict_slashes=False),
+    ]
+
+
+_PATHS = [
+    '/', '/about', '/about/', '/docs', '/docs/', '/user', '/user/',
+    '/user/me', '/user/me/', '/user/alice', '/user/alice/',
+    '/user/alice/posts', '/user/alice/posts/', '/user//posts', '/a/1/2',
+    '/a/1', '/a/1/2/3', '/item/7', '/item/-7', '/item/x', '/price/1.5',
+    '/price/2', '/id/12345678-1234-5678-1234-567812345678', '/id/nope',
+    '/files/a/b/c.txt', '/files/', '/short/ab', '/short/abc', '/form',
+    '/both', '/page/', '/page/1', '/page/2', '/old', '/loose', '/loose/',
+    '/missing', '/%C3%BC', '/user/%C3%BC'
+]
+_METHODS = ['GET', 'HEAD', 'POST', 'PUT', 'OPTIONS']
+
+
+def _outcome(url_map, path, method):
+    adapter = url_map.bind('localhost')
+    try:
+        endpoint, args = adapter.match(path, method)
+    except RequestRedirect as redirect:
+        return 'redirect', redirect.new_url
+    except MethodNotAllowed as error:
+        return '405', sorted(error.valid_methods)
+    except NotFound:
+        return '404',
+    return 'match', endpoint, args
+
+
+@pytest.mark.parametrize(
+    'path,method', list(itertools.product(_PATHS, _METHODS))
+)
+def test_fast_map_matches_like_werkzeug(path, method):
+    assert (
+        _outcome(FastMap(_rules()), path, method)
+        == _outcome(Map(_rules()), path, method)
+    )
+
+
+def test_fast_map_matches_random_paths_like_werkzeug():
+    segments = ['', 'user', 'me', 'alice', 'posts', 'a', '1', 'item', 'x']
+    fast_map, url_map = FastMap(_rules()), Map(_rules())
+    rng = random.Random(0)
+    for _ in range(2000):
+        path = '/' + '/'.join(
+            rng.choice(segments) for _ in range(rng.randint(0, 4))
+        )
+        method = rng.choice(_METHODS)
+        assert (
+            _outcome(fast_map, path, method)
+            == _outcome(url_map, path, method)
+        ), (path, method)
+
+
+def test_install_fast_map_keeps_app_rules():
+    app = Flask(__name__)
+    app.add_url_rule('/hello/<name>', 'hello', lambda name: f'hi {name}')
+    app.add_url_rule('/submit', 'submit', lambda: 'ok', methods=['POST'])
+    app.add_url_rule('/dir/', 'dir', lambda: 'dir')
+    install_fast_map(app)
+    assert isinstance(app.url_map, FastMap)
+
+    client = app.test_client()
+    assert client.get('/hello/bob').data == b'hi bob'
+    assert client.get('/submit').status_code == 405
+    assert client.post('/submit').data == b'ok'
+    assert client.get('/dir').status_code == 308
+    assert client.get('/nope').status_code == 404
+
+
+def test_fast_dispatch_is_opt_in(make_app):
+    routes = {'/': {'python-renderer': None, 'template': 'index.html'}}
+    app, router = make_app(routes, {'index.html': 'index'})
+    assert not isinstance(app.url_map, FastMap)
+    app, router = make_app(routes, fast_dispatch=True)
+    assert isinstance(app.url_map, FastMap)
+    assert app.test_client().get('/').data == b'index'
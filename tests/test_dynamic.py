@@ -0,0 +1,32 @@
+import uuid
+
+from conductor.dynamic import substitute_path
+
+
+def test_substitute_path_accepts_converter_values():
+    uid = uuid.UUID('12345678-1234-5678-1234-567812345678')
+    assert substitute_path('/items/<id>.html', {'id': 1}) == '/items/1.html'
+    assert substitute_path('/p/<v>.json', {'v': 1.5}) == '/p/1.5.json'
+    assert substitute_path('/u/<id>', {'id': uid}) == f'/u/{uid}'
+
+
+def test_substitute_path_rejects_unsafe_values():
+    for value in ('', '.', '..', 'a/b', 'a\\b', 'a\0b', None):
+        assert substitute_path('/items/<id>.html', {'id': value}) is None
+    assert substitute_path('/items/<id>.html', {}) is None
+
+
+def test_int_parameters_resolve_templates_and_data(make_app, tmp_path):
+    app, router = make_app({
+        '/item/<int:id>': {
+            'python-renderer': None,
+            'template': 'items/<id>.html',
+            'info': {'jsonic': str(tmp_path / '<id>.json'), 'use': 'jsonic'}
+        }
+    }, {
+        'items/1.html': 'item {{ rdata("info")["n"] }}',
+        '1.json': '{"n": 7}'
+    })
+    client = app.test_client()
+    assert client.get('/item/1').data == b'item 7'
+    assert client.get('/item/2').status_code == 404
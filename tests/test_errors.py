@@ -0,0 +1,80 @@
+import pytest
+from flask import Blueprint, Flask, request
+from werkzeug.exceptions import HTTPException, NotFound
+
+from conductor.errors import _has_error_handler
+
+
+def test_negative_cache_is_off_by_default(make_app):
+    app, router = make_app({
+        '/': {'python-renderer': None, 'template': 'index.html'}
+    }, {'index.html': 'index'})
+    assert router.negative_lookups is None
+
+
+def test_negative_cache_skips_request_dependent_handlers(make_app):
+    app, router = make_app({
+        '/': {'python-renderer': None, 'template': 'index.html'},
+        '@error/404': {'python-renderer': None, 'template': '404.html'}
+    }, {
+        'index.html': 'index',
+        '404.html': 'user={{ request.headers["X-User"] }}'
+    }, negative_cache_size=16)
+    client = app.test_client()
+    alice = client.get('/secret', headers={'X-User': 'alice'})
+    bob = client.get('/secret', headers={'X-User': 'bob'})
+    assert alice.data == b'user=alice'
+    assert bob.data == b'user=bob'
+    assert router.negative_lookups.cache.stats()['entries'] == 0
+
+
+def test_negative_cache_stores_static_error_routes(make_app):
+    app, router = make_app({
+        '/': {'python-renderer': None, 'template': 'index.html'},
+        '@error/404': {
+            'python-renderer': None, 'template': '404.html', '$static': True
+        }
+    }, {'index.html': 'index', '404.html': 'not here'},
+        negative_cache_size=16)
+    client = app.test_client()
+    for _ in range(2):
+        response = client.get('/secret')
+        assert (response.status_code, response.data) == (404, b'not here')
+    assert router.negative_lookups.cache.stats()['hits'] == 1
+
+
+def test_negative_cache_stores_default_not_found(make_app):
+    app, router = make_app({
+        '/': {'python-renderer': None, 'template': 'index.html'}
+    }, {'index.html': 'index'}, negative_cache_size=16)
+    client = app.test_client()
+    for _ in range(2):
+        assert client.get('/secret').status_code == 404
+    assert router.negative_lookups.cache.stats()['hits'] == 1
+
+
+@pytest.mark.parametrize('registered', [404, NotFound, HTTPException])
+def test_negative_cache_skips_app_error_handlers(make_app, registered):
+    app, router = make_app({
+        '/': {'python-renderer': None, 'template': 'index.html'}
+    }, {'index.html': 'index'}, negative_cache_size=16)
+    app.register_error_handler(
+        registered, lambda error: (request.path, 404)
+    )
+    client = app.test_client()
+    assert client.get('/one').data == b'/one'
+    assert client.get('/one').data == b'/one'
+    assert router.negative_lookups.cache.stats()['entries'] == 0
+
+
+def test_has_error_handler_walks_blueprints_and_classes():
+    app = Flask(__name__)
+    blueprint = Blueprint('shop', __name__)
+    blueprint.register_error_handler(Exception, lambda error: 'shop')
+    app.register_blueprint(blueprint)
+    assert not _has_error_handler(app, NotFound(), [])
+    assert _has_error_handler(app, NotFound(), ['shop'])
+    # Looking up handlers does not add entries to the spec
+    assert 'other' not in app.error_handler_spec
+    assert not _has_error_handler(app, NotFound(), ['other'])
+    assert 'other' not in app.error_handler_spec
@@ -0,0 +1,119 @@
+import os
+import time
+
+import pytest
+
+
+def _file_app(make_app, tmp_path, **options):
+    public = tmp_path / 'public'
+    (public / 'css').mkdir(parents=True)
+    (public / 'css' / 'site.css').write_text('body {}\n')
+    (public / 'hello.txt').write_text('0123456789')
+    (tmp_path / 'secret.txt').write_text('secret')
+    app, router = make_app({
+        '@/files/<path:p>': {
+            '$type': '$file', '$directory': str(public), **options
+        }
+    })
+    return app, public
+
+
+def test_serves_files_below_the_directory(make_app, tmp_path):
+    app, public = _file_app(make_app, tmp_path, **{'$max_age': 60})
+    response = app.test_client().get('/files/css/site.css')
+    assert response.status_code == 200
+    assert response.data == b'body {}\n'
+    assert response.mimetype == 'text/css'
+    assert response.cache_control.max_age == 60
+    assert app.test_client().get('/files/css').status_code == 404
+    assert app.test_client().get('/files/none.txt').status_code == 404
+
+
+@pytest.mark.parametrize('path', [
+    '/files/../secret.txt',
+    '/files/css/../../secret.txt',
+    '/files/%2e%2e/secret.txt',
+    '/files/css/%2E%2E/%2E%2E/secret.txt',
+])
+def test_rejects_parent_traversal(make_app, tmp_path, path):
+    app, public = _file_app(make_app, tmp_path)
+    response = app.test_client().get(path)
+    assert response.status_code == 404
+    assert b'secret' not in response.data
+
+
+def test_rejects_symlinks_escaping_the_directory(make_app, tmp_path):
+    app, public = _file_app(make_app, tmp_path)
+    try:
+        os.symlink(tmp_path / 'secret.txt', public / 'escape.txt')
+        os.symlink(public / 'hello.txt', public / 'inside.txt')
+    except (OSError, NotImplementedError):
+        pytest.skip("symlinks are not supported here")
+    client = app.test_client()
+    assert client.get('/files/escape.txt').status_code == 404
+    assert client.get('/files/inside.txt').data == b'0123456789'
+
+
+def test_range_requests(make_app, tmp_path):
+    app, public = _file_app(make_app, tmp_path)
+    client = app.test_client()
+
+    response = client.get('/files/hello.txt', headers={'Range': 'bytes=2-5'})
+    assert response.status_code == 206
+    assert response.data == b'2345'
+    assert response.headers['Content-Range'] == 'bytes 2-5/10'
+
+    response = client.get(
+        '/files/hello.txt', headers={'Range': 'bytes=20-30'}
+    )
+    assert response.status_code == 416
+    assert response.headers['Content-Range'] == 'bytes */10'
+
+
+def test_if_none_match(make_app, tmp_path):
+    app, public = _file_app(make_app, tmp_path)
+    client = app.test_client()
+    etag = client.get('/files/hello.txt').headers['ETag']
+
+    response = client.get(
+        '/files/hello.txt', headers={'If-None-Match': etag}
+    )
+    assert response.status_code == 304
+    assert response.data == b''
+    response = client.get(
+        '/files/hello.txt', headers={'If-None-Match': '"other"'}
+    )
+    assert response.status_code == 200
+
+
+def test_stat_cache_expires(make_app, tmp_path):
+    app, public = _file_app(make_app, tmp_path, **{'$stat_ttl': 0.1})
+    client = app.test_client()
+    first = client.get('/files/hello.txt')
+    assert client.get('/files/new.txt').status_code == 404
+
+    (public / 'hello.txt').write_text('changed')
+    # Make sure the modification time changes on coarse clocks
+    stat = os.stat(public / 'hello.txt')
+    os.utime(
+        public / 'hello.txt',
+        ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9)
+    )
+    (public / 'new.txt').write_text('new')
+    time.sleep(0.15)
+
+    second = client.get('/files/hello.txt')
+    assert second.data == b'changed'
+    assert second.headers['ETag'] != first.headers['ETag']
+    assert client.get('/files/new.txt').data == b'new'
+
+
+def test_removed_file_is_dropped_from_the_stat_cache(make_app, tmp_path):
+    app, public = _file_app(make_app, tmp_path, **{'$stat_ttl': 60})
+    client = app.test_client()
+    assert client.get('/files/hello.txt').status_code == 200
+
+    os.remove(public / 'hello.txt')
+    assert client.get('/files/hello.txt').status_code == 404
+    (public / 'hello.txt').write_text('back')
+    assert client.get('/files/hello.txt').data == b'back'
@@ -0,0 +1,83 @@
+import itertools
+import time
+
+from jinja2 import Environment
+
+from conductor.fragments import FragmentCacheExtension
+
+
+_TEMPLATE = (
+    "{% cache ('box', fruit), ttl %}{{ fruit }}={{ n() }}{% endcache %}"
+    "|{% cache ('box', fruit), ttl %}{{ n() }}{% endcache %}"
+)
+
+
+def _render(fruit, ttl=None, environment=None):
+    return environment.from_string(_TEMPLATE).render(
+        fruit=fruit, ttl=ttl, n=_COUNTER.__next__
+    )
+
+
+_COUNTER = itertools.count()
+
+
+def _environment():
+    return Environment(extensions=[FragmentCacheExtension])
+
+
+def test_fragments_are_reused_per_key_and_block():
+    environment = _environment()
+    first = _render('apple', environment=environment)
+    assert first.startswith('apple=')
+    # Both blocks use the same key, but each block has its own entry
+    left, right = first.split('|')
+    assert not right.startswith('apple=')
+    assert left.split('=')[1] != right
+    assert _render('apple', environment=environment) == first
+    assert _render('kiwi', environment=environment) != first
+    assert len(environment.fragment_cache) == 4
+
+
+def test_fragments_expire_after_their_ttl():
+    environment = _environment()
+    first = _render('apple', ttl=0.05, environment=environment)
+    assert _render('apple', ttl=0.05, environment=environment) == first
+    time.sleep(0.1)
+    assert _render('apple', ttl=0.05, environment=environment) != first
+
+
+def test_string_templates_do_not_share_fragments():
+    environment = _environment()
+    first = environment.from_string("{% cache 1 %}first{% endcache %}")
+    second = environment.from_string("{% cache 1 %}second{% endcache %}")
+    assert first.render() == 'first'
+    assert second.render() == 'second'
+
+
+def test_equal_keys_share_a_fragment():
+    environment = _environment()
+    template = environment.from_string(
+        "{% cache key %}{{ n() }}{% endcache %}"
+    )
+    first = template.render(key={'a': 1, 'b': [1, 2]}, n=_COUNTER.__next__)
+    second = template.render(key={'b': [1, 2], 'a': 1}, n=_COUNTER.__next__)
+    third = template.render(key={'a': 2, 'b': [1, 2]}, n=_COUNTER.__next__)
+    assert first == second
+    assert third != first
+
+
+def test_route_templates_build_keys_from_route_values(make_app):
+    app, router = make_app({
+        '@/fruit/<name>': {
+            'python-renderer': None, 'template': 'fruit.html',
+            'color': 'red', '$warmup': False
+        }
+    }, {'fruit.html': (
+        "{% cache ('fruit', request.view_args.name, rvar('color')) %}"
+        "{{ request.view_args.name }} {{ request.args.get('n') }}"
+        "{% endcache %}"
+    )})
+    client = app.test_client()
+    assert client.get('/fruit/apple?n=1').data == b'apple 1'
+    assert client.get('/fruit/apple?n=2').data == b'apple 1'
+    assert client.get('/fruit/kiwi?n=3').data == b'kiwi 3'
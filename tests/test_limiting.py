@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+from flask import Flask
+
+from conductor.limiting import ConcurrencyLimiter, _limited_view, limit_config
+
+
+def _limited_app(route_data):
+    """
+    Builds an app whose /slow view holds its slot until released, next to a
+    /fail view sharing the same limiter.
+    """
+    entered = threading.Event()
+    release = threading.Event()
+
+    def slow():
+        entered.set()
+        release.wait(5)
+        return 'done'
+
+    def fail():
+        raise RuntimeError("broken")
+
+    limiter = ConcurrencyLimiter(limit_config('/slow', route_data))
+    app = Flask(__name__)
+    app.config['PROPAGATE_EXCEPTIONS'] = False
+    app.add_url_rule('/slow', 'slow', _limited_view(slow, limiter))
+    app.add_url_rule('/fail', 'fail', _limited_view(fail, limiter))
+    return app, limiter, entered, release
+
+
+def _hold_slot(app, entered):
+    results = []
+    thread = threading.Thread(
+        target=lambda: results.append(app.test_client().get('/slow'))
+    )
+    thread.start()
+    assert entered.wait(5)
+    return thread, results
+
+
+def test_requests_over_the_limit_are_shed():
+    app, limiter, entered, release = _limited_app({
+        '$max_concurrency': 1, '$retry_after': 7
+    })
+    thread, results = _hold_slot(app, entered)
+    try:
+        response = app.test_client().get('/slow')
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '7'
+        assert limiter.stats() == {
+            'admitted': 1, 'shed': 1, 'in_flight': 1, 'max_concurrency': 1
+        }
+    finally:
+        release.set()
+        thread.join(5)
+    assert results[0].data == b'done'
+    assert limiter.stats()['in_flight'] == 0
+    assert app.test_client().get('/slow').status_code == 200
+
+
+def test_requests_wait_for_a_slot_within_the_queue_timeout():
+    app, limiter, entered, release = _limited_app({
+        '$max_concurrency': 1, '$queue_timeout': 5
+    })
+    thread, results = _hold_slot(app, entered)
+    threading.Timer(0.1, release.set).start()
+    start = time.monotonic()
+    response = app.test_client().get('/slow')
+    thread.join(5)
+    assert response.status_code == 200
+    assert time.monotonic() - start >= 0.05
+    assert limiter.stats()['shed'] == 0
+
+
+def test_slot_is_released_when_the_view_raises():
+    app, limiter, entered, release = _limited_app({'$max_concurrency': 1})
+    release.set()
+    assert app.test_client().get('/fail').status_code == 500
+    assert limiter.stats()['in_flight'] == 0
+    assert app.test_client().get('/slow').status_code == 200
+
+
+def test_route_without_a_limit():
+    assert limit_config('/', {}) is None
+
+
+@pytest.mark.parametrize('route_data', [
+    {'$max_concurrency': 0},
+    {'$max_concurrency': True},
+    {'$max_concurrency': 1.5},
+    {'$max_concurrency': 1, '$queue_timeout': -1},
+    {'$max_concurrency': 1, '$retry_after': 'soon'},
+    {'$queue_timeout': 1},
+])
+def test_invalid_limit(route_data):
+    with pytest.raises(ValueError):
+        limit_config('/', route_data)
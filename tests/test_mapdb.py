@@ -0,0 +1,94 @@
+import pytest
+
+from conductor.mapdb import MapDB, write_mapdb
+
+
+def _round_trip(tmp_path, data):
+    path = str(tmp_path / 'data.map')
+    assert write_mapdb(path, data) == len(data)
+    return MapDB(path)
+
+
+def test_round_trip(tmp_path):
+    data = {
+        'alice': {'phone': '555-0100', 'tags': ['a', 'b']},
+        'bob': [1, 2.5, None, True],
+        'carol': 'text',
+        'b': 0
+    }
+    mapdb = _round_trip(tmp_path, data)
+    try:
+        assert len(mapdb) == 4
+        assert list(mapdb) == sorted(data)
+        assert dict(mapdb) == data
+    finally:
+        mapdb.close()
+
+
+def test_empty_mapping(tmp_path):
+    mapdb = _round_trip(tmp_path, {})
+    try:
+        assert len(mapdb) == 0
+        assert list(mapdb) == []
+        assert '' not in mapdb
+        assert mapdb.get('alice') is None
+    finally:
+        mapdb.close()
+
+
+def test_unicode_keys(tmp_path):
+    data = {'äpfel': 1, 'zoë': 2, '名前': 3, '🍓': 4, 'a': 5}
+    mapdb = _round_trip(tmp_path, data)
+    try:
+        assert dict(mapdb) == data
+        # Sorted by UTF-8 bytes, which binary search relies on
+        assert list(mapdb) == sorted(data, key=lambda key: key.encode())
+        for key, value in data.items():
+            assert mapdb[key] == value
+    finally:
+        mapdb.close()
+
+
+def test_missing_keys(tmp_path):
+    mapdb = _round_trip(tmp_path, {'bb': 1, 'dd': 2})
+    try:
+        for key in ('a', 'bc', 'c', 'e', 'bbb', '', 'b\0', 'x' * 100):
+            assert key not in mapdb
+            with pytest.raises(KeyError):
+                mapdb[key]
+        assert 1 not in mapdb
+        assert mapdb.get(1) is None
+    finally:
+        mapdb.close()
+
+
+def test_invalid_keys_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        write_mapdb(str(tmp_path / 'data.map'), {1: 'one'})
+    with pytest.raises(ValueError):
+        write_mapdb(str(tmp_path / 'data.map'), {'a\0b': 'nul'})
+
+
+@pytest.mark.parametrize('cut', [0, 4, 34, 40, -1])
+def test_truncated_file(tmp_path, cut):
+    path = tmp_path / 'data.map'
+    write_mapdb(str(path), {'alice': 'a' * 20, 'bob': 'b' * 20})
+    content = path.read_bytes()
+    path.write_bytes(content[:cut])
+    with pytest.raises(ValueError):
+        MapDB(str(path))
+
+
+def test_corrupt_file(tmp_path):
+    path = tmp_path / 'data.map'
+    path.write_bytes(b'{"alice": "not a mapdb file"}')
+    with pytest.raises(ValueError):
+        MapDB(str(path))
+
+    write_mapdb(str(path), {'alice': 1})
+    content = bytearray(path.read_bytes())
+    # An entry count larger than the index in the file
+    content[12] = 200
+    path.write_bytes(bytes(content))
+    with pytest.raises(ValueError):
+        MapDB(str(path))
@@ -0,0 +1,128 @@
+import os
+import re
+
+from conductor.metrics import MetricsRegistry
+
+
+_RENDERER = '''from flask import abort
+
+from conductor import renderer
+
+
+@renderer
+def render(*args, **kwargs):
+    status = kwargs.get('status')
+    if status == 'raise':
+        raise RuntimeError("broken")
+    if status:
+        abort(int(status))
+    return 'ok'
+'''
+
+
+def _samples(text):
+    """
+    Parses the samples of a Prometheus text exposition into a dictionary of
+    (metric name, labels) to value.
+    """
+    samples = {}
+    for line in text.splitlines():
+        if not line or line.startswith('#'):
+            continue
+        match = re.fullmatch(r'(\w+)\{(.*)\} (\S+)', line)
+        name, labels, value = match.groups()
+        samples[(name, labels)] = float(value)
+    return samples
+
+
+def _metrics_app(make_app, tmp_path):
+    app, router = make_app({
+        '/': {'python-renderer': str(tmp_path / 'page.py')},
+        '/status/<status>': {
+            'python-renderer': str(tmp_path / 'page.py'),
+            '$endpointurl': 'status', '$warmup': False
+        }
+    }, files={'page.py': _RENDERER}, metrics=True)
+    app.config['PROPAGATE_EXCEPTIONS'] = False
+    return app, router
+
+
+def test_requests_errors_and_latency_per_route(make_app, tmp_path):
+    app, router = _metrics_app(make_app, tmp_path)
+    client = app.test_client()
+    for path in ['/', '/', '/status/404', '/status/503', '/status/raise']:
+        client.get(path)
+
+    response = client.get('/_conductor/metrics')
+    assert response.mimetype == 'text/plain'
+    samples = _samples(response.get_data(as_text=True))
+    renderer = str(tmp_path / 'page.py')
+    pid = os.getpid()
+    index = f'raw_route="/",endpoint="_",renderer="{renderer}",pid="{pid}"'
+    status = (
+        f'raw_route="/status/<status>",endpoint="status",'
+        f'renderer="{renderer}",pid="{pid}"'
+    )
+    assert samples[('conductor_requests_total', index)] == 2
+    assert samples[('conductor_request_errors_total', index)] == 0
+    assert samples[('conductor_requests_total', status)] == 3
+    # The 404 is a client error, the 503 and the exception are not
+    assert samples[('conductor_request_errors_total', status)] == 2
+    assert samples[(
+        'conductor_request_duration_seconds_bucket', index + ',le="+Inf"'
+    )] == 2
+    assert samples[('conductor_request_duration_seconds_count', index)] == 2
+    assert samples[('conductor_request_duration_seconds_sum', index)] > 0
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    labels = {'raw_route': '/', 'endpoint': 'index', 'renderer': ''}
+    route_metrics = registry.route(labels)
+    for seconds in (0.0005, 0.02, 0.02, 7.0):
+        route_metrics.observe(seconds, False)
+
+    samples = _samples(registry.render_prometheus())
+    prefix = f'raw_route="/",endpoint="index",renderer="",pid="{os.getpid()}"'
+    buckets = {
+        re.search(r'le="([^"]+)"', labels).group(1): value
+        for (name, labels), value in samples.items()
+        if name == 'conductor_request_duration_seconds_bucket'
+        and labels.startswith(prefix)
+    }
+    assert buckets['0.001'] == 1
+    assert buckets['0.01'] == 1
+    assert buckets['0.025'] == 3
+    assert buckets['5.0'] == 3
+    assert buckets['+Inf'] == 4
+    assert registry.route(dict(labels)) is route_metrics
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.route({
+        'raw_route': '/say/"hi"', 'endpoint': 'back\\slash',
+        'renderer': 'new\nline'
+    }).observe(0.01, False)
+    text = registry.render_prometheus()
+    assert (
+        'raw_route="/say/\\"hi\\"",endpoint="back\\\\slash",'
+        'renderer="new\\nline"'
+    ) in text
+    # Every sample stays on one line
+    assert all(
+        line.startswith(('#', 'conductor_'))
+        for line in text.splitlines()
+    )
+
+
+def test_reset_clears_counters(make_app, tmp_path):
+    app, router = _metrics_app(make_app, tmp_path)
+    client = app.test_client()
+    client.get('/')
+    router.metrics.reset()
+    samples = _samples(client.get('/_conductor/metrics').get_data(True))
+    assert all(
+        value == 0 for (name, labels), value in samples.items()
+        if labels.startswith('raw_route="/",')
+    )
@@ -0,0 +1,42 @@
+import os
+
+import pytest
+
+from conductor.profiling import RouteProfiler, profile_config
+
+
+def test_stats_file_stays_in_the_profile_directory(tmp_path):
+    profile_dir = tmp_path / 'sub' / 'profiles'
+    profiler = RouteProfiler(
+        '../../escaped', str(profile_dir), profile_config('/', True)
+    )
+    assert os.path.dirname(profiler.path) == str(profile_dir)
+    assert os.path.basename(profiler.path).startswith('______escaped-')
+
+
+def test_similar_endpoints_get_different_files(tmp_path):
+    config = profile_config('/', True)
+    first = RouteProfiler('a/b', str(tmp_path), config)
+    second = RouteProfiler('a_b', str(tmp_path), config)
+    assert first.path != second.path
+
+
+def test_profiled_route_writes_stats(make_app, tmp_path):
+    app, router = make_app({
+        '/': {
+            'python-renderer': None, 'template': 'index.html',
+            '$endpointurl': '../../escaped',
+            '$profile': {'rate': 1, 'flush_interval': 60}
+        }
+    }, {'index.html': 'index'}, profile_dir=str(tmp_path / 'profiles'))
+    assert app.test_client().get('/').data == b'index'
+    router.flush_profiles()
+    files = os.listdir(tmp_path / 'profiles')
+    assert len(files) == 1 and files[0].endswith('.prof')
+    assert not list(tmp_path.parent.glob('escaped*'))
+
+
+@pytest.mark.parametrize('interval', [0, -1, 'soon', True])
+def test_flush_interval_must_be_positive(interval):
+    with pytest.raises(ValueError):
+        profile_config('/', {'flush_interval': interval})
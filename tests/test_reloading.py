@@ -0,0 +1,38 @@
+import os
+
+import pytest
+
+
+_RENDERER = '''from conductor import renderer
+
+
+@renderer
+def render(*args, **kwargs):
+    return {VALUE!r}
+'''
+
+
+def _write_renderer(path, source):
+    path.write_text(source)
+    # Make sure the modification time changes on coarse clocks
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def test_reload_retries_a_renderer_that_failed_to_import(make_app, tmp_path):
+    app, router = make_app({
+        '/': {'python-renderer': str(tmp_path / 'page.py')}
+    }, files={'page.py': _RENDERER.replace('{VALUE!r}', "'one'")})
+    client = app.test_client()
+    assert client.get('/').data == b'one'
+
+    _write_renderer(tmp_path / 'page.py', 'def (:\n')
+    with pytest.raises(SyntaxError):
+        router.reload()
+    assert client.get('/').data == b'one'
+
+    _write_renderer(
+        tmp_path / 'page.py', _RENDERER.replace('{VALUE!r}', "'two'")
+    )
+    assert router.reload()['changed'] == ['/']
+    assert client.get('/').data == b'two'
@@ -0,0 +1,130 @@
+import threading
+import time
+
+import pytest
+
+from conductor.rendering import _lazy_view
+
+
+_RENDERER = '''import os
+
+from conductor import renderer
+
+# Records every import of the module
+with open(os.path.join(os.path.dirname(__file__), 'imports.txt'), 'a') as f:
+    f.write('imported\\n')
+
+
+@renderer
+def render(*args, **kwargs):
+    return 'page'
+'''
+
+
+def test_lazy_router_imports_renderers_on_first_request(make_app, tmp_path):
+    app, router = make_app({
+        '/': {'python-renderer': str(tmp_path / 'page.py')}
+    }, files={'page.py': _RENDERER}, lazy=True)
+    imports = tmp_path / 'imports.txt'
+    assert not imports.exists()
+
+    client = app.test_client()
+    assert client.get('/').data == b'page'
+    assert client.get('/').data == b'page'
+    assert imports.read_text() == 'imported\n'
+
+
+def test_eager_router_imports_renderers_on_activation(make_app, tmp_path):
+    make_app({
+        '/': {'python-renderer': str(tmp_path / 'page.py')}
+    }, files={'page.py': _RENDERER})
+    assert (tmp_path / 'imports.txt').read_text() == 'imported\n'
+
+
+def test_lazy_view_builds_once_for_concurrent_requests():
+    builds = []
+
+    def build_view():
+        builds.append(1)
+        time.sleep(0.05)
+        return lambda: 'built'
+
+    view = _lazy_view(build_view)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(view()))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ['built'] * 8
+    assert len(builds) == 1
+
+
+def test_lazy_view_retries_a_failed_build():
+    attempts = []
+
+    def build_view():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ImportError("broken renderer")
+        return lambda: 'built'
+
+    view = _lazy_view(build_view)
+    with pytest.raises(ImportError):
+        view()
+    assert view() == 'built'
+    assert view() == 'built'
+    assert len(attempts) == 2
+
+
+_STREAMING_RENDERER = '''from flask import request
+
+from conductor import renderer, rmvals, rvar
+
+
+@renderer
+def render(*args, **kwargs):
+    yield 'start;'
+    # Runs after the view returned, while the response is sent
+    yield f"color={rvar('color')};"
+    yield f"route={rmvals()['raw_route']};"
+    yield f"path={request.path}"
+'''
+
+
+def test_streamed_renderer_keeps_its_context(make_app, tmp_path):
+    app, router = make_app({
+        '/stream': {
+            'python-renderer': str(tmp_path / 'stream.py'), 'color': 'red'
+        }
+    }, files={'stream.py': _STREAMING_RENDERER})
+    response = app.test_client().get('/stream', buffered=False)
+    assert list(response.response) == [
+        b'start;', b'color=red;', b'route=/stream;', b'path=/stream'
+    ]
+
+
+def test_stream_option_streams_templates(make_app):
+    app, router = make_app({
+        '/': {
+            'python-renderer': None, 'template': 'page.html',
+            '$stream': True, 'color': 'green'
+        },
+        '/plain': {
+            'python-renderer': None, 'template': 'page.html',
+            'color': 'blue'
+        }
+    }, {'page.html': (
+        "{% for i in range(3) %}{{ i }}{% endfor %}"
+        "|{{ rvar('color') }}|{{ request.path }}"
+    )})
+    client = app.test_client()
+    response = client.get('/', buffered=False)
+    chunks = list(response.response)
+    assert len(chunks) > 1
+    assert b''.join(chunks) == b'012|green|/'
+    response = client.get('/plain', buffered=False)
+    assert list(response.response) == [b'012|blue|/plain']
@@ -0,0 +1,195 @@
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(os, 'fork'), reason="PreforkStarter needs os.fork"
+)
+
+_RENDERERS = {
+    'pid.py': '''import os
+
+from conductor import renderer
+
+
+@renderer
+def render(*args, **kwargs):
+    return str(os.getpid())
+''',
+    'defer.py': '''import os
+
+import flask
+
+from conductor import renderer
+
+
+def _write(path, text):
+    with open(path, 'a') as file:
+        file.write(text + '\\n')
+
+
+@renderer
+def render(*args, **kwargs):
+    who = flask.request.args.get('who', 'warmup')
+    flask.current_app.extensions['conductor'].defer(
+        _write, os.path.join(os.path.dirname(__file__), 'deferred.txt'),
+        f"{who} {os.getpid()}"
+    )
+    return 'deferred'
+''',
+    'exit.py': '''import os
+
+from conductor import renderer
+
+
+@renderer
+def render(*args, **kwargs):
+    os._exit(1)
+''',
+    'slow.py': '''import time
+
+from conductor import renderer
+
+
+@renderer
+def render(*args, **kwargs):
+    time.sleep(1)
+    return 'slow'
+''',
+}
+
+_SERVER = '''import json
+import os
+import sys
+import threading
+
+from flask import Flask
+
+from conductor import Conductor, Router
+from conductor.serving import PreforkStarter
+
+directory = os.path.dirname(os.path.abspath(__file__))
+
+
+class RecordingStarter(PreforkStarter):
+    def __call__(self, app, host, port):
+        # The threads alive when the workers are forked
+        with open(os.path.join(directory, 'threads.json'), 'w') as file:
+            json.dump([t.name for t in threading.enumerate()], file)
+        super().__call__(app, host, port)
+
+
+app = Flask(__name__)
+conductor = Conductor(
+    app, Router(os.path.join(directory, 'router.json')), None,
+    host='127.0.0.1', port=int(sys.argv[1]),
+    starter=RecordingStarter(workers=1, drain_timeout=5)
+)
+
+
+@conductor.on_shutdown
+def write_shutdown():
+    with open(os.path.join(directory, 'shutdown.txt'), 'a') as file:
+        file.write(f"{os.getpid()}\\n")
+
+
+conductor.start()
+'''
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _get(port, path, timeout=5.0):
+    url = f"http://127.0.0.1:{port}{path}"
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return response.read().decode()
+
+
+def _wait_for(func, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            value = func()
+            if value:
+                return value
+        except (OSError, urllib.error.URLError):
+            pass
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out waiting for the server.")
+        time.sleep(0.05)
+
+
+def test_prefork_workers_restart_and_drain(tmp_path):
+    for name, source in _RENDERERS.items():
+        (tmp_path / name).write_text(source)
+    routes = {
+        '$version': '0.1',
+        '/pid': {'python-renderer': str(tmp_path / 'pid.py')},
+        '/defer': {'python-renderer': str(tmp_path / 'defer.py')},
+        '/exit': {
+            'python-renderer': str(tmp_path / 'exit.py'), '$warmup': False
+        },
+        '/slow': {
+            'python-renderer': str(tmp_path / 'slow.py'), '$warmup': False
+        },
+    }
+    (tmp_path / 'router.json').write_text(json.dumps(routes))
+    (tmp_path / 'server.py').write_text(_SERVER)
+
+    port = _free_port()
+    env = dict(os.environ, PYTHONPATH=os.getcwd())
+    parent = subprocess.Popen(
+        [sys.executable, str(tmp_path / 'server.py'), str(port)], env=env
+    )
+    try:
+        first = int(_wait_for(lambda: _get(port, '/pid')))
+
+        # The parent forked without background or watcher threads, after
+        # running the work its warmup deferred
+        threads = json.loads((tmp_path / 'threads.json').read_text())
+        assert threads == ['MainThread']
+        deferred = tmp_path / 'deferred.txt'
+        assert deferred.read_text() == f"warmup {parent.pid}\n"
+
+        # The worker has its own background threads
+        assert _get(port, '/defer?who=worker') == 'deferred'
+        _wait_for(lambda: f"worker {first}" in deferred.read_text())
+
+        # A worker that dies is replaced
+        with pytest.raises((OSError, urllib.error.URLError)):
+            _get(port, '/exit')
+        second = int(_wait_for(lambda: _get(port, '/pid')))
+        assert second != first
+
+        # SIGTERM lets in-flight requests finish before the worker exits
+        result = {}
+
+        def slow_request():
+            result['body'] = _get(port, '/slow')
+        request_thread = threading.Thread(target=slow_request)
+        request_thread.start()
+        time.sleep(0.3)
+        parent.send_signal(signal.SIGTERM)
+        request_thread.join(10)
+        assert result == {'body': 'slow'}
+        assert parent.wait(10) == 0
+        shutdowns = (tmp_path / 'shutdown.txt').read_text().split()
+        assert str(second) in shutdowns
+    finally:
+        if parent.poll() is None:
+            parent.kill()
+            parent.wait()
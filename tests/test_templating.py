@@ -0,0 +1,65 @@
+import os
+
+import pytest
+from flask import render_template
+
+from conductor.compiler import parse_router
+
+
+_EXAMPLE_ROUTER = os.path.join(
+    os.path.dirname(__file__), '..', 'testapp', 'example_router.json'
+)
+
+
+def test_defaults_templates_do_not_shadow_app_templates(make_app):
+    app, router = make_app({
+        '$defaults': {'template': {'$directory': '/pages/'}},
+        '/': {'python-renderer': None, 'template': 'index.html'},
+        '/rooted': {'python-renderer': None, 'template': '/other/page.html'}
+    }, {
+        'pages/index.html': 'router page',
+        'other/page.html': 'rooted page',
+        'index.html': 'app index'
+    })
+    client = app.test_client()
+    assert client.get('/').data == b'router page'
+    assert client.get('/rooted').data == b'rooted page'
+    with app.test_request_context():
+        assert render_template('index.html') == 'app index'
+
+
+def test_example_router_compiles():
+    with open(_EXAMPLE_ROUTER, 'rb') as router_file:
+        compiled = parse_router(router_file.read(), _EXAMPLE_ROUTER)
+    templates = {
+        route_cmeta['raw_route']: route_cmeta['template']
+        for route_cmeta in compiled['routes']
+    }
+    assert templates['@/home'] == '@router/templates/home.html'
+    assert templates['@/software/<name>'] == (
+        '@router/software/<name>/page.html'
+    )
+    assert templates['harmony/'] == '@router/harmony/index.html'
+    assert compiled['template_root'] == os.path.dirname(
+        os.path.abspath(_EXAMPLE_ROUTER)
+    )
+
+
+def test_bytecode_cache_can_be_disabled(make_app, tmp_path):
+    app, router = make_app({
+        '/': {'python-renderer': None, 'template': 'index.html'}
+    }, {'index.html': 'index'}, template_cache_dir=False)
+    assert app.jinja_env.bytecode_cache is None
+    assert not (tmp_path / '__conductor__' / 'jinja').exists()
+    assert app.test_client().get('/').data == b'index'
+
+
+def test_uncreatable_bytecode_cache_warns(make_app, tmp_path):
+    (tmp_path / 'blocker').write_text('a file, not a directory')
+    with pytest.warns(UserWarning, match='without a bytecode cache'):
+        app, router = make_app({
+            '/': {'python-renderer': None, 'template': 'index.html'}
+        }, {'index.html': 'index'},
+            template_cache_dir=str(tmp_path / 'blocker' / 'jinja'))
+    assert app.jinja_env.bytecode_cache is None
+    assert app.test_client().get('/').data == b'index'
@@ -0,0 +1,119 @@
+import pytest
+from flask import Flask
+
+from conductor import Conductor, Router
+from conductor.warmup import warm_routes, warmup_config
+
+
+_RENDERER = '''from flask import abort
+
+from conductor import renderer
+
+
+@renderer
+def render(*args, **kwargs):
+    fruit = kwargs.get('fruit')
+    if fruit == 'raise':
+        raise RuntimeError("no fruit")
+    if fruit == 'gone':
+        abort(503)
+    return f"fruit {fruit}"
+'''
+
+
+def _warmup_app(make_app, tmp_path, warmup, **router_kwargs):
+    fruit_route = {'python-renderer': str(tmp_path / 'fruit.py')}
+    if warmup is not None:
+        fruit_route['$warmup'] = warmup
+    app, router = make_app({
+        '/': {'python-renderer': None, 'template': 'index.html'},
+        '@/fruit/<fruit>': fruit_route,
+        '/form': {
+            'python-renderer': None, 'template': 'index.html',
+            '$methods': ['POST']
+        }
+    }, {'index.html': 'index', 'fruit.py': _RENDERER}, **router_kwargs)
+    app.config['PROPAGATE_EXCEPTIONS'] = False
+    return app, router
+
+
+def test_warms_default_and_sample_routes(make_app, tmp_path):
+    app, router = _warmup_app(
+        make_app, tmp_path, [{'fruit': 'apple'}, {'fruit': 'kiwi'}]
+    )
+    times = warm_routes(app, router)
+    assert sorted(times) == ['/', '/fruit/apple', '/fruit/kiwi']
+    assert all(seconds >= 0 for seconds in times.values())
+
+
+def test_reports_every_failed_route(make_app, tmp_path):
+    app, router = _warmup_app(
+        make_app, tmp_path,
+        [{'fruit': 'raise'}, {'fruit': 'apple'}, {'fruit': 'gone'}]
+    )
+    with pytest.raises(RuntimeError) as info:
+        warm_routes(app, router)
+    message = str(info.value)
+    assert '/fruit/raise (500 INTERNAL SERVER ERROR)' in message
+    assert '/fruit/gone (503 SERVICE UNAVAILABLE)' in message
+    assert '/fruit/apple' not in message
+
+
+def test_reports_exceptions_raised_by_the_client(make_app, tmp_path):
+    app, router = _warmup_app(make_app, tmp_path, [{'fruit': 'raise'}])
+    app.config['PROPAGATE_EXCEPTIONS'] = True
+    with pytest.raises(RuntimeError) as info:
+        warm_routes(app, router)
+    assert '/fruit/raise (RuntimeError: no fruit)' in str(info.value)
+
+
+def test_metrics_only_count_real_requests(make_app, tmp_path):
+    app, router = _warmup_app(
+        make_app, tmp_path, {'fruit': 'apple'}, metrics=True
+    )
+    warm_routes(app, router)
+    text = router.metrics.render_prometheus()
+    assert all(
+        line.endswith(' 0') or line.endswith(' 0.0')
+        for line in text.splitlines()
+        if line.startswith('conductor_requests_total')
+    )
+
+
+def test_listed_routes(make_app, tmp_path):
+    app, router = _warmup_app(make_app, tmp_path, False)
+    assert list(warm_routes(app, router, ['/'])) == ['/']
+    with pytest.raises(ValueError):
+        warm_routes(app, router, ['/missing'])
+    # Listed routes with URL parameters need $warmup args
+    app, router = _warmup_app(make_app, tmp_path, None)
+    with pytest.raises(ValueError):
+        warm_routes(app, router, ['@/fruit/<fruit>'])
+    assert list(warm_routes(app, router)) == ['/']
+
+
+def test_args_must_match_the_url_parameters(make_app, tmp_path):
+    app, router = _warmup_app(make_app, tmp_path, {'color': 'red'})
+    with pytest.raises(ValueError):
+        warm_routes(app, router)
+
+
+def test_failed_warmup_stops_start_before_binding(make_app, tmp_path):
+    _warmup_app(make_app, tmp_path, {'fruit': 'raise'})
+    # A second app from the same files, left for start() to activate
+    app = Flask(__name__, template_folder=str(tmp_path))
+    router = Router(str(tmp_path / 'router.json'))
+    started = []
+    conductor = Conductor(
+        app, router, None, host='127.0.0.1', port=8000,
+        starter=lambda app, host, port: started.append(port)
+    )
+    with pytest.raises(RuntimeError):
+        conductor.start()
+    assert started == []
+
+
+@pytest.mark.parametrize('config', ['yes', 1, [1], [{'fruit': True}]])
+def test_invalid_warmup_config(config):
+    with pytest.raises(ValueError):
+        warmup_config('/', config)